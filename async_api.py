@@ -0,0 +1,388 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional, Tuple
+import auth
+import crud_async
+import http_cache
+import schemas
+import serialization
+import storage
+from config import settings
+from database import AsyncReadSessionLocal, AsyncSessionLocal
+from filters import DOCUMENT_FILTERS, EMPLOYEE_FILTERS, VACATION_FILTERS, filter_param
+from includes import DEPARTMENT_INCLUDES, EMPLOYEE_INCLUDES, ROLE_INCLUDES, expand, include_param
+from pagination import with_next_cursor
+
+# Асинхронные версии маршрутов main.py. Подключаются при ASYNC_DB=true раньше
+# синхронных, поэтому перекрывают их; остальные маршруты остаются синхронными.
+# Идентификаторы объявлены как {..:int}, чтобы не перехватывать /employees/bulk и т.п.
+router = APIRouter()
+
+
+# Dependency для получения асинхронной сессии БД
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Только чтение: на реплику, если она настроена
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def conditional(*tables, cache_control: str = http_cache.REVALIDATE):
+    async def dependency(request: Request, response: Response,
+                         db: AsyncSession = Depends(get_async_read_db)) -> str:
+        versions = await db.run_sync(http_cache.read_versions, tables)
+        return http_cache.check(request, response, versions, cache_control)
+    return dependency
+
+
+# ---------- Auth ----------
+@router.post("/token", response_model=schemas.Token)
+async def issue_token(credentials: schemas.TokenRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user_by_username(db, credentials.username)
+    await db.close()
+    if not await auth.check_password(user, credentials.password):
+        raise auth.InvalidToken("Incorrect username or password")
+    return auth.issue_token(user.id, settings.secret_key, settings.algorithm, settings.access_token_expire_minutes)
+
+
+# ---------- Employees ----------
+@router.post("/employees/", response_model=schemas.Employee)
+async def create_employee(employee: schemas.EmployeeCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_employee(db, employee)
+
+@router.get("/employees/", response_model=List[schemas.EmployeeExpanded], response_model_exclude_unset=True,
+            dependencies=[Depends(conditional(*http_cache.EMPLOYEE_TABLES))])
+async def read_employees(response: Response, skip: int = 0, limit: int = 100,
+                         cursor: Optional[str] = None, sort: Optional[str] = None,
+                         include: Tuple[str, ...] = Depends(include_param(EMPLOYEE_INCLUDES)),
+                         filters: tuple = Depends(filter_param(EMPLOYEE_FILTERS)),
+                         db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization and not include:
+        return await crud_async.page_response(db, response, serialization.EMPLOYEES,
+                                              skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    items = await crud_async.get_employees(db, skip=skip, limit=limit, cursor=cursor, sort=sort,
+                                           include=include, filters=filters)
+    with_next_cursor(response, items, limit, sort)
+    return [expand(item, schemas.EmployeeExpanded, include) for item in items]
+
+@router.get("/employees/{employee_id:int}", response_model=schemas.EmployeeExpanded, response_model_exclude_unset=True)
+async def read_employee(employee_id: int, include: Tuple[str, ...] = Depends(include_param(EMPLOYEE_INCLUDES)),
+                        etag: str = Depends(conditional(*http_cache.EMPLOYEE_TABLES)),
+                        db: AsyncSession = Depends(get_async_read_db)):
+    if include:
+        employee = expand(await crud_async.get_employee(db, employee_id, include=include), schemas.EmployeeExpanded, include)
+    else:
+        employee = await crud_async.get_employee_cached(db, employee_id, version=etag)
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return employee
+
+@router.get("/employees/{employee_id:int}/reports", response_model=List[schemas.Employee],
+            dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+async def read_reports(employee_id: int, response: Response, skip: int = 0, limit: int = 100,
+                       cursor: Optional[str] = None, sort: Optional[str] = None,
+                       db: AsyncSession = Depends(get_async_read_db)):
+    items = await crud_async.get_reports(db, employee_id, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    if not items and not cursor and await crud_async.get_employee(db, employee_id) is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return with_next_cursor(response, items, limit, sort)
+
+@router.get("/employees/{employee_id:int}/history", response_model=List[schemas.HistoryEntry])
+async def read_employee_history(employee_id: int, response: Response, limit: int = Query(100, ge=1, le=1000),
+                                cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    items = await crud_async.get_history(db, "employees", employee_id, limit=limit, cursor=cursor)
+    return with_next_cursor(response, items, limit)
+
+@router.get("/employees/search/", response_model=List[schemas.Employee])
+async def search_employees(q: Optional[str] = None, last_name: Optional[str] = None,
+                           limit: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_async_read_db)):
+    query = q if q is not None else last_name
+    if not query:
+        raise HTTPException(status_code=400, detail="Query parameter 'q' is required")
+    return await crud_async.search_employees(db, query, limit=limit)
+
+@router.put("/employees/{employee_id:int}", response_model=schemas.Employee)
+async def update_employee(employee_id: int, employee: schemas.EmployeeUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated = await crud_async.update_employee(db, employee_id, employee)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return updated
+
+@router.delete("/employees/{employee_id:int}", response_model=schemas.Employee)
+async def delete_employee(employee_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await crud_async.delete_employee(db, employee_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return deleted
+
+
+# ---------- Departments ----------
+@router.post("/departments/", response_model=schemas.Department)
+async def create_department(department: schemas.DepartmentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_department(db, department)
+
+@router.get("/departments/", response_model=List[schemas.DepartmentExpanded], response_model_exclude_unset=True,
+            dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+async def read_departments(response: Response, skip: int = 0, limit: int = 100,
+                           cursor: Optional[str] = None, sort: Optional[str] = None,
+                           include: Tuple[str, ...] = Depends(include_param(DEPARTMENT_INCLUDES)),
+                           db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization and not include:
+        return await crud_async.page_response(db, response, serialization.DEPARTMENTS,
+                                              skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = await crud_async.get_departments(db, skip=skip, limit=limit, cursor=cursor, sort=sort, include=include)
+    with_next_cursor(response, items, limit, sort)
+    return [expand(item, schemas.DepartmentExpanded, include) for item in items]
+
+@router.get("/departments/stats", response_model=List[schemas.DepartmentStats],
+            dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+async def read_departments_stats(response: Response, skip: int = 0, limit: int = 100,
+                                 cursor: Optional[str] = None, sort: Optional[str] = None,
+                                 db: AsyncSession = Depends(get_async_read_db)):
+    items = await crud_async.get_departments_stats(db, skip=skip, limit=limit, cursor=cursor, sort=sort,
+                                                   summary=settings.department_stats_summary)
+    return with_next_cursor(response, items, limit, sort)
+
+@router.get("/departments/{department_id:int}/stats", response_model=schemas.DepartmentStats,
+            dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+async def read_department_stats(department_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    stats = await crud_async.get_department_stats(db, department_id, summary=settings.department_stats_summary)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return stats
+
+@router.get("/departments/{department_id:int}", response_model=schemas.DepartmentExpanded, response_model_exclude_unset=True)
+async def read_department(department_id: int, include: Tuple[str, ...] = Depends(include_param(DEPARTMENT_INCLUDES)),
+                          etag: str = Depends(conditional(*http_cache.DEPARTMENT_TABLES)),
+                          db: AsyncSession = Depends(get_async_read_db)):
+    if include:
+        department = expand(await crud_async.get_department(db, department_id, include=include), schemas.DepartmentExpanded, include)
+    else:
+        department = await crud_async.get_department_cached(db, department_id, version=etag)
+    if not department:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return department
+
+@router.put("/departments/{department_id:int}", response_model=schemas.Department)
+async def update_department(department_id: int, department: schemas.DepartmentCreate, db: AsyncSession = Depends(get_async_db)):
+    updated = await crud_async.update_department(db, department_id, department)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return updated
+
+@router.delete("/departments/{department_id:int}", response_model=schemas.Department)
+async def delete_department(department_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await crud_async.delete_department(db, department_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return deleted
+
+
+# ---------- Users ----------
+@router.post("/users/", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_user(db, user)
+
+@router.get("/users/", response_model=List[schemas.User])
+async def read_users(response: Response, skip: int = 0, limit: int = 100,
+                     cursor: Optional[str] = None, sort: Optional[str] = None,
+                     db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization:
+        return await crud_async.page_response(db, response, serialization.USERS,
+                                              skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = await crud_async.get_users(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    return with_next_cursor(response, items, limit, sort)
+
+@router.put("/users/{user_id:int}", response_model=schemas.User)
+async def update_user(user_id: int, user: schemas.UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated = await crud_async.update_user(db, user_id, user)
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return updated
+
+@router.delete("/users/{user_id:int}", response_model=schemas.User)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await crud_async.delete_user(db, user_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="User not found")
+    return deleted
+
+
+# ---------- Documents ----------
+@router.post("/documents/", response_model=schemas.Document)
+async def create_document(document: schemas.DocumentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_document(db, document)
+
+@router.get("/documents/", response_model=List[schemas.Document],
+            dependencies=[Depends(conditional(*http_cache.DOCUMENT_TABLES))])
+async def read_documents(response: Response, skip: int = 0, limit: int = 100,
+                         cursor: Optional[str] = None, sort: Optional[str] = None,
+                         filters: tuple = Depends(filter_param(DOCUMENT_FILTERS)),
+                         db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization:
+        return await crud_async.page_response(db, response, serialization.DOCUMENTS,
+                                              skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    items = await crud_async.get_documents(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    return with_next_cursor(response, items, limit, sort)
+
+@router.get("/documents/expiring", response_model=List[schemas.Document])
+async def read_expiring_documents(response: Response, within_days: int = Query(30, ge=0, le=3660),
+                                  skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                  db: AsyncSession = Depends(get_async_read_db)):
+    items = await crud_async.get_expiring_documents(db, within_days, skip=skip, limit=limit, cursor=cursor)
+    return with_next_cursor(response, items, limit, "expiration_date")
+
+@router.put("/documents/{document_id:int}", response_model=schemas.Document)
+async def update_document(document_id: int, document: schemas.DocumentCreate, db: AsyncSession = Depends(get_async_db)):
+    updated = await crud_async.update_document(db, document_id, document)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return updated
+
+@router.put("/documents/{document_id:int}/content", response_model=schemas.Document)
+async def upload_document_content(document_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.get_document(db, document_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    await db.close()
+    storage.check_content_length(request, settings.storage_max_upload_bytes)
+    blob = await storage.get_storage().save(request.stream(), settings.storage_max_upload_bytes)
+    document = await crud_async.set_document_content(db, document_id, blob, request.headers.get("content-type"))
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+@router.get("/documents/{document_id:int}/content")
+async def download_document_content(document_id: int, request: Request,
+                                    db: AsyncSession = Depends(get_async_read_db)):
+    document = await crud_async.get_document(db, document_id)
+    if document is None or document.content_sha256 is None:
+        raise HTTPException(status_code=404, detail="Document content not found")
+    return storage.content_response(request, storage.get_storage(), document.content_sha256,
+                                    document.content_type, os.path.basename(document.file_path) or None,
+                                    accel_redirect=settings.storage_accel_redirect)
+
+@router.delete("/documents/{document_id:int}", response_model=schemas.Document)
+async def delete_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await crud_async.delete_document(db, document_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return deleted
+
+
+# ---------- Vacations ----------
+@router.post("/vacations/", response_model=schemas.Vacation)
+async def create_vacation(vacation: schemas.VacationCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_vacation(db, vacation)
+
+@router.get("/vacations/", response_model=List[schemas.Vacation],
+            dependencies=[Depends(conditional(*http_cache.VACATION_TABLES))])
+async def read_vacations(response: Response, skip: int = 0, limit: int = 100,
+                         cursor: Optional[str] = None, sort: Optional[str] = None,
+                         filters: tuple = Depends(filter_param(VACATION_FILTERS)),
+                         db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization:
+        return await crud_async.page_response(db, response, serialization.VACATIONS,
+                                              skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    items = await crud_async.get_vacations(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    return with_next_cursor(response, items, limit, sort)
+
+@router.get("/vacations/calendar", response_model=List[schemas.Vacation],
+            dependencies=[Depends(conditional(*http_cache.VACATION_TABLES))])
+async def read_vacation_calendar(response: Response, date_from: date = Query(..., alias="from"),
+                                 date_to: date = Query(..., alias="to"), department_id: Optional[int] = None,
+                                 status: Optional[schemas.VacationStatus] = None,
+                                 skip: int = 0, limit: int = 100,
+                                 cursor: Optional[str] = None, sort: Optional[str] = None,
+                                 db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization:
+        return await crud_async.calendar_page_response(db, response, date_from, date_to, department_id, status,
+                                                       skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = await crud_async.get_vacation_calendar(
+        db, date_from=date_from, date_to=date_to, department_id=department_id, status=status,
+        skip=skip, limit=limit, cursor=cursor, sort=sort,
+    )
+    return with_next_cursor(response, items, limit, sort)
+
+@router.get("/vacations/calendar/headcount", response_model=List[schemas.CalendarDay],
+            dependencies=[Depends(conditional(*http_cache.VACATION_TABLES))])
+async def read_vacation_headcount(date_from: date = Query(..., alias="from"), date_to: date = Query(..., alias="to"),
+                                  department_id: Optional[int] = None,
+                                  status: Optional[schemas.VacationStatus] = None,
+                                  db: AsyncSession = Depends(get_async_read_db)):
+    return await crud_async.get_vacation_headcount(db, date_from=date_from, date_to=date_to,
+                                                   department_id=department_id, status=status)
+
+@router.put("/vacations/{vacation_id:int}", response_model=schemas.Vacation)
+async def update_vacation(vacation_id: int, vacation: schemas.VacationCreate, db: AsyncSession = Depends(get_async_db)):
+    updated = await crud_async.update_vacation(db, vacation_id, vacation)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Vacation not found")
+    return updated
+
+@router.delete("/vacations/{vacation_id:int}", response_model=schemas.Vacation)
+async def delete_vacation(vacation_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await crud_async.delete_vacation(db, vacation_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Vacation not found")
+    return deleted
+
+
+# ---------- Roles ----------
+@router.post("/roles/", response_model=schemas.Role)
+async def create_role(role: schemas.RoleCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_role(db, role)
+
+@router.get("/roles/", response_model=List[schemas.RoleExpanded], response_model_exclude_unset=True,
+            dependencies=[Depends(conditional(*http_cache.ROLE_TABLES))])
+async def read_roles(response: Response, skip: int = 0, limit: int = 100,
+                     cursor: Optional[str] = None, sort: Optional[str] = None,
+                     include: Tuple[str, ...] = Depends(include_param(ROLE_INCLUDES)),
+                     db: AsyncSession = Depends(get_async_read_db)):
+    if settings.fast_serialization and not include:
+        return await crud_async.page_response(db, response, serialization.ROLES,
+                                              skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = await crud_async.get_roles(db, skip=skip, limit=limit, cursor=cursor, sort=sort, include=include)
+    with_next_cursor(response, items, limit, sort)
+    return [expand(item, schemas.RoleExpanded, include) for item in items]
+
+@router.get("/roles/{role_id:int}/members", response_model=List[schemas.Employee],
+            dependencies=[Depends(conditional(*http_cache.ROLE_TABLES))])
+async def read_role_members(role_id: int, response: Response, skip: int = 0, limit: int = 100,
+                            cursor: Optional[str] = None, sort: Optional[str] = None,
+                            db: AsyncSession = Depends(get_async_read_db)):
+    items = await crud_async.get_role_members(db, role_id, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    if not items and not cursor and await crud_async.get_role(db, role_id) is None:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return with_next_cursor(response, items, limit, sort)
+
+@router.post("/roles/{role_id:int}/members", response_model=schemas.RoleMembersResult)
+async def add_role_members(role_id: int, members: schemas.RoleMembers, db: AsyncSession = Depends(get_async_db)):
+    result = await crud_async.add_role_members(db, role_id, members.employee_ids)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return result
+
+@router.delete("/roles/{role_id:int}/members", response_model=schemas.RoleMembersResult)
+async def remove_role_members(role_id: int, members: schemas.RoleMembers, db: AsyncSession = Depends(get_async_db)):
+    result = await crud_async.remove_role_members(db, role_id, members.employee_ids)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return result
+
+@router.put("/roles/{role_id:int}", response_model=schemas.Role)
+async def update_role(role_id: int, role: schemas.RoleCreate, db: AsyncSession = Depends(get_async_db)):
+    updated = await crud_async.update_role(db, role_id, role)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return updated
+
+@router.delete("/roles/{role_id:int}", response_model=schemas.Role)
+async def delete_role(role_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted = await crud_async.delete_role(db, role_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return deleted
@@ -0,0 +1,304 @@
+"""
+Журнал изменений (audit_log): кто, когда и какие поля сущности поменял.
+
+Захват. UPDATE в crud.py идут одной командой мимо unit of work, истории
+атрибутов у ORM нет. В PostgreSQL прежние значения изменяемых колонок
+возвращает сам UPDATE: UPDATE ... FROM (SELECT ... FOR UPDATE) old ...
+RETURNING old.* (old_values), лишнего обмена с сервером нет. В SQLite
+RETURNING отдаёт только новые значения, поэтому перед UPDATE идёт один SELECT
+по первичному ключу (diff) — в процессе, без сети. Разница кладётся в
+session.info; after_commit передаёт её писателю, after_rollback выбрасывает:
+откаченное изменение (и откат точки сохранения) в журнал не попадает.
+
+Запись отложенная. AuditWriter — поток с ограниченной очередью: пишет пачками
+до AUDIT_BATCH_SIZE строк одним INSERT в своей транзакции, не реже раза в
+AUDIT_FLUSH_SECONDS. Запрос INSERT журнала не ждёт и не пишет его сам.
+Очередь полна — submit в рабочем потоке (синхронные маршруты, фоновые
+задачи) ждёт места до BACKPRESSURE_SECONDS: запрос замедляется до скорости
+писателя. В потоке event loop (after_commit в crud_async) ждать нельзя —
+встали бы все запросы воркера; там, как и после истечения ожидания, лишние
+строки отбрасываются и считаются в stats()["dropped"], в лог идёт
+предупреждение не чаще раза в DROP_WARNING_SECONDS. При остановке
+приложения (lifespan) и выходе процесса (atexit) очередь дописывается;
+при аварийном завершении теряется не больше, чем накоплено за AUDIT_FLUSH_SECONDS.
+"""
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+import models
+from auth import current_user_id
+from config import settings
+
+logger = logging.getLogger("audit")
+
+# Значения не сохраняются, только факт изменения
+REDACTED = frozenset({"password"})
+
+# Повторы записи пачки при ошибке БД, пауза удваивается
+WRITE_ATTEMPTS = 3
+RETRY_DELAY = 0.5
+
+# Сколько рабочий поток ждёт места в полной очереди, прежде чем отбрасывать
+BACKPRESSURE_SECONDS = 30.0
+# Предупреждение об отброшенных строках — не чаще раза в столько секунд
+DROP_WARNING_SECONDS = 60.0
+
+_STOP = object()
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+# ---------- CAPTURE ----------
+def captured_in_update(db: Session) -> bool:
+    """
+    PostgreSQL: прежние значения возвращает сам UPDATE — UPDATE ... FROM
+    (SELECT ... FOR UPDATE) old ... RETURNING old.*, см. old_values(). Подзапрос
+    блокирует строки до UPDATE, поэтому прежние значения те, что он и заменил.
+    """
+    return settings.audit_enabled and db.get_bind().dialect.name == "postgresql"
+
+
+def _columns(rows: dict) -> list:
+    return sorted({name for values in rows.values() for name in values} - {"id"})
+
+
+def old_values(model, ids, columns):
+    """Подзапрос прежних значений колонок для UPDATE ... FROM; соединять по old.c.id."""
+    return (
+        select(model.id, *(getattr(model, name) for name in columns))
+        .where(model.id.in_(list(ids)))
+        .with_for_update()
+        .subquery("old")
+    )
+
+
+def entries(model, rows: dict, old: dict) -> list:
+    """
+    rows — {id: {колонка: новое значение}}, old — {id: {колонка: прежнее}}.
+    Записи журнала для изменившихся полей; строки без прежних значений пропускаются.
+    """
+    if not settings.audit_enabled:
+        return []
+    entity, changed_by, result = model.__tablename__, current_user_id.get(), []
+    for object_id, values in rows.items():
+        previous = old.get(object_id)
+        if previous is None:
+            continue
+        changes = {}
+        for name, value in values.items():
+            if name == "id" or _plain(previous[name]) == _plain(value):
+                continue
+            changes[name] = ({"old": None, "new": None} if name in REDACTED
+                             else {"old": _plain(previous[name]), "new": _plain(value)})
+        if changes:
+            result.append({"entity": entity, "entity_id": object_id, "changes": changes, "changed_by": changed_by})
+    return result
+
+
+def diff(db: Session, model, rows: dict) -> list:
+    """
+    Без захвата в UPDATE (SQLite): читает прежние значения одним SELECT. SQLite
+    в процессе, писатель у базы один — лишний SELECT не ходит по сети и не
+    разминётся с чужой записью. Вызывать до UPDATE, передавать в stage() после него.
+    """
+    if not settings.audit_enabled or not rows:
+        return []
+    columns = _columns(rows)
+    if not columns:
+        return []
+    current = db.execute(
+        select(model.id, *(getattr(model, name) for name in columns)).where(model.id.in_(list(rows)))
+    )
+    return entries(model, rows, {row.id: row._mapping for row in current})
+
+
+def stage(db: Session, entries: list):
+    """Отложить записи до commit сессии."""
+    if entries:
+        db.info.setdefault("audit", []).extend(entries)
+
+
+# Точки сохранения: commit точки ничего не отдаёт писателю, откат выбрасывает
+# только записи, сделанные после неё
+@event.listens_for(Session, "after_transaction_create")
+def _after_transaction_create(session, transaction):
+    if transaction.nested:
+        session.info.setdefault("audit_savepoints", {})[transaction] = len(session.info.get("audit", ()))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    if transaction.nested:
+        session.info.get("audit_savepoints", {}).pop(transaction, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.in_nested_transaction():
+        return
+    entries = session.info.pop("audit", None)
+    if entries:
+        changed_at = datetime.utcnow()
+        for entry in entries:
+            entry["changed_at"] = changed_at
+        get_audit_writer().submit(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    if session.in_nested_transaction():
+        mark = session.info.get("audit_savepoints", {}).get(session.get_nested_transaction())
+        if mark is not None and "audit" in session.info:
+            del session.info["audit"][mark:]
+        return
+    session.info.pop("audit", None)
+
+
+# ---------- WRITER ----------
+def _on_event_loop() -> bool:
+    # AsyncSession.run_sync выполняет сессию в потоке event loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AuditWriter:
+    """Поток, который пишет журнал пачками из ограниченной очереди."""
+
+    def __init__(self, session_factory, queue_size: int, batch_size: int, flush_seconds: float):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._counters = {"written": 0, "batches": 0, "dropped": 0, "failed": 0}
+        self._dropped_since_warning = 0
+        self._last_drop_warning: Optional[float] = None
+
+    def submit(self, entries: list):
+        """В потоке event loop не блокирует; в рабочем потоке ждёт места до BACKPRESSURE_SECONDS."""
+        self._ensure_started()
+        deadline = None if _on_event_loop() else time.monotonic() + BACKPRESSURE_SECONDS
+        dropped = 0
+        for entry in entries:
+            try:
+                if deadline is None:
+                    self._queue.put_nowait(entry)
+                else:
+                    self._queue.put(entry, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                dropped += 1
+        if dropped:
+            self._dropped(dropped)
+
+    def _dropped(self, count: int):
+        now = time.monotonic()
+        with self._lock:
+            self._counters["dropped"] += count
+            self._dropped_since_warning += count
+            if self._last_drop_warning is not None and now - self._last_drop_warning < DROP_WARNING_SECONDS:
+                return
+            dropped, self._dropped_since_warning, self._last_drop_warning = self._dropped_since_warning, 0, now
+        logger.warning("Audit queue is full: dropped %d entries (AUDIT_QUEUE_SIZE=%d)", dropped, self._queue.maxsize)
+
+    def flush(self):
+        """Дождаться записи всего, что уже в очереди."""
+        self._queue.join()
+
+    def stop(self):
+        """Дописать очередь и остановить поток; следующий submit запустит его снова."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch, stop = [item], False
+            # Пачка копится до batch_size или flush_seconds от первой записи
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list):
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                with self.session_factory() as db:
+                    db.execute(insert(models.AuditLog), batch)
+                    db.commit()
+                self._count("written", len(batch))
+                self._count("batches", 1)
+                return
+            except Exception:
+                logger.exception("Audit batch of %d entries failed (attempt %d)", len(batch), attempt + 1)
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+        self._count("failed", len(batch))
+
+    def _count(self, name: str, value: int):
+        with self._lock:
+            self._counters[name] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), **self._counters}
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+def get_audit_writer() -> AuditWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            from database import SessionLocal
+
+            _writer = AuditWriter(SessionLocal, settings.audit_queue_size, settings.audit_batch_size,
+                                  settings.audit_flush_seconds)
+            atexit.register(_writer.stop)
+        return _writer
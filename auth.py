@@ -0,0 +1,221 @@
+"""
+Аутентификация по JWT.
+
+POST /token проверяет пароль (bcrypt в пуле hashing.py) один раз и выдаёт
+подписанный токен. Дальше каждый запрос проверяется без БД и без bcrypt:
+подпись HMAC и срок — по самому токену, отзыв — по списку в памяти,
+пользователь (schemas.Principal) — из TTL-кэша cache.py; в БД идём только
+на промахе кэша, одним SELECT users LEFT JOIN employees.
+
+Токен подписывает и проверяет PyJWT: HS256/HS384/HS512 (settings.algorithm),
+принимается только настроенный alg, exp и обязательные claims проверяет
+библиотека. Список отзыва и кэш живут в процессе и между воркерами не
+синхронизируются: отзыв в другом воркере не виден, поэтому срок токена
+(access_token_expire_minutes) держим коротким.
+"""
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+import jwt
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+import models
+import schemas
+from cache import entity_key, get_cache
+from config import settings
+from hashing import get_hasher
+
+# Подпись общим SECRET_KEY; RS/ES потребовали бы пару ключей
+ALGORITHMS = ("HS256", "HS384", "HS512")
+
+# Маршруты без токена: выдача токена и сбор метрик
+PUBLIC_PATHS = frozenset({"/token", "/metrics"})
+
+
+# Пользователь текущего запроса — для журнала изменений (audit.py). Starlette
+# копирует контекст в поток пула, поэтому значение видно и синхронным маршрутам
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+# ---------- JWT ----------
+def encode(claims: dict, key: str, algorithm: str) -> str:
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unsupported JWT algorithm {algorithm}; use one of {', '.join(ALGORITHMS)}")
+    return jwt.encode(claims, key, algorithm=algorithm)
+
+
+def decode(token: str, key: str, algorithm: str) -> dict:
+    """Подпись, alg (только настроенный) и exp проверяет PyJWT; sub, exp и iat обязательны."""
+    try:
+        claims = jwt.decode(token, key, algorithms=[algorithm], options={"require": ["sub", "exp", "iat"]})
+        int(claims["sub"])
+    except jwt.ExpiredSignatureError:
+        raise InvalidToken("Token has expired")
+    except jwt.InvalidAlgorithmError:
+        raise InvalidToken("Unexpected token algorithm")
+    except jwt.InvalidSignatureError:
+        raise InvalidToken("Invalid token signature")
+    except (jwt.InvalidTokenError, ValueError):
+        raise InvalidToken("Malformed token")
+    return claims
+
+
+def issue_token(user_id: int, key: str, algorithm: str, expire_minutes: int) -> schemas.Token:
+    # iat дробный: отзыв «всех токенов до момента T» не заденет токен, выданный сразу после
+    issued_at = round(time.time(), 3)
+    claims = {
+        "sub": str(user_id),
+        "iat": issued_at,
+        "exp": int(issued_at + expire_minutes * 60),
+        "jti": uuid.uuid4().hex,
+    }
+    return schemas.Token(access_token=encode(claims, key, algorithm), expires_in=expire_minutes * 60)
+
+
+_dummy_hash: Optional[str] = None
+
+async def check_password(user, password: str) -> bool:
+    """
+    bcrypt в пуле hashing.py — единственная дорогая проверка, при выдаче токена.
+    Для неизвестного логина проверяем фиктивный хэш: время ответа не выдаёт,
+    есть ли такой пользователь.
+    """
+    global _dummy_hash
+    if user is None and _dummy_hash is None:
+        _dummy_hash = await get_hasher().hash_async(uuid.uuid4().hex)
+    valid = await get_hasher().verify_async(password, user.password if user is not None else _dummy_hash)
+    return valid and user is not None and bool(user.is_active)
+
+
+# ---------- REVOCATION ----------
+class RevocationList:
+    """
+    Отозванные токены (jti) и пользователи, чьи токены до момента T недействительны
+    (смена пароля, удаление). Запись нужна, только пока отозванный токен не истёк сам.
+    """
+
+    def __init__(self, retention_seconds: float):
+        self.retention_seconds = retention_seconds
+        self._tokens = {}  # jti -> exp
+        self._users = {}  # user_id -> (revoked_before, хранить до)
+        self._lock = threading.Lock()
+        self._prune_at = 1024
+
+    def revoke_token(self, jti: str, expires_at: float):
+        with self._lock:
+            self._tokens[jti] = expires_at
+            self._maybe_prune()
+
+    def revoke_user(self, user_id: int, before: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._users[user_id] = (before or now, now + self.retention_seconds)
+            self._maybe_prune()
+
+    def is_revoked(self, claims: dict) -> bool:
+        # Без блокировки: чтение dict атомарно, а запись в него идёт под _lock
+        if claims.get("jti") in self._tokens:
+            return True
+        entry = self._users.get(int(claims["sub"]))
+        return entry is not None and claims["iat"] <= entry[0]
+
+    def _maybe_prune(self):
+        # Чистим, когда записей стало вдвое больше, чем после прошлой чистки
+        if len(self._tokens) + len(self._users) < self._prune_at:
+            return
+        now = time.time()
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        self._users = {user_id: entry for user_id, entry in self._users.items() if entry[1] > now}
+        self._prune_at = max(1024, 2 * (len(self._tokens) + len(self._users)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"revoked_tokens": len(self._tokens), "revoked_users": len(self._users)}
+
+
+_revocations: Optional[RevocationList] = None
+_revocations_lock = threading.Lock()
+
+def get_revocations() -> RevocationList:
+    global _revocations
+    with _revocations_lock:
+        if _revocations is None:
+            _revocations = RevocationList(settings.access_token_expire_minutes * 60)
+        return _revocations
+
+
+# ---------- PRINCIPAL ----------
+def load_principal(db, user_id: int) -> Optional[schemas.Principal]:
+    row = (
+        db.query(models.User.id.label("user_id"), models.User.username, models.User.is_active,
+                 models.User.employee_id, models.Employee.department_id)
+        .outerjoin(models.Employee, models.Employee.id == models.User.employee_id)
+        .filter(models.User.id == user_id)
+        .first()
+    )
+    return schemas.Principal(**row._asdict()) if row is not None else None
+
+
+def invalidate_principal(user_id: int):
+    get_cache().delete(entity_key("principal", user_id))
+
+
+def _load_principal_cached(user_id: int) -> Optional[schemas.Principal]:
+    from database import ReadSessionLocal
+
+    with ReadSessionLocal() as db:
+        principal = load_principal(db, user_id)
+    if principal is not None:
+        get_cache().set(entity_key("principal", user_id), principal, ttl=settings.auth_principal_ttl_seconds)
+    return principal
+
+
+def bearer_token(request: Request) -> str:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise InvalidToken("Not authenticated")
+    return token.strip()
+
+
+def verify_request(request: Request) -> dict:
+    """Проверенные claims токена из Authorization: подпись, срок, отзыв — без БД."""
+    claims = decode(bearer_token(request), settings.secret_key, settings.algorithm)
+    if get_revocations().is_revoked(claims):
+        raise InvalidToken("Token has been revoked")
+    return claims
+
+
+async def resolve_principal(claims: dict) -> schemas.Principal:
+    user_id = int(claims["sub"])
+    principal = get_cache().get(entity_key("principal", user_id))
+    if principal is None:
+        principal = await run_in_threadpool(_load_principal_cached, user_id)
+    if principal is None or not principal.is_active:
+        raise InvalidToken("User is inactive or no longer exists")
+    current_user_id.set(principal.user_id)
+    return principal
+
+
+# Dependencies объявлены async: sync-dependency FastAPI выполнял бы в пуле потоков,
+# а на попадании в кэш здесь нет ни SQL, ни ожидания
+async def token_claims(request: Request) -> dict:
+    return verify_request(request)
+
+
+async def current_principal(claims: dict = Depends(token_claims)) -> schemas.Principal:
+    return await resolve_principal(claims)
+
+
+async def require_principal(request: Request):
+    """Глобальная dependency при AUTH_REQUIRED=true: всё, кроме PUBLIC_PATHS, с токеном."""
+    if request.url.path in PUBLIC_PATHS:
+        return None
+    request.state.principal = await resolve_principal(verify_request(request))
+    return request.state.principal
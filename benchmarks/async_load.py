@@ -0,0 +1,97 @@
+"""
+Пропускная способность синхронного и асинхронного режима при высокой конкуренции.
+
+    python -m benchmarks.async_load --concurrency 200 --requests 5000
+
+Каждый режим запускается в отдельном процессе (ASYNC_DB читается при импорте).
+Нужны httpx и асинхронный драйвер (aiosqlite / asyncpg).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, seed_employees, summarize, use_database
+
+
+async def drive(app, concurrency: int, total: int, rows: int):
+    import httpx
+
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(f"/employees/{i % rows + 1}")
+                    response.raise_for_status()
+                except Exception:
+                    # Например, TimeoutError пула соединений при исчерпании потоков
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    result = summarize(latencies) if latencies else {"n": 0}
+    result["errors"] = errors
+    result["rps"] = round(len(latencies) / elapsed, 1)
+    return result
+
+
+def run_mode(args):
+    use_database()
+    import migrate
+    import models
+    from database import SessionLocal
+
+    migrate.upgrade()
+    with SessionLocal() as session:
+        seed_employees(session, models, args.rows)
+    import main
+    return asyncio.run(drive(main.app, args.concurrency, args.requests, args.rows))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--deadline", type=int, default=120,
+                        help="секунд на режим; синхронный режим может встать намертво")
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = {}
+    for mode in ("sync", "async"):
+        env = dict(os.environ, ASYNC_DB="true" if mode == "async" else "false")
+        try:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.async_load", "--mode", mode,
+                 "--rows", str(args.rows), "--concurrency", str(args.concurrency),
+                 "--requests", str(args.requests)],
+                cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+                timeout=args.deadline,
+            ).stdout
+        except subprocess.TimeoutExpired:
+            # Все потоки пула Starlette ждут соединение, а закрыть сессии некому
+            results[mode] = {"stalled": True, "deadline_s": args.deadline}
+            continue
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
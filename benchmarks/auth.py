@@ -0,0 +1,109 @@
+"""
+Цена аутентификации на запрос: без токена, JWT с кэшем пользователя, JWT с
+SELECT пользователя на каждый запрос и для сравнения — поиск пользователя
+плюс bcrypt на каждый запрос (чего auth.py избегает).
+
+    python -m benchmarks.auth --requests 2000
+
+Режимы запускаются в отдельных процессах (AUTH_REQUIRED читается при импорте
+main). Меряется GET /employees/{id} — короткий маршрут, на нём доля проверки
+токена видна лучше всего.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, seed_employees, summarize, timed, use_database
+
+AUTH_DB = os.path.join(ROOT, "auth_bench.db")
+
+MODES = {
+    "off": {"AUTH_REQUIRED": "false"},
+    "jwt_cached": {"AUTH_REQUIRED": "true"},
+    "jwt_db_lookup": {"AUTH_REQUIRED": "true", "AUTH_PRINCIPAL_TTL_SECONDS": "0"},
+}
+
+
+def prepare(rows: int):
+    use_database(f"sqlite:///{AUTH_DB}")
+    import crud
+    import migrate
+    import models
+    import schemas
+    from database import SessionLocal
+
+    migrate.upgrade()
+    with SessionLocal() as session:
+        seed_employees(session, models, rows)
+        if crud.get_user_by_username(session, "bench") is None:
+            crud.create_user(session, schemas.UserCreate(
+                username="bench", email="bench@example.com", password="bench", employee_id=1))
+
+
+def run_mode(args):
+    prepare(args.rows)
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    token = client.post("/token", json={"username": "bench", "password": "bench"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(args.warmup):
+        client.get(f"/employees/{i % args.rows + 1}", headers=headers).raise_for_status()
+    samples = []
+    for i in range(args.requests):
+        started = time.perf_counter()
+        client.get(f"/employees/{i % args.rows + 1}", headers=headers).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def bcrypt_per_request(repeat: int):
+    """Поиск пользователя и проверка пароля, как при Basic-аутентификации на каждый запрос."""
+    prepare(1)
+    import crud
+    from database import SessionLocal
+    from hashing import pwd_context
+
+    def check():
+        with SessionLocal() as session:
+            user = crud.get_user_by_username(session, "bench")
+            pwd_context.verify("bench", user.password)
+
+    return timed(check, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--mode", choices=[*MODES, "all"], default="all")
+    args = parser.parse_args()
+
+    if args.mode != "all":
+        print(json.dumps(run_mode(args)))
+        return
+
+    if os.path.exists(AUTH_DB):
+        os.remove(AUTH_DB)
+    results = {}
+    for mode, env in MODES.items():
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.auth", "--mode", mode, "--rows", str(args.rows),
+             "--requests", str(args.requests), "--warmup", str(args.warmup)],
+            cwd=ROOT, env=dict(os.environ, **env), check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    for mode in ("jwt_cached", "jwt_db_lookup"):
+        results[mode]["overhead_p50_ms"] = round(results[mode]["p50_ms"] - results["off"]["p50_ms"], 3)
+    results["bcrypt_per_request"] = bcrypt_per_request(20)
+    os.remove(AUTH_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
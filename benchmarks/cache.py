@@ -0,0 +1,56 @@
+"""
+Задержка GET /employees/{id} с кэшем и без.
+
+    python -m benchmarks.cache --requests 20000 --hot 1000
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import seed_employees, summarize, use_database
+
+
+def run(client, ids, requests: int):
+    samples = []
+    for _ in range(requests):
+        employee_id = random.choice(ids)
+        start = time.perf_counter()
+        client.get(f"/employees/{employee_id}").raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--hot", type=int, default=1000, help="размер горячего набора id")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    use_database()
+    import migrate
+    migrate.upgrade()  # до импорта main: он ставит поисковый индекс на готовые таблицы
+    from fastapi.testclient import TestClient
+    import cache
+    import main as app_module
+    import models
+    from config import settings
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        seed_employees(session, models, args.rows)
+    client = TestClient(app_module.app)
+    ids = random.sample(range(1, args.rows + 1), args.hot)
+
+    results = {}
+    cache.configure(cache.NullCache())
+    results["no_cache"] = run(client, ids, args.requests)
+    cache.configure(cache.LRUCache(max_entries=settings.cache_max_entries, ttl=settings.cache_ttl_seconds))
+    results["cache"] = run(client, ids, args.requests)
+    results["cache"]["stats"] = cache.get_cache().stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
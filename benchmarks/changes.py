@@ -0,0 +1,172 @@
+"""
+Лента изменений: тысячи простаивающих подписчиков GET /changes/stream на
+один воркер и цена outbox-триггеров на запись.
+
+    python -m benchmarks.changes --subscribers 5000 --writes 200
+
+Подписчики подключаются к main.app напрямую по ASGI, без сокетов и сервера:
+меряется то, что стоит подписчик самому приложению. Печатает память и потоки
+на подписчика, SQL за время простоя (должен не зависеть от числа
+подписчиков), задержку от фиксации записи до кадра у подписчика и время
+UPDATE сотрудника с триггером change_events и без него.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+from benchmarks.common import ROOT, dispose, seed_employees, summarize, timed, use_database
+
+CHANGES_DB = os.path.join(ROOT, "changes_bench.db")
+
+
+class Subscriber:
+    """Клиент SSE на ASGI-вызове: кадры складываются в очередь, отключение — по close()."""
+
+    def __init__(self, app, path: str):
+        self.frames = asyncio.Queue()
+        self.closed = asyncio.Event()
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "headers": [], "http_version": "1.1", "scheme": "http",
+            "server": ("bench", 80), "client": ("bench", 1), "root_path": "", "app": app,
+        }
+        self.task = asyncio.create_task(app(scope, self._receive, self._send))
+
+    async def _receive(self):
+        await self.closed.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            await self.frames.put((time.perf_counter(), message["body"]))
+
+    async def close(self):
+        self.closed.set()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+async def measure_stream(app, feed, statements, subscribers: int, writes: int, idle: float) -> dict:
+    import crud
+    import schemas
+    from database import SessionLocal
+
+    threads = threading.active_count()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    clients = [Subscriber(app, "/changes/stream?tables=employees") for _ in range(subscribers)]
+    while feed.stats()["subscribers"] < subscribers:
+        await asyncio.sleep(0.01)
+    subscribe_seconds = time.perf_counter() - started
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    memory = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    statements.clear()
+    await asyncio.sleep(idle)
+    idle_sql = len(statements)
+
+    def update(i):
+        with SessionLocal() as db:
+            crud.update_employee(db, i % 100 + 1, schemas.EmployeeUpdate(position=f"engineer {i}"))
+        return time.perf_counter()
+
+    first, last = [], []
+    for i in range(writes):
+        # Запись в случайный момент цикла опроса, а не сразу после него
+        await asyncio.sleep(random.uniform(0, feed.poll_interval))
+        committed = await asyncio.to_thread(update, i)
+        arrivals = [(await client.frames.get())[0] for client in clients]
+        first.append((min(arrivals) - committed) * 1000)
+        last.append((max(arrivals) - committed) * 1000)
+    for client in clients:
+        await client.close()
+    return {
+        "subscribers": subscribers,
+        "subscribe_seconds": round(subscribe_seconds, 3),
+        "memory_kb_per_subscriber": round(memory / subscribers / 1024, 2),
+        "extra_threads": threading.active_count() - threads,
+        "idle_sql_per_second": round(idle_sql / idle, 2),
+        # От фиксации до кадра у первого и у последнего подписчика (вся раздача)
+        "delivery_first": summarize(first),
+        "delivery_all": summarize(last),
+    }
+
+
+def write_overhead(repeat: int) -> dict:
+    """UPDATE сотрудника через crud с триггером change_events и без него."""
+    import crud
+    import schemas
+    from sqlalchemy import text
+    from database import SessionLocal, engine
+
+    counter = iter(range(10 ** 9))
+
+    def update():
+        with SessionLocal() as db:
+            crud.update_employee(db, 1, schemas.EmployeeUpdate(position=f"engineer {next(counter)}"))
+
+    with_trigger = timed(update, repeat)
+    with engine.begin() as connection:
+        sql = connection.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'employees_changes_au'")).scalar()
+        connection.execute(text("DROP TRIGGER employees_changes_au"))
+    without_trigger = timed(update, repeat)
+    with engine.begin() as connection:
+        connection.execute(text(sql))
+    return {"with_trigger": with_trigger, "without_trigger": without_trigger}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=100)
+    parser.add_argument("--idle", type=float, default=3.0, help="секунд простоя для подсчёта SQL")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    if os.path.exists(CHANGES_DB):
+        os.remove(CHANGES_DB)
+    use_database(f"sqlite:///{CHANGES_DB}")
+    from sqlalchemy import event
+    import migrate
+    migrate.upgrade()
+    import changes
+    import main as app_module
+    import models
+    from database import SessionLocal, engine
+
+    with SessionLocal() as session:
+        seed_employees(session, models, 1000)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *rest: statements.append(statement))
+    feed = changes.get_change_feed()
+
+    async def run():
+        warmup = Subscriber(app_module.app, "/changes/stream")
+        await asyncio.sleep(0.1)
+        await warmup.close()
+        results = {}
+        for subscribers in sorted({1, args.subscribers}):
+            results[f"stream_{subscribers}"] = await measure_stream(
+                app_module.app, feed, statements, subscribers, args.writes, args.idle)
+        await feed.stop()
+        return results
+
+    results = asyncio.run(run())
+    results["update_employee"] = write_overhead(args.repeat)
+    dispose(engine)
+    os.remove(CHANGES_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import date, datetime, timedelta
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.path.join(ROOT, "bench.db")
+
+
+def use_database(url: str = None):
+    """
+    Направляет приложение на отдельную БД для бенчмарков.
+    Вызывать до импорта config/database.
+    """
+    os.environ["DATABASE_URL"] = url or os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{DEFAULT_DB}")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return os.environ["DATABASE_URL"]
+
+
+def dispose(engine):
+    """Перед удалением базы: дописать отложенный журнал изменений (audit.py) и закрыть соединения."""
+    import audit
+    audit.get_audit_writer().stop()
+    engine.dispose()
+
+
+def timed(fn, repeat: int = 20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(pct(50), 3),
+        "p95_ms": round(pct(95), 3),
+        "p99_ms": round(pct(99), 3),
+    }
+
+
+def seed_employees(session, models, rows: int, department_ids=()):
+    """department_ids — отделы, по которым сотрудники раскладываются по кругу."""
+    if session.query(models.Employee).count() >= rows:
+        return
+    session.query(models.Employee).delete()
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "employee_code": f"E{i:08d}",
+            "last_name": f"Last{i % 5000}",
+            "first_name": f"First{i % 300}",
+            "position": "engineer",
+            "hire_date": date(2000, 1, 1) + timedelta(days=i % 9000),
+            "salary": 1000 + i % 5000,
+            "status": "active",
+            "department_id": department_ids[i % len(department_ids)] if department_ids else None,
+        })
+        if len(batch) == 10000:
+            session.execute(models.Employee.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        session.execute(models.Employee.__table__.insert(), batch)
+    session.commit()
+
+
+def git_revision() -> dict:
+    """Коммит рабочей копии: результаты разных коммитов сравнивает benchmarks.compare."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def write_results(path: str, results: dict, **meta):
+    """JSON с результатами и условиями замера (коммит, Python, параметры)."""
+    document = {
+        "meta": {
+            **git_revision(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **meta,
+        },
+        "results": results,
+    }
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2)
+    return document
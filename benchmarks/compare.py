@@ -0,0 +1,72 @@
+"""
+Сравнение двух файлов результатов (--out у crud_micro, http_load, suite).
+
+    python -m benchmarks.compare bench_results/abc1234.json bench_results/def5678.json
+    python -m benchmarks.compare old.json new.json --metric p99_ms --threshold 20
+
+Для каждого замера, который есть в обоих файлах, печатает метрику и
+изменение в процентах. Завершается с кодом 1, если какой-то замер стал
+медленнее больше чем на --threshold процентов. Замеры быстрее --min-ms в
+старом файле не проверяются: на них изменение — в основном шум.
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """{путь: метрики} для всех замеров (словарей с p50_ms) на любой глубине."""
+    found = {}
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        path = f"{prefix}{key}"
+        if "p50_ms" in value:
+            found[path] = value
+        else:
+            found.update(flatten(value, f"{path} / "))
+    return found
+
+
+def compare(base: dict, new: dict, metric: str, threshold: float, min_ms: float):
+    base_results, new_results = flatten(base["results"]), flatten(new["results"])
+    rows, regressions = [], []
+    for name, measured in new_results.items():
+        if name not in base_results:
+            continue
+        before, after = base_results[name][metric], measured[metric]
+        change = (after / before - 1) * 100 if before else 0.0
+        regressed = change > threshold and before >= min_ms
+        rows.append((name, before, after, change, regressed))
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--threshold", type=float, default=10.0, help="допустимое замедление, %%")
+    parser.add_argument("--min-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    rows, regressions = compare(base, new, args.metric, args.threshold, args.min_ms)
+
+    print(f"{args.metric}: {(base['meta'].get('commit') or '?')[:10]} -> {(new['meta'].get('commit') or '?')[:10]}")
+    width = max((len(name) for name, *_ in rows), default=10)
+    for name, before, after, change, regressed in rows:
+        mark = "SLOWER" if regressed else ""
+        print(f"{name:<{width}}  {before:>10.3f}  {after:>10.3f}  {change:>+8.1f}%  {mark}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
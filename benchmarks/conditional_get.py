@@ -0,0 +1,96 @@
+"""
+Опрашивающий клиент с ETag и без: трафик, CPU и SQL на опрос.
+
+    python -m benchmarks.conditional_get --polls 200 --write-every 50
+
+Клиент по кругу запрашивает списки, как SPA раз в несколько секунд. Режим
+"plain" — обычные GET, "conditional" — с If-None-Match из прошлого ответа.
+--write-every N меняет одного сотрудника каждые N опросов, чтобы часть
+ответов была 200. CPU — время процесса, клиент TestClient считается вместе
+с сервером, поэтому разница занижена, а не завышена.
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import ROOT, dispose, use_database
+
+POLL_DB = os.path.join(ROOT, "conditional_get.db")
+
+POLLED_URLS = (
+    "/employees/?limit=100&include=department",
+    "/departments/?limit=100",
+    "/roles/?limit=100",
+)
+
+
+def poll(client, statements, polls: int, conditional: bool, write_every: int):
+    etags = {}
+    result = {"requests": 0, "not_modified": 0, "body_bytes": 0, "sql": 0}
+    statements.clear()
+    cpu, wall = time.process_time(), time.perf_counter()
+    for i in range(polls):
+        if write_every and i and i % write_every == 0:
+            # Запись не входит в счёт SQL опросов
+            count = len(statements)
+            client.put("/employees/1", json={"position": f"engineer {i}"})
+            del statements[count:]
+        for url in POLLED_URLS:
+            headers = {"If-None-Match": etags[url]} if conditional and url in etags else {}
+            response = client.get(url, headers=headers)
+            if response.status_code == 200:
+                etags[url] = response.headers.get("etag")
+            result["requests"] += 1
+            result["not_modified"] += response.status_code == 304
+            result["body_bytes"] += len(response.content)
+    result["cpu_ms_per_request"] = round((time.process_time() - cpu) * 1000 / result["requests"], 3)
+    result["wall_ms_per_request"] = round((time.perf_counter() - wall) * 1000 / result["requests"], 3)
+    result["sql"] = len(statements)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=50)
+    args = parser.parse_args()
+
+    if os.path.exists(POLL_DB):
+        os.remove(POLL_DB)
+    use_database(f"sqlite:///{POLL_DB}")
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    import migrate
+    migrate.upgrade()
+    import main as app_module
+    import models
+    from benchmarks.query_budget import seed
+    from database import SessionLocal, engine
+
+    with SessionLocal() as session:
+        seed(session, models)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *rest: statements.append(statement))
+    client = TestClient(app_module.app)
+    poll(client, statements, 5, False, 0)  # прогрев
+
+    results = {
+        mode: poll(client, statements, args.polls, mode == "conditional", args.write_every)
+        for mode in ("plain", "conditional")
+    }
+    plain, conditional = results["plain"], results["conditional"]
+    results["saved"] = {
+        "body_bytes_pct": round(100 * (1 - conditional["body_bytes"] / plain["body_bytes"]), 1),
+        "cpu_pct": round(100 * (1 - conditional["cpu_ms_per_request"] / plain["cpu_ms_per_request"]), 1),
+        "sql_pct": round(100 * (1 - conditional["sql"] / plain["sql"]), 1),
+    }
+    dispose(engine)
+    os.remove(POLL_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Микробенчмарки функций crud.py на базе из benchmarks.seed.
+
+    python -m benchmarks.crud_micro --employees 100000 --repeat 200
+    python -m benchmarks.crud_micro --url postgresql+psycopg2://localhost/hr_bench --out results/crud.json
+
+Каждый вызов идёт в своей сессии, как в запросе. Записи создают свои строки
+(create_*), меняют (update_*) и удаляют их же (delete_*), поэтому база после
+прогона та же. В "uncovered" — функции crud.py без замера: новую функцию
+нужно добавить в calls().
+"""
+import argparse
+import inspect
+import json
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import summarize, write_results
+from benchmarks.seed import open_database, sample_ids
+
+
+def calls(crud, schemas, storage, ctx: dict, tag: str):
+    """(имя, функция(db, i)) в порядке выполнения; имя до пробела — функция crud.py."""
+    def pick(kind, i):
+        ids = ctx[kind]
+        return ids[i * 7919 % len(ids)]
+
+    created = {kind: [] for kind in ("employee", "bulk", "department", "user", "document", "vacation", "role")}
+
+    def keep(kind, obj):
+        created[kind].append(obj.id)
+
+    def new_employee(i, prefix="s"):
+        return schemas.EmployeeCreate(
+            employee_code=f"MB{tag}{prefix}{i}", last_name="Benchmark", first_name="Micro",
+            position="engineer", hire_date=date(2020, 1, 1), salary=100000,
+            department_id=pick("departments", i),
+        )
+
+    def role(i, employee_ids):
+        return schemas.RoleCreate(role_type="sector", start_date=date(2024, 1, 1), end_date=None,
+                                  status="planned" if i % 2 else "approved", employee_ids=employee_ids)
+
+    today = date.today()
+    month = (today.replace(day=1), today.replace(day=1) + timedelta(days=30))
+    return [
+        # Чтения
+        ("get_employees", lambda db, i: crud.get_employees(db, limit=100)),
+        ("get_employees sort", lambda db, i: crud.get_employees(db, limit=100, sort="last_name")),
+        ("get_employees include", lambda db, i: crud.get_employees(
+            db, limit=100, include=("department", "documents", "vacations"))),
+        ("get_employee", lambda db, i: crud.get_employee(db, pick("employees", i))),
+        ("get_employee include", lambda db, i: crud.get_employee(
+            db, pick("employees", i), include=("department", "documents", "vacations"))),
+        ("get_employee_cached", lambda db, i: crud.get_employee_cached(db, pick("employees", i % 50))),
+        ("get_employee_by_code", lambda db, i: crud.get_employee_by_code(db, pick("codes", i))),
+        ("search_employees", lambda db, i: crud.search_employees(db, "Ivanov")),
+        ("get_reports", lambda db, i: crud.get_reports(db, pick("managers", i), limit=100)),
+        ("get_history", lambda db, i: crud.get_history(db, "employees", pick("employees", i), limit=100)),
+        ("get_departments", lambda db, i: crud.get_departments(db, limit=100)),
+        ("get_department", lambda db, i: crud.get_department(db, pick("departments", i))),
+        ("get_department_cached", lambda db, i: crud.get_department_cached(db, pick("departments", i % 50))),
+        ("get_departments_stats", lambda db, i: crud.get_departments_stats(db, limit=100)),
+        ("get_departments_stats live", lambda db, i: crud.get_departments_stats(db, limit=100, summary=False)),
+        ("get_department_stats", lambda db, i: crud.get_department_stats(db, pick("departments", i))),
+        ("get_users", lambda db, i: crud.get_users(db, limit=100)),
+        ("get_user_by_username", lambda db, i: crud.get_user_by_username(db, f"user{i * 3:08d}")),
+        ("get_documents", lambda db, i: crud.get_documents(db, limit=100)),
+        ("get_document", lambda db, i: crud.get_document(db, pick("documents", i))),
+        ("get_expiring_documents", lambda db, i: crud.get_expiring_documents(db, 30, limit=100)),
+        ("get_vacations", lambda db, i: crud.get_vacations(db, limit=100)),
+        ("get_vacation_calendar", lambda db, i: crud.get_vacation_calendar(
+            db, *month, department_id=pick("departments", i), limit=100)),
+        ("get_vacation_headcount", lambda db, i: crud.get_vacation_headcount(
+            db, *month, department_id=pick("departments", i))),
+        ("get_roles", lambda db, i: crud.get_roles(db, limit=100)),
+        ("get_roles include", lambda db, i: crud.get_roles(db, limit=100, include=("employees",))),
+        ("get_role", lambda db, i: crud.get_role(db, pick("roles", i))),
+        ("get_role_members", lambda db, i: crud.get_role_members(db, ctx["largest_role"], limit=100)),
+
+        # Записи: создание, изменение и удаление своих же строк
+        ("create_employee", lambda db, i: keep("employee", crud.create_employee(db, new_employee(i)))),
+        ("update_employee", lambda db, i: crud.update_employee(
+            db, created["employee"][i], schemas.EmployeeUpdate(salary=110000 + i))),
+        ("bulk_create_employees", lambda db, i: created["bulk"].extend(crud.bulk_create_employees(
+            db, [(j, new_employee(i * 100 + j, "b")) for j in range(100)])[0])),
+        ("bulk_update_employees", lambda db, i: crud.bulk_update_employees(
+            db, [(j, schemas.EmployeeBulkUpdate(id=employee_id, position="lead"))
+                 for j, employee_id in enumerate(created["bulk"][i * 100:(i + 1) * 100])])),
+        ("create_document", lambda db, i: keep("document", crud.create_document(db, schemas.DocumentCreate(
+            employee_id=created["employee"][i], document_type="passport",
+            file_path=f"bench/{tag}/{i}.pdf", expiration_date=today + timedelta(days=i % 365))))),
+        ("update_document", lambda db, i: crud.update_document(db, created["document"][i], schemas.DocumentCreate(
+            employee_id=created["employee"][i], document_type="contract",
+            file_path=f"bench/{tag}/{i}.pdf", expiration_date=None))),
+        ("set_document_content", lambda db, i: crud.set_document_content(
+            db, created["document"][i], storage.Blob(f"{i:064x}", 1024, False), "application/pdf")),
+        ("create_vacation", lambda db, i: keep("vacation", crud.create_vacation(db, schemas.VacationCreate(
+            employee_id=created["employee"][i], start_date=date(2030, 1, 1), end_date=date(2030, 1, 14),
+            vacation_type="regular", status="requested", notes=None)))),
+        ("update_vacation", lambda db, i: crud.update_vacation(db, created["vacation"][i], schemas.VacationCreate(
+            employee_id=created["employee"][i], start_date=date(2030, 1, 1), end_date=date(2030, 1, 10),
+            vacation_type="regular", status="approved", notes="shortened"))),
+        ("create_user", lambda db, i: keep("user", crud.create_user(db, schemas.UserCreate(
+            username=f"mb{tag}-{i}", email=f"mb{tag}-{i}@example.com", password="x",
+            employee_id=created["employee"][i]), hashed_password=ctx["password"]))),
+        ("update_user", lambda db, i: crud.update_user(
+            db, created["user"][i], schemas.UserUpdate(email=f"mb{tag}-{i}@example.org"))),
+        ("create_department", lambda db, i: keep("department", crud.create_department(
+            db, schemas.DepartmentCreate(name=f"Bench {tag} {i}", description=None,
+                                         manager_id=created["employee"][i])))),
+        ("update_department", lambda db, i: crud.update_department(
+            db, created["department"][i], schemas.DepartmentCreate(
+                name=f"Bench {tag} {i}", description="renamed", manager_id=None))),
+        ("create_role", lambda db, i: keep("role", crud.create_role(
+            db, role(i, created["employee"][i:i + 10])))),
+        ("update_role", lambda db, i: crud.update_role(
+            db, created["role"][i], role(i + 1, created["employee"][i + 5:i + 15]))),
+        ("add_role_members", lambda db, i: crud.add_role_members(
+            db, ctx["largest_role"], created["bulk"][i * 100:(i + 1) * 100])),
+        ("remove_role_members", lambda db, i: crud.remove_role_members(
+            db, ctx["largest_role"], created["bulk"][i * 100:(i + 1) * 100])),
+        ("offboard_employees", lambda db, i: crud.offboard_employees(
+            db, created["bulk"][i * 100:(i + 1) * 100])),
+        ("delete_role", lambda db, i: crud.delete_role(db, created["role"][i])),
+        ("delete_department", lambda db, i: crud.delete_department(db, created["department"][i])),
+        ("delete_user", lambda db, i: crud.delete_user(db, created["user"][i])),
+        ("delete_vacation", lambda db, i: crud.delete_vacation(db, created["vacation"][i])),
+        ("delete_document", lambda db, i: crud.delete_document(db, created["document"][i])),
+        ("delete_employee", lambda db, i: crud.delete_employee(db, created["employee"][i])),
+        ("bulk_delete_employees", lambda db, i: crud.bulk_delete_employees(
+            db, list(enumerate(created["bulk"][i * 100:(i + 1) * 100])))),
+    ]
+
+
+def public_functions(crud) -> set:
+    # *_query — построители запросов для других функций, отдельно не меряются
+    return {
+        name for name, value in vars(crud).items()
+        if inspect.isfunction(value) and value.__module__ == crud.__name__
+        and not name.startswith("_") and not name.endswith("_query")
+    }
+
+
+def run(repeat: int) -> dict:
+    import crud
+    import models
+    import schemas
+    import storage
+    from database import SessionLocal
+    from hashing import pwd_context
+
+    with SessionLocal() as db:
+        ctx = sample_ids(db, models)
+    ctx["password"] = pwd_context.hash("password")
+    tag = str(int(time.time()))  # уникальные коды и логины, даже если прошлый прогон упал
+    results = {}
+    benchmarks = calls(crud, schemas, storage, ctx, tag)
+    for name, call in benchmarks:
+        with SessionLocal() as db:
+            call(db, 0)  # прогрев: компиляция SQL, кэш планов
+        samples = []
+        for i in range(1, repeat + 1):
+            started = time.perf_counter()
+            with SessionLocal() as db:
+                call(db, i)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[name] = summarize(samples)
+        results[name]["ops_per_sec"] = round(1000 / results[name]["mean_ms"], 1)
+    covered = {name.split()[0] for name, _ in benchmarks}
+    return {"calls": results, "uncovered": sorted(public_functions(crud) - covered)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--url", help="по умолчанию SQLite load.db")
+    parser.add_argument("--out", help="записать JSON с результатами и коммитом")
+    args = parser.parse_args()
+
+    url, counts = open_database(args.url, args.employees)
+    results = run(args.repeat)
+    from database import engine
+    dialect = engine.dialect.name
+    engine.dispose()
+    if args.out:
+        write_results(args.out, {"crud": results}, dialect=dialect, rows=counts, repeat=args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Численность и фонд оплаты по отделам: GROUP BY по employees на каждый запрос
+против сводки — department_stats плюс дельты от триггеров миграции 0012.
+
+    python -m benchmarks.department_stats --rows 1000000
+
+Кроме чтения меряется цена триггера на записи (обновление зарплаты и перевод
+сотрудника между отделами), чтение сводки с несвёрнутыми дельтами и сама
+свёртка. Сводка сверяется с живым GROUP BY до свёртки и после неё.
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import ROOT, dispose, seed_employees, timed, use_database
+
+STATS_DB = os.path.join(ROOT, "department_stats.db")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--departments", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    if os.path.exists(STATS_DB):
+        os.remove(STATS_DB)
+    use_database(f"sqlite:///{STATS_DB}")
+    import crud
+    import migrate
+    import models
+    import org_chart
+    import schemas
+    from database import SessionLocal, engine
+
+    migrate.upgrade()
+    session = SessionLocal()
+    session.add_all(models.Department(name=f"Department {i:04d}") for i in range(args.departments))
+    session.flush()
+    department_ids = [row.id for row in session.query(models.Department.id)]
+    started = time.perf_counter()
+    seed_employees(session, models, args.rows, department_ids)
+    seed_seconds = time.perf_counter() - started
+    # Дельты заливки сворачиваются сразу, как сделала бы фоновая задача
+    org_chart.fold_deltas(session)
+    department_id = department_ids[len(department_ids) // 2]
+
+    results = {
+        "rows": args.rows,
+        "departments": args.departments,
+        "seed_rows_per_sec": round(args.rows / seed_seconds),
+    }
+    for summary in (False, True):
+        mode = "summary" if summary else "live"
+        results[f"all_{mode}"] = timed(lambda: crud.get_departments_stats(
+            session, limit=args.departments, summary=summary), args.repeat)
+        results[f"one_{mode}"] = timed(lambda: crud.get_department_stats(
+            session, department_id, summary=summary), args.repeat)
+
+    employee_ids = [row.id for row in session.query(models.Employee.id).limit(args.writes)]
+    for name, values in (
+        ("update_salary", lambda i: {"salary": 2000 + i}),
+        ("update_department", lambda i: {"department_id": department_ids[i % len(department_ids)]}),
+    ):
+        started = time.perf_counter()
+        for i, employee_id in enumerate(employee_ids):
+            crud.update_employee(session, employee_id, schemas.EmployeeUpdate(**values(i)))
+        results[name] = {"writes_per_sec": round(len(employee_ids) / (time.perf_counter() - started))}
+
+    def matches_live():
+        live = crud.get_departments_stats(session, limit=args.departments, summary=False)
+        summary = crud.get_departments_stats(session, limit=args.departments, summary=True)
+        return [tuple(row) for row in live] == [tuple(row) for row in summary]
+
+    results["pending_deltas"] = session.query(models.DepartmentStatsDelta).count()
+    results["all_summary_pending"] = timed(lambda: crud.get_departments_stats(
+        session, limit=args.departments, summary=True), args.repeat)
+    results["summary_matches_live_pending"] = matches_live()
+    started = time.perf_counter()
+    org_chart.fold_deltas(session)
+    results["fold_seconds"] = round(time.perf_counter() - started, 3)
+    results["summary_matches_live"] = matches_live()
+    session.close()
+    dispose(engine)
+    os.remove(STATS_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
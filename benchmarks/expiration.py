@@ -0,0 +1,94 @@
+"""
+Сканер истекающих документов на большой таблице: проход по окнам пачками,
+повторный проход (всё уже записано) и задержка GET /documents/expiring
+без сканера и во время прохода в соседнем потоке.
+
+    python -m benchmarks.expiration --rows 1000000
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import ROOT, seed_employees, summarize, use_database
+
+EXPIRATION_DB = os.path.join(ROOT, "expiration.db")
+WINDOWS = (7, 30, 90)
+
+
+def seed_documents(session, models, rows: int, employees: int):
+    # Сроки равномерно на пять лет вперёд и год назад
+    today = date.today()
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "employee_id": 1 + i % employees,
+            "document_type": "passport" if i % 3 else "contract",
+            "file_path": f"documents/{i}.pdf",
+            "expiration_date": today + timedelta(days=i % 2190 - 365),
+        })
+        if len(batch) == 10000:
+            session.execute(models.Document.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        session.execute(models.Document.__table__.insert(), batch)
+    session.commit()
+
+
+def route_latency(client, requests: int):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get("/documents/expiring?within_days=30&limit=100")
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    if os.path.exists(EXPIRATION_DB):
+        os.remove(EXPIRATION_DB)
+    use_database(f"sqlite:///{EXPIRATION_DB}")
+    from fastapi.testclient import TestClient
+    import expiration
+    import migrate
+    migrate.upgrade()
+    import main as app_module
+    import models
+    from database import SessionLocal, engine
+
+    with SessionLocal() as session:
+        seed_employees(session, models, args.employees)
+        seed_documents(session, models, args.rows, args.employees)
+
+    client = TestClient(app_module.app)
+    results = {
+        "rows": args.rows,
+        "first_scan": expiration.scan(SessionLocal, WINDOWS, args.batch_size),
+        "repeat_scan": expiration.scan(SessionLocal, WINDOWS, args.batch_size),
+        "route_idle": route_latency(client, args.requests),
+    }
+    with SessionLocal() as session:
+        session.query(models.DocumentNotification).delete()
+        session.commit()
+    scanner = threading.Thread(target=expiration.scan, args=(SessionLocal, WINDOWS, args.batch_size))
+    scanner.start()
+    results["route_during_scan"] = route_latency(client, args.requests)
+    scanner.join()
+    results["first_scan"]["documents_per_sec"] = round(
+        results["first_scan"]["documents"] / results["first_scan"]["seconds"])
+    engine.dispose()
+    os.remove(EXPIRATION_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Память и пропускная способность потоковой выгрузки сотрудников.
+
+    python -m benchmarks.export --rows 1000000
+"""
+import argparse
+import json
+import resource
+import time
+import tracemalloc
+
+from benchmarks.common import seed_employees, use_database
+
+
+def consume(stream):
+    total_bytes = 0
+    for chunk in stream:
+        total_bytes += len(chunk.encode())
+    return total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    use_database()
+    import export
+    import migrate
+    import models
+    from database import SessionLocal
+
+    migrate.upgrade()
+    with SessionLocal() as session:
+        seed_employees(session, models, args.rows)
+
+    results = {}
+    for fmt in ("ndjson", "csv"):
+        start = time.perf_counter()
+        size = consume(export.STREAMS[fmt](export.employees_query()))
+        elapsed = time.perf_counter() - start
+        # Отдельный проход под tracemalloc: он сильно замедляет выполнение
+        tracemalloc.start()
+        consume(export.STREAMS[fmt](export.employees_query()))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[fmt] = {
+            "rows": args.rows,
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(args.rows / elapsed),
+            "megabytes": round(size / 2**20, 1),
+            "python_peak_megabytes": round(peak / 2**20, 1),
+        }
+    results["max_rss_megabytes"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
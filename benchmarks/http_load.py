@@ -0,0 +1,132 @@
+"""
+Нагрузка на HTTP API: p50/p95/p99 и RPS по каждому эндпоинту.
+
+    python -m benchmarks.http_load --employees 100000 --concurrency 32 --requests 2000
+    python -m benchmarks.http_load --out results/http.json
+    python -m benchmarks.http_load --target http://127.0.0.1:8000 --url postgresql+psycopg2://.../hr_bench
+
+По умолчанию запросы идут в приложение main.app в этом же процессе
+(httpx.ASGITransport): в замер входят FastAPI, SQL и сериализация, но не
+сеть и не сервер. С --target — в запущенный сервер; --url тогда должен
+указывать на его базу (из неё берутся id для запросов). Только GET: база
+между прогонами не меняется. ASYNC_DB, FAST_SERIALIZATION и прочие
+настройки читаются из окружения, как у сервера.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from benchmarks.common import summarize, write_results
+from benchmarks.seed import open_database, sample_ids
+
+
+def endpoints(ctx: dict):
+    """(имя, функция i -> путь); id меняются от запроса к запросу."""
+    def pick(kind, i):
+        ids = ctx[kind]
+        return ids[i * 7919 % len(ids)]
+
+    month = date.today().replace(day=1)
+    period = f"from={month}&to={month + timedelta(days=30)}"
+    return [
+        ("GET /employees/", lambda i: "/employees/?limit=100"),
+        ("GET /employees/?include", lambda i: "/employees/?limit=100&include=department,documents,vacations"),
+        ("GET /employees/{id}", lambda i: f"/employees/{pick('employees', i)}"),
+        ("GET /employees/{id}/reports", lambda i: f"/employees/{pick('managers', i)}/reports?limit=100"),
+        ("GET /employees/search/", lambda i: "/employees/search/?q=Ivanov"),
+        ("GET /departments/", lambda i: "/departments/?limit=100"),
+        ("GET /departments/{id}", lambda i: f"/departments/{pick('departments', i)}"),
+        ("GET /departments/stats", lambda i: "/departments/stats?limit=100"),
+        ("GET /users/", lambda i: "/users/?limit=100"),
+        ("GET /documents/", lambda i: "/documents/?limit=100"),
+        ("GET /documents/expiring", lambda i: "/documents/expiring?within_days=30&limit=100"),
+        ("GET /vacations/", lambda i: "/vacations/?limit=100"),
+        ("GET /vacations/calendar", lambda i: f"/vacations/calendar?{period}&department_id={pick('departments', i)}"),
+        ("GET /vacations/calendar/headcount",
+         lambda i: f"/vacations/calendar/headcount?{period}&department_id={pick('departments', i)}"),
+        ("GET /roles/", lambda i: "/roles/?limit=100"),
+        ("GET /roles/{id}/members", lambda i: f"/roles/{ctx['largest_role']}/members?limit=100"),
+    ]
+
+
+async def drive(client, path, concurrency: int, total: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await client.get(path(i))
+    latencies, statuses = [], Counter()
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path(i))
+            except Exception as exc:
+                statuses[type(exc).__name__] += 1
+                continue
+            statuses[str(response.status_code)] += 1
+            if response.status_code < 400:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies) if latencies else {"n": 0}
+    result["rps"] = round(len(latencies) / elapsed, 1)
+    result["errors"] = total - len(latencies)
+    result["statuses"] = dict(statuses)
+    return result
+
+
+async def run(ctx: dict, concurrency: int, total: int, warmup: int, target: str = None,
+              only: str = None) -> dict:
+    import httpx
+
+    if target:
+        client = httpx.AsyncClient(base_url=target, timeout=60,
+                                   limits=httpx.Limits(max_connections=concurrency))
+    else:
+        import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    results = {}
+    async with client:
+        for name, path in endpoints(ctx):
+            if only and only not in name:
+                continue
+            results[name] = await drive(client, path, concurrency, total, warmup)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="на эндпоинт")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--url", help="по умолчанию SQLite load.db")
+    parser.add_argument("--target", help="базовый URL запущенного сервера вместо приложения в процессе")
+    parser.add_argument("--only", help="только эндпоинты, в имени которых есть эта строка")
+    parser.add_argument("--out", help="записать JSON с результатами и коммитом")
+    args = parser.parse_args()
+
+    url, counts = open_database(args.url, args.employees)
+    import models
+    from config import settings
+    from database import SessionLocal, engine
+
+    with SessionLocal() as db:
+        ctx = sample_ids(db, models)
+    results = asyncio.run(run(ctx, args.concurrency, args.requests, args.warmup, args.target, args.only))
+    dialect = engine.dialect.name
+    engine.dispose()
+    if args.out:
+        write_results(args.out, {"http": results}, dialect=dialect, rows=counts, target=args.target or "asgi",
+                      concurrency=args.concurrency, requests=args.requests,
+                      async_db=settings.async_db, fast_serialization=settings.fast_serialization)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Проверка планов запросов crud.py на полное чтение таблиц.
+
+    python -m benchmarks.index_audit
+    python -m benchmarks.index_audit --url postgresql+psycopg2://.../empty_db
+
+Поднимает схему миграциями на отдельной пустой базе, заполняет её как
+query_budget, вызывает функции crud.py, перехватывает их SQL и выполняет
+EXPLAIN для каждого запроса. Завершается с кодом 1, если план читает таблицу
+целиком и это не разрешено в ALLOWED_SCANS.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date, datetime
+
+from benchmarks.common import ROOT, dispose, use_database
+
+AUDIT_DB = os.path.join(ROOT, "index_audit.db")
+
+# Вызов -> таблицы, которые ему разрешено читать целиком, с причиной
+ALLOWED_SCANS = {
+    # Первая страница без фильтра: чтение по первичному ключу до LIMIT
+    "get_employees": {"employees"},
+    "get_employees include": {"employees"},
+    "get_departments": {"departments"},
+    "get_departments_stats": {"departments"},
+    "get_departments_stats live": {"departments"},
+    "get_users": {"users"},
+    "get_documents": {"documents"},
+    "get_vacations": {"vacations"},
+    "get_roles": {"roles"},
+    "get_roles include": {"roles"},
+    # Короткий запрос ищется ILIKE по префиксу в трёх колонках, индекса под это нет
+    "search_employees short": {"employees"},
+}
+
+# Значение для проверки каждого разрешённого фильтра списка (filters.py): (функция crud, поле) -> строка запроса
+FILTER_SAMPLES = {
+    ("get_employees", "status"): "inactive",
+    ("get_employees", "department_id"): "1",
+    ("get_employees", "salary"): "5000",
+    ("get_employees", "hire_date"): "2020-03-01",
+    ("get_documents", "document_type"): "contract",
+    ("get_documents", "employee_id"): "1",
+    ("get_documents", "expiration_date"): "2024-01-01",
+    ("get_vacations", "status"): "rejected",
+    ("get_vacations", "vacation_type"): "sick",
+    ("get_vacations", "employee_id"): "1",
+}
+
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+
+def filter_calls(crud, filters):
+    """
+    Каждый фильтр из белых списков filters.py с каждым оператором — без индекса
+    аудит не пройдёт. Диапазон проверяется с ?sort= по тому же полю: без неё
+    SQLite (статистики по диапазонам у него нет) идёт по id до LIMIT, и план
+    ничего не говорит об индексе. PostgreSQL (--url) проверяет и без сортировки.
+    """
+    result = []
+    for name, filter_set in (("get_employees", filters.EMPLOYEE_FILTERS), ("get_documents", filters.DOCUMENT_FILTERS),
+                             ("get_vacations", filters.VACATION_FILTERS)):
+        for field, (_, _, operators) in filter_set.fields.items():
+            for operator in operators:
+                sample = FILTER_SAMPLES[name, field]
+                key = field if operator == "eq" else f"{field}__{operator}"
+                conditions = filter_set.parse([(key, f"{sample},{sample}" if operator == "in" else sample)])
+                sort = field if operator in filters.RANGE_ONLY else None
+                result.append((f"{name} filter {key}", lambda db, name=name, conditions=conditions, sort=sort:
+                               getattr(crud, name)(db, limit=100, sort=sort, filters=conditions)))
+    return result
+
+
+def calls(crud, export, expiration, changes, schemas, cursor: str):
+    """(имя, функция от сессии) — один или несколько вызовов на функцию crud.py."""
+    week = (date(2024, 1, 1), date(2024, 1, 7))
+    return [
+        ("get_employees", lambda db: crud.get_employees(db, limit=100)),
+        ("get_employees cursor", lambda db: crud.get_employees(db, limit=100, cursor=cursor)),
+        ("get_employees include", lambda db: crud.get_employees(
+            db, limit=100, include=("department", "documents", "vacations"))),
+        ("get_employee", lambda db: crud.get_employee(db, 1, include=("department", "documents", "vacations"))),
+        ("get_employee_by_code", lambda db: crud.get_employee_by_code(db, "E00001")),
+        ("search_employees", lambda db: crud.search_employees(db, "Last1")),
+        ("search_employees short", lambda db: crud.search_employees(db, "La")),
+        ("get_departments", lambda db: crud.get_departments(db, limit=100)),
+        ("get_department", lambda db: crud.get_department(db, 1, include=("manager", "employees"))),
+        ("get_departments_stats", lambda db: crud.get_departments_stats(db, limit=100)),
+        ("get_departments_stats live", lambda db: crud.get_departments_stats(db, limit=100, summary=False)),
+        ("get_department_stats", lambda db: crud.get_department_stats(db, 1)),
+        ("get_department_stats live", lambda db: crud.get_department_stats(db, 1, summary=False)),
+        ("get_reports", lambda db: crud.get_reports(db, 2, limit=100)),
+        ("get_history", lambda db: crud.get_history(db, "employees", 1, limit=100)),
+        ("get_history cursor", lambda db: crud.get_history(db, "employees", 1, limit=100, cursor=cursor)),
+        ("get_users", lambda db: crud.get_users(db, limit=100)),
+        ("get_user_by_username", lambda db: crud.get_user_by_username(db, "user1")),
+        ("get_documents", lambda db: crud.get_documents(db, limit=100)),
+        ("get_expiring_documents", lambda db: crud.get_expiring_documents(db, 30, limit=100)),
+        ("expiration scan_batch", lambda db: expiration.scan_batch(
+            db, 30, week[0], week[1], after=(week[0], 1), batch_size=100)),
+        ("changes read_changes", lambda db: changes.read_changes(db, 10, 1000)),
+        ("changes read_changes tables", lambda db: changes.read_changes(
+            db, 10, 1000, until=500, tables=frozenset({"employees", "roles"}))),
+        ("changes bounds", lambda db: changes.bounds(db)),
+        ("changes prune", lambda db: changes.prune(db, datetime(2000, 1, 1))),
+        ("get_vacations", lambda db: crud.get_vacations(db, limit=100)),
+        ("get_vacation_calendar", lambda db: crud.get_vacation_calendar(db, *week, department_id=1)),
+        ("get_vacation_headcount", lambda db: crud.get_vacation_headcount(db, *week, department_id=1)),
+        ("get_roles", lambda db: crud.get_roles(db, limit=100)),
+        ("get_roles include", lambda db: crud.get_roles(db, limit=100, include=("employees",))),
+        ("get_role_members", lambda db: crud.get_role_members(db, 1, limit=100)),
+        ("get_role_members sort", lambda db: crud.get_role_members(db, 1, limit=100, sort="last_name")),
+        ("add_role_members", lambda db: crud.add_role_members(db, 2, [1, 2, 3, 300, 10**6])),
+        ("remove_role_members", lambda db: crud.remove_role_members(db, 2, [2, 3])),
+        ("update_role", lambda db: crud.update_role(db, 3, schemas.RoleCreate(
+            role_type="sector", start_date=date(2024, 1, 1), end_date=None, status="approved",
+            employee_ids=[1, 3, 4, 5]))),
+        ("export employees", lambda db: db.execute(export.employees_query(
+            department_id=1, hired_from=date(2020, 3, 1), hired_to=date(2020, 4, 1))).all()),
+        ("export employees status", lambda db: db.execute(export.employees_query(
+            status="inactive", hired_from=date(2020, 3, 1))).all()),
+        ("export vacations", lambda db: db.execute(export.vacations_query(
+            department_id=1, date_from=week[0], date_to=week[1])).all()),
+        ("export documents", lambda db: db.execute(export.documents_query(
+            department_id=1, expires_before=date(2024, 1, 1))).all()),
+        ("update_vacation", lambda db: crud.update_vacation(db, 1, schemas.VacationCreate(
+            employee_id=1, start_date=date(2024, 1, 1), end_date=date(2024, 1, 5),
+            vacation_type="regular", status="approved", notes=None))),
+        ("update_employee", lambda db: crud.update_employee(db, 1, schemas.EmployeeUpdate(position="lead"))),
+        ("offboard_employees", lambda db: crud.offboard_employees(db, [5, 6, 7])),
+        ("offboard_employees department", lambda db: crud.offboard_employees(db, department_id=3, chunk_size=50)),
+        ("bulk_delete_employees", lambda db: crud.bulk_delete_employees(db, [(0, 2), (1, 3)])),
+        ("delete_employee", lambda db: crud.delete_employee(db, 4)),
+        ("delete_role", lambda db: crud.delete_role(db, 1)),
+        ("delete_department", lambda db: crud.delete_department(db, 2)),
+    ]
+
+
+def sqlite_scans(connection, statement, parameters, tables):
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    plan = [row[3] for row in rows]
+    scans = {match.group(1) for match in map(SQLITE_SCAN.match, plan) if match} & tables
+    return scans, plan
+
+
+def postgres_scans(connection, statement, parameters, tables):
+    # Без seqscan планировщик выбирает Seq Scan, только если подходящего индекса нет
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    (raw,), = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).all()
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    scans, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in tables:
+            scans.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", ()))
+    return scans, plan
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="пустая база; по умолчанию временная SQLite")
+    args = parser.parse_args()
+
+    if not args.url and os.path.exists(AUDIT_DB):
+        os.remove(AUDIT_DB)
+    use_database(args.url or f"sqlite:///{AUDIT_DB}")
+    from sqlalchemy import event
+    import changes
+    import crud
+    import expiration
+    import export
+    import filters
+    import migrate
+    import models
+    import schemas
+    from benchmarks.query_budget import seed
+    from database import SessionLocal, engine
+    from pagination import encode_cursor
+
+    migrate.upgrade()
+    with SessionLocal() as session:
+        seed(session, models)
+        cursor = encode_cursor(crud.get_employees(session, limit=100)[-1])
+
+    explain = sqlite_scans if engine.dialect.name == "sqlite" else postgres_scans
+    tables = set(models.Base.metadata.tables)
+    statements = []
+
+    def capture(conn, dbapi_cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    failed = False
+    for name, call in calls(crud, export, expiration, changes, schemas, cursor) + filter_calls(crud, filters):
+        statements.clear()
+        with SessionLocal() as session:
+            call(session)
+        captured = list(statements)
+        allowed = ALLOWED_SCANS.get(name, set())
+        with engine.connect() as connection:
+            for statement, parameters in captured:
+                scans, plan = explain(connection, statement, parameters, tables)
+                unexpected = scans - allowed
+                failed |= bool(unexpected)
+                status = "FAIL" if unexpected else "ok  "
+                print(f"{status} {name}: {' '.join(statement.split())[:110]}")
+                if unexpected:
+                    print(f"     full scan of {', '.join(sorted(unexpected))}: {plan}")
+            connection.rollback()
+    event.remove(engine, "before_cursor_execute", capture)
+    dispose(engine)
+    if not args.url:
+        os.remove(AUDIT_DB)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
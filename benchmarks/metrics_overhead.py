@@ -0,0 +1,88 @@
+"""
+Накладные расходы метрик: те же запросы с METRICS_ENABLED=true и false.
+
+    python -m benchmarks.metrics_overhead --requests 2000
+
+Каждый режим запускается в отдельном процессе (настройка читается при импорте).
+Кэш сущностей выключен, чтобы каждый запрос доходил до SQL.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, seed_employees, summarize, use_database
+
+URLS = (
+    "/employees/{id}",
+    "/employees/?limit=100",
+    "/employees/?limit=100&include=department,documents,vacations",
+)
+
+
+def run_mode(args):
+    use_database()
+    import migrate
+    migrate.upgrade()
+    from fastapi.testclient import TestClient
+    import main
+    import models
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        seed_employees(session, models, args.rows)
+    client = TestClient(main.app)
+    results = {}
+    for url in URLS:
+        for i in range(args.warmup):
+            client.get(url.format(id=i % args.rows + 1))
+        samples = []
+        for i in range(args.requests):
+            path = url.format(id=i % args.rows + 1)
+            start = time.perf_counter()
+            client.get(path).raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[url] = summarize(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--mode", choices=["on", "off", "both"], default="both")
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        print(json.dumps(run_mode(args)))
+        return
+
+    # Режимы чередуются по раундам, сравнивается лучшая медиана: шум запуска
+    # процесса и диска больше, чем сами накладные расходы
+    rounds = {"off": [], "on": []}
+    for _ in range(args.rounds):
+        for mode in ("off", "on"):
+            env = dict(os.environ, METRICS_ENABLED="true" if mode == "on" else "false", CACHE_BACKEND="none")
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.metrics_overhead", "--mode", mode,
+                 "--rows", str(args.rows), "--requests", str(args.requests), "--warmup", str(args.warmup)],
+                cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            rounds[mode].append(json.loads(output.strip().splitlines()[-1]))
+    results = {}
+    for url in URLS:
+        best = {mode: min(run[url]["p50_ms"] for run in runs) for mode, runs in rounds.items()}
+        results[url] = {
+            "p50_ms_off": best["off"],
+            "p50_ms_on": best["on"],
+            "overhead_percent": round((best["on"] / best["off"] - 1) * 100, 2),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
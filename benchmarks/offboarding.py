@@ -0,0 +1,111 @@
+"""
+Увольнение штата закрытой площадки: прежний путь (db.delete каждого
+сотрудника, ORM загружает документы, отпуска, учётные записи и роли ради
+обнуления ссылок) против crud.offboard_employees и crud.bulk_delete_employees.
+
+    python -m benchmarks.offboarding --staff 5000 --sample 200
+
+У каждого сотрудника отдела учётная запись, прошедший и будущий отпуск и
+членство в общей роли. Удаление меряется на --sample сотрудниках каждым
+способом, ORM-путь дополнительно пересчитывается на весь штат; затем
+offboard_employees увольняет оставшийся отдел. Печатает время и число SQL-команд.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import ROOT, dispose, seed_employees, use_database
+
+OFFBOARDING_DB = os.path.join(ROOT, "offboarding_bench.db")
+
+
+def orm_delete(session, employee):
+    # Как delete_employee до правил ON DELETE (миграция 0009): связи загружаются,
+    # ORM обнуляет ссылки построчно и удаляет строку сотрудника
+    employee.documents, employee.vacations, employee.users, employee.roles, employee.managed_department
+    session.delete(employee)
+    session.commit()
+
+
+def seed_dependents(session, models, employee_ids):
+    today = date.today()
+    session.execute(models.User.__table__.insert(), [
+        {"username": f"off{i}", "email": f"off{i}@example.com", "password": "x", "is_active": True,
+         "employee_id": employee_id} for i, employee_id in enumerate(employee_ids)
+    ])
+    session.execute(models.Vacation.__table__.insert(), [
+        {"employee_id": employee_id, "start_date": start, "end_date": start + timedelta(days=7),
+         "vacation_type": "regular", "status": "approved"}
+        for employee_id in employee_ids for start in (today - timedelta(days=60), today + timedelta(days=30))
+    ])
+    role_id = session.execute(models.Role.__table__.insert().values(
+        role_type="sector", start_date=date(2024, 1, 1), status="approved")).inserted_primary_key[0]
+    session.execute(models.employee_roles.insert(), [
+        {"employee_id": employee_id, "role_id": role_id} for employee_id in employee_ids
+    ])
+    session.commit()
+
+
+def measure(statements: list, fn) -> tuple:
+    statements.clear()
+    started = time.perf_counter()
+    result = fn()
+    return {"ms": round((time.perf_counter() - started) * 1000, 3), "statements": len(statements)}, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--staff", type=int, default=5000)
+    parser.add_argument("--sample", type=int, default=200, help="сотрудников на каждый способ удаления")
+    args = parser.parse_args()
+
+    if os.path.exists(OFFBOARDING_DB):
+        os.remove(OFFBOARDING_DB)
+    use_database(f"sqlite:///{OFFBOARDING_DB}")
+    from sqlalchemy import event
+    import crud
+    import migrate
+    import models
+    from database import SessionLocal, engine
+
+    migrate.upgrade()
+    session = SessionLocal()
+    session.add(models.Department(id=1, name="Closed site"))
+    session.commit()
+    seed_employees(session, models, args.staff, department_ids=(1,))
+    employee_ids = [row.id for row in session.query(models.Employee.id).order_by(models.Employee.id)]
+    seed_dependents(session, models, employee_ids)
+    session.query(models.Department).filter(models.Department.id == 1).update({"manager_id": employee_ids[0]})
+    session.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *rest: statements.append(statement))
+
+    results = {"staff": args.staff, "sample": args.sample}
+    # Удаление — на последних сотрудниках, пока у них есть все зависимые строки
+    orm_sample = employee_ids[-2 * args.sample:-args.sample]
+    bulk_sample = employee_ids[-args.sample:]
+
+    def delete_orm():
+        for employee_id in orm_sample:
+            orm_delete(session, session.get(models.Employee, employee_id))
+
+    results["orm_delete"], _ = measure(statements, delete_orm)
+    results["orm_delete"]["projected_staff_ms"] = round(results["orm_delete"]["ms"] / args.sample * args.staff, 1)
+    results["bulk_delete"], _ = measure(
+        statements, lambda: crud.bulk_delete_employees(session, list(enumerate(bulk_sample))))
+    session.expunge_all()
+    results["offboard_department"], outcome = measure(
+        statements, lambda: crud.offboard_employees(session, department_id=1))
+    results["offboard_department"]["result"] = outcome.model_dump()
+    session.close()
+    dispose(engine)
+    os.remove(OFFBOARDING_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
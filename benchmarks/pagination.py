@@ -0,0 +1,44 @@
+"""
+OFFSET/LIMIT против keyset-курсора на глубоких страницах.
+
+    python -m benchmarks.pagination --rows 500000
+"""
+import argparse
+import json
+
+from benchmarks.common import seed_employees, timed, use_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    use_database()
+    import crud
+    import migrate
+    import models
+    from database import SessionLocal
+    from pagination import encode_cursor
+
+    migrate.upgrade()
+    session = SessionLocal()
+    seed_employees(session, models, args.rows)
+
+    results = []
+    for fraction in (0, 0.25, 0.5, 0.9):
+        skip = int(args.rows * fraction)
+        # Курсор на ту же позицию, что и skip
+        anchor = session.query(models.Employee).order_by(models.Employee.id).offset(max(skip - 1, 0)).first()
+        cursor = encode_cursor(anchor) if skip else None
+        offset = timed(lambda: crud.get_employees(session, skip=skip, limit=args.limit), args.repeat)
+        keyset = timed(lambda: crud.get_employees(session, limit=args.limit, cursor=cursor), args.repeat)
+        results.append({"skip": skip, "offset": offset, "cursor": keyset})
+    session.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Ожидание соединения из пула при конкуренции потоков.
+
+    python -m benchmarks.pool_contention --threads 64 --hold-ms 5
+    BENCH_DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.pool_contention
+
+Каждый поток берёт соединение, выполняет запрос и держит соединение hold-ms
+(имитация работы маршрута). Для каждого размера пула — время checkout и число
+таймаутов. По умолчанию — SQLite-файл вместо Postgres.
+"""
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.common import summarize, use_database
+
+
+def run(make_engine, url: str, pool_size: int, args) -> dict:
+    from sqlalchemy import text
+    from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+    engine = make_engine(url, pool_size=pool_size, max_overflow=0, pool_timeout=args.pool_timeout)
+    waits, timeouts = [], 0
+    lock = threading.Lock()
+    start_gate = threading.Barrier(args.threads)
+
+    def worker():
+        nonlocal timeouts
+        start_gate.wait()
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    waited = (time.perf_counter() - started) * 1000
+                    connection.execute(text("SELECT 1"))
+                    time.sleep(args.hold_ms / 1000)
+            except PoolTimeout:
+                with lock:
+                    timeouts += 1
+                continue
+            with lock:
+                waits.append(waited)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    result = {"checkout_wait": summarize(waits) if waits else {"n": 0}}
+    result["timeouts"] = timeouts
+    result["throughput_per_second"] = round(len(waits) / elapsed, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--hold-ms", type=float, default=5.0)
+    parser.add_argument("--pool-timeout", type=float, default=2.0)
+    parser.add_argument("--pool-sizes", default="2,5,10,20,40")
+    args = parser.parse_args()
+
+    url = use_database()
+    from database import make_engine
+
+    results = {
+        f"pool_size={size}": run(make_engine, url, size, args)
+        for size in (int(value) for value in args.pool_sizes.split(","))
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Проверка числа SQL-запросов на эндпоинт (защита от N+1).
+
+    python -m benchmarks.query_budget
+
+Заполняет отдельную SQLite-базу, вызывает эндпоинты через TestClient и
+завершается с кодом 1, если какой-то из них превысил свой бюджет. Затем
+удаляет сотрудника со всеми видами ссылок на него и проверяет, что списки
+зависимых строк по-прежнему отвечают 200 (ON DELETE, миграции 0009, 0013).
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+from benchmarks.common import ROOT, use_database
+
+BUDGET_DB = os.path.join(ROOT, "query_budget.db")
+
+# Эндпоинт -> максимум SQL-запросов на страницу (limit=100).
+# Маршруты с ETag добавляют SELECT версий таблиц (http_cache.py)
+BUDGETS = {
+    "/employees/?limit=100": 2,
+    "/employees/?limit=100&include=department,documents,vacations": 4,
+    "/employees/?limit=100&status=active&salary__gte=1000&sort=-hire_date": 2,
+    "/employees/1?include=department,documents,vacations": 4,
+    "/departments/?limit=100": 2,
+    "/departments/?limit=100&include=manager,employees": 3,
+    "/departments/1?include=manager,employees": 3,
+    "/departments/stats?limit=100": 2,
+    "/departments/1/stats": 2,
+    "/employees/2/reports?limit=100": 2,
+    "/employees/1/history?limit=100": 1,
+    "/users/?limit=100": 1,
+    "/documents/?limit=100": 2,
+    "/documents/?limit=100&document_type__in=passport,contract": 2,
+    "/documents/expiring?within_days=30&limit=100": 1,
+    "/vacations/?limit=100": 2,
+    "/vacations/?limit=100&status=approved&vacation_type=regular": 2,
+    "/vacations/calendar?from=2024-01-01&to=2024-01-31&limit=100": 2,
+    "/vacations/calendar/headcount?from=2024-01-01&to=2024-03-31&department_id=1": 2,
+    "/roles/?limit=100": 2,
+    "/roles/?limit=100&include=employees": 3,
+    "/roles/1/members?limit=100": 2,
+}
+# Повтор с If-None-Match: 304 после одного SELECT версий
+NOT_MODIFIED_BUDGET = 1
+
+# Сотрудник 2 — руководитель отдела, с учётной записью, ролями, документами
+# и отпусками (см. seed)
+DELETED_EMPLOYEE = 2
+# Список после удаления -> сколько строк должно остаться со ссылкой на него
+AFTER_DELETE = {
+    "/employees/?limit=100": None,
+    "/departments/?limit=100&include=manager,employees": None,
+    "/users/?limit=100": None,
+    f"/documents/?limit=100&employee_id={DELETED_EMPLOYEE}": 0,
+    "/documents/?limit=100": None,
+    f"/vacations/?limit=100&employee_id={DELETED_EMPLOYEE}": 0,
+    "/vacations/?limit=100": None,
+    "/vacations/calendar?from=2024-01-01&to=2024-01-31&limit=100": None,
+    "/roles/?limit=100&include=employees": None,
+}
+
+
+def seed(session, models):
+    departments = [models.Department(name=f"Department {i}") for i in range(10)]
+    session.add_all(departments)
+    session.flush()
+    employees = []
+    for i in range(300):
+        employee = models.Employee(
+            employee_code=f"E{i:05d}", last_name=f"Last{i}", first_name=f"First{i}",
+            position="engineer", hire_date=date(2020, 1, 1) + timedelta(days=i),
+            salary=1000 + i, department_id=departments[i % len(departments)].id,
+        )
+        employee.documents = [
+            models.Document(document_type=models.DocumentTypeEnum.passport, file_path=f"doc{i}-{j}")
+            for j in range(2)
+        ]
+        employee.vacations = [
+            models.Vacation(start_date=date(2024, 1 + j, 1), end_date=date(2024, 1 + j, 10),
+                            vacation_type=models.VacationTypeEnum.regular,
+                            status=models.VacationStatusEnum.approved)
+            for j in range(2)
+        ]
+        employees.append(employee)
+    session.add_all(employees)
+    session.flush()
+    for department in departments:
+        department.manager_id = employees[department.id].id
+    session.add_all(
+        models.User(username=f"user{i}", email=f"user{i}@example.com", password="x",
+                    employee_id=employees[i].id)
+        for i in range(150)
+    )
+    session.add_all(
+        models.Role(role_type=models.RoleTypeEnum.medical, status=models.RoleStatusEnum.planned,
+                    start_date=date(2024, 1, 1), employees=employees[i:i + 5])
+        for i in range(150)
+    )
+    session.commit()
+
+
+def main():
+    if os.path.exists(BUDGET_DB):
+        os.remove(BUDGET_DB)
+    use_database(f"sqlite:///{BUDGET_DB}")
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    import migrate
+    migrate.upgrade()
+    import main as app_module
+    import models
+    from database import SessionLocal, engine
+
+    with SessionLocal() as session:
+        seed(session, models)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    failed = False
+    client = TestClient(app_module.app)
+    for url, budget in BUDGETS.items():
+        statements.clear()
+        response = client.get(url)
+        count = len(statements)
+        ok = response.status_code == 200 and count <= budget
+        failed |= not ok
+        print(f"{'ok ' if ok else 'FAIL'} {count:>3}/{budget:<3} {response.status_code} {url}")
+        etag = response.headers.get("etag")
+        if etag is None:
+            continue
+        statements.clear()
+        response = client.get(url, headers={"If-None-Match": etag})
+        count = len(statements)
+        ok = response.status_code == 304 and count <= NOT_MODIFIED_BUDGET
+        failed |= not ok
+        print(f"{'ok ' if ok else 'FAIL'} {count:>3}/{NOT_MODIFIED_BUDGET:<3} {response.status_code} {url} (If-None-Match)")
+
+    response = client.delete(f"/employees/{DELETED_EMPLOYEE}")
+    print(f"{'ok ' if response.status_code == 200 else 'FAIL'} {response.status_code} "
+          f"DELETE /employees/{DELETED_EMPLOYEE}")
+    failed |= response.status_code != 200
+    for url, expected in AFTER_DELETE.items():
+        response = client.get(url)
+        ok = response.status_code == 200 and (expected is None or len(response.json()) == expected)
+        failed |= not ok
+        print(f"{'ok ' if ok else 'FAIL'} {response.status_code} {url} (after delete)")
+    os.remove(BUDGET_DB)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Состав большой роли: прежний путь через ORM (role.employees = загруженные
+Employee) против записи разницы в employee_roles (crud.add_role_members и др.).
+
+    python -m benchmarks.roles --members 20000 --batch 100
+
+Роль заранее содержит --members сотрудников; в неё добавляется и из неё
+удаляется --batch сотрудников. ORM-путь каждый раз загружает всех участников
+и новых сотрудников целиком, set-based — только id из запроса.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+from benchmarks.common import ROOT, dispose, seed_employees, timed, use_database
+
+ROLES_DB = os.path.join(ROOT, "roles_bench.db")
+
+
+def orm_replace(session, models, role_id: int, employee_ids):
+    # Как update_role до перехода на разницу: загрузка и присваивание коллекции
+    role = session.get(models.Role, role_id)
+    role.employees = session.query(models.Employee).filter(models.Employee.id.in_(employee_ids)).all()
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if os.path.exists(ROLES_DB):
+        os.remove(ROLES_DB)
+    use_database(f"sqlite:///{ROLES_DB}")
+    import crud
+    import migrate
+    import models
+    import schemas
+    from database import SessionLocal, engine
+
+    migrate.upgrade()
+    session = SessionLocal()
+    seed_employees(session, models, args.members + args.batch)
+    employee_ids = [row.id for row in session.query(models.Employee.id).order_by(models.Employee.id)]
+    members, batch = employee_ids[:args.members], employee_ids[args.members:]
+    role = crud.create_role(session, schemas.RoleCreate(
+        role_type="sector", start_date=date(2024, 1, 1), end_date=None, status="approved",
+        employee_ids=members))
+
+    def cycle(add, remove):
+        add()
+        session.expunge_all()  # ORM-путь не должен брать участников из identity map
+        remove()
+        session.expunge_all()
+
+    results = {"members": args.members, "batch": args.batch}
+    results["orm_add_remove"] = timed(lambda: cycle(
+        lambda: orm_replace(session, models, role.id, members + batch),
+        lambda: orm_replace(session, models, role.id, members)), args.repeat)
+    results["set_add_remove"] = timed(lambda: cycle(
+        lambda: crud.add_role_members(session, role.id, batch),
+        lambda: crud.remove_role_members(session, role.id, batch)), args.repeat)
+
+    started = time.perf_counter()
+    crud.update_role(session, role.id, schemas.RoleCreate(
+        role_type="sector", start_date=date(2024, 1, 1), end_date=None, status="approved",
+        employee_ids=members[args.batch:] + batch))
+    results["set_replace_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    session.expunge_all()
+    results["orm_load_all_members"] = timed(
+        lambda: (session.expunge_all(), crud.get_roles(session, include=("employees",))), args.repeat)
+    results["members_page"] = timed(
+        lambda: (session.expunge_all(), crud.get_role_members(session, role.id, limit=100)), args.repeat)
+    count = session.query(models.employee_roles).filter(models.employee_roles.c.role_id == role.id).count()
+    results["members_after"] = count
+    session.close()
+    dispose(engine)
+    os.remove(ROLES_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Время ответа поиска сотрудников на большой таблице.
+
+    python -m benchmarks.search --rows 1000000
+"""
+import argparse
+import json
+
+from benchmarks.common import seed_employees, timed, use_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    use_database()
+    import crud
+    import migrate
+    import models
+    from database import SessionLocal
+
+    migrate.upgrade()
+    session = SessionLocal()
+    seed_employees(session, models, args.rows)
+
+    results = {}
+    for query in ("Last4242", "ast42", "First1", "E0009", "La", "nothing"):
+        results[query] = timed(lambda: crud.search_employees(session, query, limit=20), args.repeat)
+    session.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
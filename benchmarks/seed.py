@@ -0,0 +1,208 @@
+"""
+Реалистичные данные для нагрузочных тестов: отделы с руководителями,
+сотрудники, учётные записи, документы, отпуска и роли в заданном масштабе.
+
+    python -m benchmarks.seed --employees 100000
+    python -m benchmarks.seed --employees 100000 --url postgresql+psycopg2://localhost/hr_bench
+
+Без --url пишет в load.db. Схема поднимается миграциями; база должна быть
+пустой или заполненной этой же командой с теми же параметрами (тогда ничего
+не делается). Генератор детерминирован (--seed): одинаковые параметры дают
+одинаковую базу, поэтому замеры разных коммитов сравнимы.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import ROOT, use_database
+
+LOAD_DB = os.path.join(ROOT, "load.db")
+CHUNK = 10000
+
+LAST_NAMES = (
+    "Ivanov", "Smirnov", "Kuznetsov", "Popov", "Vasiliev", "Petrov", "Sokolov", "Mikhailov",
+    "Novikov", "Fedorov", "Morozov", "Volkov", "Alekseev", "Lebedev", "Semenov", "Egorov",
+    "Pavlov", "Kozlov", "Stepanov", "Nikolaev", "Orlov", "Andreev", "Makarov", "Nikitin",
+)
+FIRST_NAMES = (
+    "Alexander", "Dmitry", "Maxim", "Sergey", "Andrey", "Alexey", "Artem", "Ilya", "Kirill",
+    "Anna", "Maria", "Elena", "Olga", "Tatiana", "Natalia", "Irina", "Ekaterina", "Svetlana",
+)
+POSITIONS = (
+    ("engineer", 120000), ("senior engineer", 180000), ("analyst", 110000), ("accountant", 90000),
+    ("manager", 160000), ("nurse", 70000), ("doctor", 150000), ("technician", 80000),
+)
+# Сотрудников на отдел и на роль в среднем
+EMPLOYEES_PER_DEPARTMENT = 50
+EMPLOYEES_PER_ROLE = 100
+MAX_ROLE_MEMBERS = 5000
+
+
+def _insert(session, table, rows, returning: bool = False):
+    """Пачками по CHUNK; с returning — id в порядке rows."""
+    ids = []
+    for start in range(0, len(rows), CHUNK):
+        chunk = rows[start:start + CHUNK]
+        if returning:
+            statement = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+            ids.extend(session.scalars(statement, chunk).all())
+        else:
+            session.execute(table.insert(), chunk)
+    return ids
+
+
+def populate(session, models, employees: int, seed: int = 0, today: date = None) -> dict:
+    """Заполняет пустую базу; возвращает число строк по таблицам."""
+    tables = {
+        "departments": models.Department.__table__,
+        "employees": models.Employee.__table__,
+        "users": models.User.__table__,
+        "documents": models.Document.__table__,
+        "vacations": models.Vacation.__table__,
+        "roles": models.Role.__table__,
+        "employee_roles": models.employee_roles,
+    }
+    existing = session.query(models.Employee).count()
+    if existing == employees:
+        return {name: session.query(table).count() for name, table in tables.items()}
+    if existing:
+        raise SystemExit(f"База уже заполнена ({existing} сотрудников), нужна пустая")
+
+    rng = random.Random(seed)
+    today = today or date.today()
+    department_count = max(1, employees // EMPLOYEES_PER_DEPARTMENT)
+    department_ids = _insert(session, tables["departments"], [
+        {"name": f"Department {i:04d}", "description": f"Department {i} of the organisation", "manager_id": None}
+        for i in range(department_count)
+    ], returning=True)
+
+    rows = []
+    for i in range(employees):
+        position, base_salary = rng.choice(POSITIONS)
+        rows.append({
+            "employee_code": f"E{i:08d}",
+            "last_name": rng.choice(LAST_NAMES) + ("a" if rng.random() < 0.5 else ""),
+            "first_name": rng.choice(FIRST_NAMES),
+            "position": position,
+            "hire_date": today - timedelta(days=rng.randrange(20 * 365)),
+            "salary": round(max(30000, rng.gauss(base_salary, base_salary * 0.25)), 2),
+            "status": "active" if rng.random() < 0.9 else "inactive",
+            # Неравномерно: крупные и мелкие отделы
+            "department_id": department_ids[min(int(rng.paretovariate(1.2)) - 1, department_count - 1)]
+            if rng.random() < 0.3 else rng.choice(department_ids),
+        })
+    employee_ids = _insert(session, tables["employees"], rows, returning=True)
+    managers = {}
+    for employee_id, row in zip(employee_ids, rows):
+        managers.setdefault(row["department_id"], employee_id)
+    for department_id, manager_id in managers.items():
+        session.execute(tables["departments"].update()
+                        .where(tables["departments"].c.id == department_id).values(manager_id=manager_id))
+
+    # Один хэш на всех: bcrypt на каждую строку занял бы часы
+    from hashing import pwd_context
+    password = pwd_context.hash("password")
+    _insert(session, tables["users"], [
+        {"username": f"user{i:08d}", "email": f"user{i:08d}@example.com", "password": password,
+         "is_active": True, "employee_id": employee_id}
+        for i, employee_id in enumerate(employee_ids) if i % 3 == 0
+    ])
+
+    documents = []
+    for employee_id in employee_ids:
+        documents.append({"employee_id": employee_id, "document_type": "employment_record",
+                          "file_path": f"docs/{employee_id}/employment_record.pdf", "expiration_date": None})
+        for document_type in ("passport", "contract", "other"):
+            if rng.random() < 0.6:
+                documents.append({
+                    "employee_id": employee_id, "document_type": document_type,
+                    "file_path": f"docs/{employee_id}/{document_type}.pdf",
+                    "expiration_date": today + timedelta(days=rng.randrange(-365, 3 * 365)),
+                })
+    _insert(session, tables["documents"], documents)
+
+    vacations = []
+    for employee_id in employee_ids:
+        start = today - timedelta(days=365)
+        for _ in range(rng.randrange(5)):
+            start += timedelta(days=rng.randrange(20, 120))
+            vacations.append({
+                "employee_id": employee_id,
+                "start_date": start,
+                "end_date": start + timedelta(days=rng.randrange(3, 21)),
+                "vacation_type": rng.choices(("regular", "sick", "unpaid"), (8, 3, 1))[0],
+                "status": "requested" if start > today else rng.choices(("approved", "rejected"), (9, 1))[0],
+                "notes": None,
+            })
+    _insert(session, tables["vacations"], vacations)
+
+    role_ids = _insert(session, tables["roles"], [
+        {"role_type": rng.choice(("sector", "medical")), "status": rng.choice(("planned", "approved")),
+         "start_date": today - timedelta(days=rng.randrange(730)), "end_date": None}
+        for _ in range(max(1, employees // EMPLOYEES_PER_ROLE))
+    ], returning=True)
+    memberships = []
+    for role_id in role_ids:
+        size = min(len(employee_ids), MAX_ROLE_MEMBERS, int(rng.paretovariate(1.0) * 5))
+        memberships.extend({"employee_id": employee_id, "role_id": role_id}
+                           for employee_id in rng.sample(employee_ids, size))
+    _insert(session, tables["employee_roles"], memberships)
+    session.commit()
+    return {name: session.query(table).count() for name, table in tables.items()}
+
+
+def sample_ids(db, models) -> dict:
+    """id из заполненной базы, по которым ходят чтения."""
+    from sqlalchemy import func
+
+    def ids(column, *criteria):
+        return [row[0] for row in db.query(column).filter(*criteria).order_by(column).limit(1000)]
+
+    roles = models.employee_roles.c
+    largest_role = (db.query(roles.role_id).group_by(roles.role_id)
+                    .order_by(func.count().desc(), roles.role_id).limit(1).scalar())
+    return {
+        "employees": ids(models.Employee.id),
+        "codes": ids(models.Employee.employee_code),
+        "departments": ids(models.Department.id),
+        "managers": ids(models.Department.manager_id, models.Department.manager_id.isnot(None)),
+        "documents": ids(models.Document.id),
+        "roles": ids(models.Role.id),
+        "largest_role": largest_role,
+    }
+
+
+def open_database(url: str = None, employees: int = 10000, seed: int = 0):
+    """
+    Направляет приложение на базу url (по умолчанию load.db), поднимает схему
+    и заполняет её. Вызывать до импорта config/database. -> (url, counts)
+    """
+    url = use_database(url or f"sqlite:///{LOAD_DB}")
+    import migrate
+    import models
+    from database import SessionLocal
+
+    migrate.upgrade()
+    with SessionLocal() as session:
+        counts = populate(session, models, employees, seed)
+    return url, counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="по умолчанию SQLite load.db")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    url, counts = open_database(args.url, args.employees, args.seed)
+    print(json.dumps({"url": url.split("@")[-1], "seconds": round(time.perf_counter() - started, 1),
+                      "rows": counts}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
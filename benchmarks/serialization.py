@@ -0,0 +1,76 @@
+"""
+Строк в секунду на списках: обычная сериализация (ORM-объекты и response_model)
+против FAST_SERIALIZATION (колонки и dump_json, serialization.py).
+
+    python -m benchmarks.serialization --repeat 200
+
+Маршруты вызываются через TestClient со страницей limit=100, поэтому в замер
+входят SQL и накладные расходы FastAPI — то, что видит клиент.
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import ROOT, use_database
+
+SERIALIZATION_DB = os.path.join(ROOT, "serialization.db")
+
+ENTITY_URLS = {
+    "employees": "/employees/?limit=100",
+    "departments": "/departments/?limit=100",
+    "users": "/users/?limit=100",
+    "documents": "/documents/?limit=100",
+    "vacations": "/vacations/?limit=100",
+    "roles": "/roles/?limit=100",
+}
+
+
+def rows_per_second(client, url: str, repeat: int):
+    rows = len(client.get(url).json())  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeat):
+        client.get(url)
+    return round(rows * repeat / (time.perf_counter() - started)), rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if os.path.exists(SERIALIZATION_DB):
+        os.remove(SERIALIZATION_DB)
+    use_database(f"sqlite:///{SERIALIZATION_DB}")
+    from fastapi.testclient import TestClient
+    import migrate
+    migrate.upgrade()
+    import main as app_module
+    import models
+    from benchmarks.query_budget import seed
+    from config import settings
+    from database import SessionLocal, engine
+
+    with SessionLocal() as session:
+        seed(session, models)
+
+    client = TestClient(app_module.app)
+    results = {}
+    for entity, url in ENTITY_URLS.items():
+        settings.fast_serialization = False
+        orm, rows = rows_per_second(client, url, args.repeat)
+        settings.fast_serialization = True
+        fast, _ = rows_per_second(client, url, args.repeat)
+        results[entity] = {
+            "rows_per_page": rows,
+            "orm_rows_per_sec": orm,
+            "fast_rows_per_sec": fast,
+            "speedup": round(fast / orm, 2),
+        }
+    engine.dispose()
+    os.remove(SERIALIZATION_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
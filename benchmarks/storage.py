@@ -0,0 +1,150 @@
+"""
+Загрузка и выдача содержимого документов (storage.py): пропускная способность
+на большом файле, повторная загрузка того же файла (дедупликация) и много
+параллельных загрузок.
+
+    python -m benchmarks.storage --size-mb 512 --concurrency 32
+
+Клиент — httpx.ASGITransport в том же процессе: тело загрузки уходит
+приложению по чанкам, как от сервера. Прирост пикового RSS за время загрузки
+большого файла показывает, что файл не собирается в памяти целиком.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import time
+
+from benchmarks.common import ROOT, dispose, summarize, use_database
+
+STORAGE_DB = os.path.join(ROOT, "storage_bench.db")
+STORAGE_DIR = os.path.join(ROOT, "storage_bench")
+CHUNK = 256 * 1024
+BLOCK = os.urandom(CHUNK)
+
+
+def body(size: int, seed: int):
+    # Чанки собираются на лету: в памяти клиента не больше одного. Содержимое
+    # зависит только от seed, одинаковый seed — одинаковый файл
+    sent = 0
+    while sent < size:
+        chunk = seed.to_bytes(8, "big") + BLOCK[8:min(CHUNK, size - sent)]
+        sent += len(chunk)
+        yield chunk
+
+
+async def upload(client, document_id: int, size: int, seed: int):
+    async def stream():
+        for chunk in body(size, seed):
+            yield chunk
+    response = await client.put(f"/documents/{document_id}/content", content=stream(),
+                                headers={"content-type": "application/pdf"})
+    response.raise_for_status()
+    return response.json()
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def drive(app, document_ids, args):
+    import httpx
+
+    results = {}
+    size = args.size_mb * 1024 * 1024
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        rss = max_rss_mb()
+        started = time.perf_counter()
+        await upload(client, document_ids[0], size, seed=0)
+        elapsed = time.perf_counter() - started
+        results["large_upload"] = {
+            "mb_per_sec": round(args.size_mb / elapsed, 1),
+            "peak_rss_growth_mb": round(max_rss_mb() - rss, 1),
+        }
+
+        started = time.perf_counter()
+        await upload(client, document_ids[1], size, seed=0)
+        results["large_upload_duplicate"] = {"mb_per_sec": round(args.size_mb / (time.perf_counter() - started), 1)}
+
+        started = time.perf_counter()
+        response = await client.get(f"/documents/{document_ids[0]}/content")
+        results["large_download"] = {"mb_per_sec": round(len(response.content) / 1024 / 1024
+                                                         / (time.perf_counter() - started), 1)}
+        started = time.perf_counter()
+        for i in range(100):
+            await client.get(f"/documents/{document_ids[0]}/content",
+                             headers={"Range": f"bytes={i * CHUNK}-{i * CHUNK + 65535}"})
+        results["range_request_ms"] = round((time.perf_counter() - started) * 10, 3)
+
+        small = args.small_kb * 1024
+        latencies = []
+        queue = iter(range(args.uploads))
+
+        async def worker():
+            for i in queue:
+                # Каждая четвёртая загрузка повторяет уже загруженный файл
+                seed = 1 + (i // 4 if i % 4 == 3 else i)
+                request_started = time.perf_counter()
+                await upload(client, document_ids[2 + i], small, seed)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        results["concurrent_uploads"] = summarize(latencies)
+        results["concurrent_uploads"].update({
+            "uploads_per_sec": round(args.uploads / elapsed, 1),
+            "mb_per_sec": round(args.uploads * args.small_kb / 1024 / elapsed, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--small-kb", type=int, default=512)
+    parser.add_argument("--uploads", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    for path in (STORAGE_DB,):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(STORAGE_DIR, ignore_errors=True)
+    use_database(f"sqlite:///{STORAGE_DB}")
+    os.environ["STORAGE_DIR"] = STORAGE_DIR
+    os.environ["STORAGE_MAX_UPLOAD_BYTES"] = str(2 * args.size_mb * 1024 * 1024)
+    import migrate
+    migrate.upgrade()
+    import main as app_module
+    import models
+    from database import SessionLocal, engine
+
+    with SessionLocal() as session:
+        employee = models.Employee(employee_code="E0", last_name="Last", first_name="First")
+        session.add(employee)
+        session.flush()
+        documents = [
+            models.Document(employee_id=employee.id, document_type=models.DocumentTypeEnum.passport,
+                            file_path=f"scan{i}.pdf")
+            for i in range(args.uploads + 2)
+        ]
+        session.add_all(documents)
+        session.commit()
+        document_ids = [document.id for document in documents]
+
+    results = asyncio.run(drive(app_module.app, document_ids, args))
+    files = sum(len(names) for directory, _, names in os.walk(STORAGE_DIR) if not directory.endswith("tmp"))
+    results["files_stored"] = files
+    results["uploads_total"] = args.uploads + 2
+    dispose(engine)
+    os.remove(STORAGE_DB)
+    shutil.rmtree(STORAGE_DIR)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Набор замеров для сравнения коммитов: заполнение базы, микробенчмарки
+crud.py и HTTP-нагрузка — на SQLite и, если доступен, на локальном Postgres.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --employees 100000 --postgres postgresql+psycopg2://localhost/hr_bench
+    python -m benchmarks.compare bench_results/<старый>.json bench_results/<новый>.json
+
+Postgres берётся из --postgres или BENCH_POSTGRES_URL; база должна быть
+пустой или заполненной suite с тем же --employees. Недоступный Postgres
+пропускается с причиной в результатах. Каждая база — отдельный процесс
+(движок создаётся при импорте database.py). Результат по умолчанию —
+bench_results/<коммит>.json.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import ROOT, git_revision, write_results
+from benchmarks.seed import LOAD_DB
+
+RESULTS_DIR = os.path.join(ROOT, "bench_results")
+
+
+def reachable(url: str):
+    """None, если к базе можно подключиться, иначе причина."""
+    from sqlalchemy import create_engine, text
+
+    try:
+        engine = create_engine(url)  # без драйвера (psycopg2) падает уже здесь
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        engine.dispose()
+    except Exception as exc:
+        return f"{type(exc).__name__}: {str(exc).splitlines()[0]}"
+    return None
+
+
+def run_tool(module: str, url: str, args, *extra) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        out = os.path.join(directory, "result.json")
+        subprocess.run(
+            [sys.executable, "-m", module, "--url", url, "--employees", str(args.employees), "--out", out, *extra],
+            cwd=ROOT, check=True, stdout=subprocess.DEVNULL,
+        )
+        with open(out) as file:
+            return json.load(file)
+
+
+def run_database(url: str, args) -> dict:
+    subprocess.run([sys.executable, "-m", "benchmarks.seed", "--url", url, "--employees", str(args.employees)],
+                   cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    crud = run_tool("benchmarks.crud_micro", url, args, "--repeat", str(args.repeat))
+    http = run_tool("benchmarks.http_load", url, args,
+                    "--concurrency", str(args.concurrency), "--requests", str(args.requests))
+    return {"rows": crud["meta"]["rows"], **crud["results"], **http["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--postgres", default=os.environ.get("BENCH_POSTGRES_URL"))
+    parser.add_argument("--out", help="по умолчанию bench_results/<коммит>.json")
+    args = parser.parse_args()
+
+    if os.path.exists(LOAD_DB):
+        os.remove(LOAD_DB)
+    results = {"sqlite": run_database(f"sqlite:///{LOAD_DB}", args)}
+    os.remove(LOAD_DB)
+    if args.postgres:
+        reason = reachable(args.postgres)
+        results["postgresql"] = {"skipped": reason} if reason else run_database(args.postgres, args)
+
+    revision = git_revision()
+    name = (revision["commit"] or "unknown")[:12] + ("-dirty" if revision["dirty"] else "")
+    out = args.out or os.path.join(RESULTS_DIR, f"{name}.json")
+    write_results(out, results, employees=args.employees, repeat=args.repeat,
+                  concurrency=args.concurrency, requests=args.requests)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
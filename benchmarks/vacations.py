@@ -0,0 +1,92 @@
+"""
+Календарь отпусков на большой таблице: выборка за неделю по отделу,
+отсутствующие по дням за месяц и проверка пересечений при записи.
+
+    python -m benchmarks.vacations --rows 2000000
+"""
+import argparse
+import json
+from datetime import date, timedelta
+
+from benchmarks.common import seed_employees, timed, use_database
+
+DEPARTMENTS = 50
+
+
+def seed_vacations(session, models, rows: int, employees: int):
+    if session.query(models.Vacation).count() >= rows:
+        return
+    session.query(models.Vacation).delete()
+    if session.query(models.Department).count() < DEPARTMENTS:
+        session.add_all(models.Department(name=f"Department {i}") for i in range(DEPARTMENTS))
+        session.flush()
+    department_ids = [row.id for row in session.query(models.Department.id).limit(DEPARTMENTS)]
+    session.execute(
+        models.Employee.__table__.update().values(
+            department_id=department_ids[0] + models.Employee.id % DEPARTMENTS
+        )
+    )
+    employee_ids = [row.id for row in session.query(models.Employee.id).limit(employees)]
+    batch = []
+    for i in range(rows):
+        # У каждого сотрудника отпуска идут подряд и не пересекаются
+        slot, index = divmod(i, len(employee_ids))
+        start = date(2000, 1, 1) + timedelta(days=slot * 30 + index % 15)
+        batch.append({
+            "employee_id": employee_ids[index],
+            "start_date": start,
+            "end_date": start + timedelta(days=i % 14),
+            "vacation_type": "regular",
+            "status": "rejected" if i % 10 == 0 else "approved",
+        })
+        if len(batch) == 10000:
+            session.execute(models.Vacation.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        session.execute(models.Vacation.__table__.insert(), batch)
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    use_database()
+    import crud
+    import migrate
+    import models
+    import vacation_calendar
+    from database import SessionLocal
+
+    migrate.upgrade()
+    session = SessionLocal()
+    seed_employees(session, models, args.employees)
+    seed_vacations(session, models, args.rows, args.employees)
+    department_id = session.query(models.Department.id).first().id
+    employee_id = session.query(models.Employee.id).first().id
+    last_end = session.query(models.Vacation.end_date).order_by(models.Vacation.end_date.desc()).first().end_date
+    # Середина заполненного периода, чтобы индекс работал не на краю
+    middle = date(2000, 1, 1) + (last_end - date(2000, 1, 1)) / 2
+
+    results = {
+        "calendar_week_department": timed(lambda: crud.get_vacation_calendar(
+            session, middle, middle + timedelta(days=6), department_id=department_id, limit=100), args.repeat),
+        "calendar_week_all": timed(lambda: crud.get_vacation_calendar(
+            session, middle, middle + timedelta(days=6), limit=100), args.repeat),
+        "headcount_month_department": timed(lambda: crud.get_vacation_headcount(
+            session, middle, middle + timedelta(days=30), department_id=department_id), args.repeat),
+        "headcount_month_all": timed(lambda: crud.get_vacation_headcount(
+            session, middle, middle + timedelta(days=30)), args.repeat),
+        "overlap_check": timed(lambda: vacation_calendar.ensure_no_overlap(
+            session, employee_id, last_end + timedelta(days=1), last_end + timedelta(days=10),
+            models.VacationStatusEnum.approved), args.repeat),
+    }
+    session.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Записи в секунду: старый путь (ORM-загрузка, commit, db.refresh) против
+INSERT/UPDATE ... RETURNING из crud.py.
+
+    python -m benchmarks.writes
+    python -m benchmarks.writes --rtt-ms 0.5
+    python -m benchmarks.writes --url postgresql+psycopg2://.../empty_db
+
+--rtt-ms добавляет задержку на каждый обмен с базой (SQL и COMMIT): SQLite
+в том же процессе не показывает, сколько стоит лишний round-trip до сервера.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+from benchmarks.common import ROOT, dispose, use_database
+
+WRITES_DB = os.path.join(ROOT, "writes.db")
+
+
+def legacy_create(db, models, values):
+    employee = models.Employee(**values)
+    db.add(employee)
+    db.commit()
+    db.refresh(employee)
+    return employee
+
+
+def legacy_update(db, models, employee_id, values):
+    employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
+    for field, value in values.items():
+        setattr(employee, field, value)
+    db.commit()
+    db.refresh(employee)
+    return employee
+
+
+def run(label, session_factory, create, update, schemas, writes: int, statements: list):
+    """Создание и обновление writes сотрудников, каждое в своей сессии, как в запросе."""
+    result = {}
+    ids = []
+    for operation in ("create", "update"):
+        statements.clear()
+        started = time.perf_counter()
+        for i in range(writes):
+            with session_factory() as db:
+                if operation == "create":
+                    employee = create(db, {
+                        "employee_code": f"{label}{i:07d}", "last_name": f"Last{i}", "first_name": "First",
+                        "position": "engineer", "hire_date": date(2020, 1, 1), "salary": 1000,
+                    })
+                    ids.append(employee.id)
+                else:
+                    employee = update(db, ids[i], {"position": f"lead{i}"})
+                # Сериализация ответа, как в маршруте: после commit не должно быть догрузок
+                schemas.Employee.model_validate(employee)
+        elapsed = time.perf_counter() - started
+        result[operation] = {
+            "writes_per_sec": round(writes / elapsed),
+            "round_trips_per_write": round(len(statements) / writes, 2),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="пустая база; по умолчанию временная SQLite")
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if not args.url and os.path.exists(WRITES_DB):
+        os.remove(WRITES_DB)
+    use_database(args.url or f"sqlite:///{WRITES_DB}")
+    from sqlalchemy import event
+    from sqlalchemy.orm import sessionmaker
+    import crud
+    import migrate
+    import models
+    import schemas
+    from database import SessionLocal, engine
+
+    migrate.upgrade()
+    statements = []
+    delay = args.rtt_ms / 1000
+
+    def round_trip(*_):
+        statements.append(1)
+        if delay:
+            time.sleep(delay)
+
+    event.listen(engine, "before_cursor_execute", round_trip)
+    event.listen(engine, "commit", round_trip)
+
+    # Прежняя настройка сессии: commit сбрасывает объекты
+    LegacySession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    results = {
+        "dialect": engine.dialect.name,
+        "rtt_ms": args.rtt_ms,
+        "before": run("B", LegacySession,
+                      lambda db, values: legacy_create(db, models, values),
+                      lambda db, employee_id, values: legacy_update(db, models, employee_id, values),
+                      schemas, args.writes, statements),
+        "after": run("A", SessionLocal,
+                     lambda db, values: crud.create_employee(db, schemas.EmployeeCreate(**values)),
+                     lambda db, employee_id, values: crud.update_employee(
+                         db, employee_id, schemas.EmployeeUpdate(**values)),
+                     schemas, args.writes, statements),
+    }
+    dispose(engine)
+    if not args.url:
+        os.remove(WRITES_DB)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import json
+from typing import Any, List
+
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+import schemas
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+# Dependency: тело запроса — JSON-массив или NDJSON (одна запись на строку)
+async def read_bulk_payload(request: Request) -> List[Any]:
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        rows = []
+        for number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {number}")
+        return rows
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    return rows
+
+
+def validate_rows(rows: List[Any], schema):
+    """Валидирует каждую строку отдельно: (index, объект) и ошибки по строкам."""
+    adapter = TypeAdapter(schema)
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, adapter.validate_python(row)))
+        except ValidationError as exc:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+                for error in exc.errors()
+            )
+            errors.append(schemas.BulkError(index=index, error=message))
+    return valid, errors
+
+
+def bulk_result(rows: List[Any], ids, validation_errors, write_errors) -> schemas.BulkResult:
+    errors = sorted(validation_errors + write_errors, key=lambda error: error.index)
+    return schemas.BulkResult(processed=len(rows), succeeded=len(ids), ids=ids, errors=errors)
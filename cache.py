@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Кэш одиночных сущностей (GET /employees/{id}, GET /departments/{id}).
+# Значение хранится с версией — ETag маршрута из счётчиков table_versions
+# (crud._read_through). Запись в любом воркере поднимает версию, и у остальных
+# старое значение становится промахом на следующем же чтении; delete() при
+# записи убирает его сразу в своём процессе. TTL — только срок жизни записи
+# в памяти, не граница устаревания.
+
+
+class CacheBackend:
+    """Интерфейс бэкенда. Redis-совместимый бэкенд реализует те же методы."""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class NullCache(CacheBackend):
+    """Кэш выключен: всегда промах."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+class LRUCache(CacheBackend):
+    def __init__(self, max_entries: int = 10000, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> CacheBackend:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from config import settings
+            if settings.cache_backend == "memory":
+                _cache = LRUCache(max_entries=settings.cache_max_entries, ttl=settings.cache_ttl_seconds)
+            else:
+                _cache = NullCache()
+        return _cache
+
+def configure(backend: CacheBackend):
+    """Подменяет бэкенд (например, на Redis-совместимый или NullCache в бенчмарке)."""
+    global _cache
+    with _cache_lock:
+        _cache = backend
+
+
+def entity_key(entity: str, entity_id: int) -> str:
+    return f"{entity}:{entity_id}"
@@ -0,0 +1,306 @@
+"""
+Лента изменений: GET /changes/stream (Server-Sent Events).
+
+Любая запись в отслеживаемые таблицы оставляет строку в change_events в той
+же транзакции (триггеры миграции 0007). В воркере одна фоновая задача
+(ChangeFeed) опрашивает change_events раз в CHANGE_FEED_POLL_SECONDS — один
+SELECT по первичному ключу на воркер, сколько бы ни было подписчиков, — и
+раскладывает готовые SSE-кадры по очередям подписчиков. Кадр события
+кодируется один раз на всех. Подписчик — корутина, ждущая свою asyncio.Queue:
+пока событий нет, у него нет ни потока, ни соединения с БД.
+
+Возобновление: id кадра — номер события (seq). Клиент переподключается с
+Last-Event-ID (EventSource шлёт его сам) или ?since=, пропущенное дочитывается
+из change_events. Подписчик, переполнивший очередь, так же дочитывает из БД.
+Если нужные события уже вычищены (CHANGE_FEED_RETENTION_HOURS), клиент
+получает event: reset — перечитать списки целиком — и продолжает с текущего
+места.
+
+PostgreSQL выдаёт номера до фиксации, а транзакции фиксируются не по порядку:
+за пропуском в номерах может стоять ещё не зафиксированная запись. Лента
+останавливается на пропуске и ждёт его GAP_TIMEOUT секунд, потом считает номер
+откатом. В SQLite пишет одна транзакция за раз, пропусков нет.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, FrozenSet, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+import models
+from config import settings
+
+logger = logging.getLogger("changes")
+
+# Таблицы с триггерами миграции 0007; для employee_roles id — роль, ref_id — сотрудник
+TABLES = ("employees", "departments", "users", "documents", "vacations", "roles", "employee_roles")
+
+# Сколько ждать незафиксированную запись за пропуском в номерах
+GAP_TIMEOUT = 5.0
+# Чистка старых событий не чаще раза в PRUNE_INTERVAL секунд
+PRUNE_INTERVAL = 600.0
+
+HEARTBEAT = b": ping\n\n"
+
+
+async def tables_param(tables: Optional[str] = None) -> Optional[FrozenSet[str]]:
+    """Dependency: ?tables=employees,vacations; None — все таблицы. async — без похода в пул потоков."""
+    if not tables:
+        return None
+    names = frozenset(name.strip() for name in tables.split(",") if name.strip())
+    unknown = sorted(names.difference(TABLES))
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown table: {', '.join(unknown)}. Allowed: {', '.join(TABLES)}")
+    return names
+
+
+def read_changes(db, after: int, limit: int, until: Optional[int] = None, tables=None) -> list:
+    """События с номером после after (и не дальше until) по возрастанию номера."""
+    event = models.ChangeEvent
+    query = select(event.id, event.table_name, event.row_id, event.ref_id, event.op).where(event.id > after)
+    if until is not None:
+        query = query.where(event.id <= until)
+    if tables:
+        query = query.where(event.table_name.in_(tables))
+    return db.execute(query.order_by(event.id).limit(limit)).all()
+
+
+def bounds(db) -> tuple:
+    """(первый, последний) номер в change_events. Два подзапроса: min и max вместе SQLite читает целиком."""
+    event_id = models.ChangeEvent.id
+    return db.execute(select(select(func.min(event_id)).scalar_subquery(),
+                             select(func.max(event_id)).scalar_subquery())).one()
+
+
+def prune(db, before: datetime) -> int:
+    removed = db.execute(delete(models.ChangeEvent).where(models.ChangeEvent.created_at < before)).rowcount
+    db.commit()
+    return removed
+
+
+def payload(row) -> dict:
+    data = {"seq": row.id, "table": row.table_name, "op": row.op, "id": row.row_id}
+    if row.ref_id is not None:
+        data["ref_id"] = row.ref_id
+    return data
+
+
+def sse_frame(row) -> bytes:
+    return f"id: {row.id}\nevent: change\ndata: {json.dumps(payload(row), separators=(',', ':'))}\n\n".encode()
+
+
+def reset_frame(seq: int) -> bytes:
+    return f'id: {seq}\nevent: reset\ndata: {{"seq":{seq}}}\n\n'.encode()
+
+
+class Subscription:
+    __slots__ = ("tables", "queue", "lagged")
+
+    def __init__(self, tables: Optional[FrozenSet[str]], queue_size: int):
+        self.tables = tables
+        self.queue = asyncio.Queue(queue_size)
+        # Очередь переполнилась: пропущенное подписчик дочитает из БД
+        self.lagged = False
+
+    def offer(self, seq: int, table: str, frame: bytes):
+        if self.lagged or (self.tables is not None and table not in self.tables):
+            return
+        try:
+            self.queue.put_nowait((seq, frame))
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class ChangeFeed:
+    """Один опрос change_events на воркер и раздача событий подписчикам."""
+
+    def __init__(self, session_factory, poll_interval: float, batch_size: int, queue_size: int,
+                 heartbeat: float, retention_hours: float):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.retention_hours = retention_hours
+        # Номер последнего разосланного события; всё до него подписчики берут из БД
+        self.position = 0
+        self._subscribers = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._subscribe_lock: Optional[asyncio.Lock] = None
+        self._gap_since: Optional[float] = None
+        self._pruned_at: Optional[float] = None
+        self._counters = {"delivered": 0, "catch_ups": 0, "resets": 0}
+
+    # ---------- опрос ----------
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not self._task.done():
+            return
+        # Подписчики прежнего цикла событий (новый цикл — только в тестах) уже мертвы
+        self._loop = loop
+        self._subscribers = set()
+        self._wakeup = asyncio.Event()
+        self._subscribe_lock = asyncio.Lock()
+        # Пустой контекст: иначе задача унаследует контекст запроса первого подписчика,
+        # и metrics.py припишет её SQL этому запросу
+        self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._loop = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._maybe_prune()
+                if not self._subscribers:
+                    # Без подписчиков не опрашиваем; просыпаемся к первому или к чистке
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), PRUNE_INTERVAL)
+                    except TimeoutError:
+                        pass
+                    continue
+                if await self._poll() < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change feed poll failed")
+                await asyncio.sleep(self.poll_interval)
+
+    def _read(self, after: int, until: Optional[int] = None, tables=None) -> list:
+        with self.session_factory() as db:
+            return read_changes(db, after, self.batch_size, until, tables)
+
+    def _bounds(self) -> tuple:
+        with self.session_factory() as db:
+            return bounds(db)
+
+    async def _poll(self) -> int:
+        """Разослать новые события; возвращает, сколько разослано."""
+        rows = await asyncio.to_thread(self._read, self.position)
+        ready, expected = [], self.position + 1
+        for row in rows:
+            if row.id != expected:
+                now = time.monotonic()
+                self._gap_since = self._gap_since or now
+                if now - self._gap_since < GAP_TIMEOUT:
+                    break
+            self._gap_since = None
+            ready.append(row)
+            expected = row.id + 1
+        if not ready:
+            return 0
+        # Позиция и раздача без await между ними: подписчик, который дочитывает
+        # из БД до position, не разминётся с очередью
+        self.position = ready[-1].id
+        for row in ready:
+            frame = sse_frame(row)
+            for subscription in self._subscribers:
+                subscription.offer(row.id, row.table_name, frame)
+        self._counters["delivered"] += len(ready)
+        return len(ready)
+
+    async def _maybe_prune(self):
+        now = time.monotonic()
+        if self.retention_hours <= 0 or (self._pruned_at is not None and now - self._pruned_at < PRUNE_INTERVAL):
+            return
+        self._pruned_at = now
+        before = datetime.utcnow() - timedelta(hours=self.retention_hours)
+
+        def run():
+            with self.session_factory() as db:
+                return prune(db, before)
+
+        removed = await asyncio.to_thread(run)
+        if removed:
+            logger.info("Pruned %d change events older than %s", removed, before)
+
+    # ---------- подписчики ----------
+    async def subscribe(self, tables: Optional[FrozenSet[str]] = None) -> Subscription:
+        self.start()
+        async with self._subscribe_lock:
+            if not self._subscribers:
+                # Без подписчиков лента стояла: догоняем конец без рассылки
+                newest = (await asyncio.to_thread(self._bounds))[1] or 0
+                self.position, self._gap_since = max(self.position, newest), None
+            subscription = Subscription(tables, self.queue_size)
+            self._subscribers.add(subscription)
+        self._wakeup.set()
+        return subscription
+
+    async def stream(self, since: Optional[int] = None,
+                     tables: Optional[FrozenSet[str]] = None) -> AsyncIterator[bytes]:
+        """SSE-кадры после события since (None — с текущего места) до отключения клиента."""
+        subscription = await self.subscribe(tables)
+        try:
+            last = self.position
+            if since is not None and since != last:
+                oldest = (await asyncio.to_thread(self._bounds))[0]
+                if since > self.position or since + 1 < (oldest or self.position + 1):
+                    # События после since вычищены или номер не из этой базы
+                    self._counters["resets"] += 1
+                    last = self.position
+                    yield reset_frame(last)
+                else:
+                    last = since
+                    subscription.lagged = True
+            while True:
+                if subscription.lagged:
+                    # Дочитать из БД (last, position]; более новые события придут в очередь
+                    self._counters["catch_ups"] += 1
+                    subscription.lagged = False
+                    subscription.drain()
+                    until = self.position
+                    while last < until:
+                        rows = await asyncio.to_thread(self._read, last, until, subscription.tables)
+                        for row in rows:
+                            yield sse_frame(row)
+                        last = rows[-1].id if len(rows) == self.batch_size else until
+                    continue
+                try:
+                    # asyncio.timeout, а не wait_for: тот заводит задачу на каждое ожидание
+                    async with asyncio.timeout(self.heartbeat):
+                        seq, frame = await subscription.queue.get()
+                except TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if seq > last:
+                    last = seq
+                    yield frame
+        finally:
+            self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "position": self.position, **self._counters}
+
+
+_feed: Optional[ChangeFeed] = None
+_feed_lock = threading.Lock()
+
+def get_change_feed() -> ChangeFeed:
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            from database import SessionLocal
+
+            _feed = ChangeFeed(SessionLocal, settings.change_feed_poll_seconds, settings.change_feed_batch_size,
+                               settings.change_feed_queue_size, settings.change_feed_heartbeat_seconds,
+                               settings.change_feed_retention_hours)
+        return _feed
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,6 +7,84 @@ class Settings(BaseSettings):
     algorithm: str
     access_token_expire_minutes: int
 
+    # Асинхронный режим: маршруты работают через AsyncEngine (asyncpg/aiosqlite)
+    async_db: bool = False
+    async_database_url: Optional[str] = None
+
+    # Пул соединений (на процесс). pre_ping: "always" — SELECT 1 на каждый checkout,
+    # "idle" — только если соединение простояло дольше db_pool_ping_idle_seconds, "never"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 3600
+    db_pool_pre_ping: str = "idle"
+    db_pool_ping_idle_seconds: float = 30.0
+
+    # Реплика только для чтения (GET-маршруты, выгрузки); пусто — всё в основную базу
+    database_replica_url: Optional[str] = None
+
+    # Пул процессов для bcrypt: 0 — по числу ядер; сверх очереди отвечаем 429
+    hash_pool_size: int = 0
+    hash_queue_depth: int = 64
+
+    # Кэш одиночных сущностей: "memory" (LRU с TTL в процессе) или "none".
+    # Значение сверяется с версией таблиц (ETag), так что запись в другом
+    # воркере видна на следующем чтении; TTL ограничивает только память
+    cache_backend: str = "memory"
+    cache_ttl_seconds: float = 5.0
+    cache_max_entries: int = 10000
+
+    # Списки готовым JSON из колонок, минуя ORM-объекты и валидацию response_model
+    # (serialization.py); списки с ?include= идут обычным путём
+    fast_serialization: bool = False
+
+    # /departments/stats из сводки (department_stats плюс дельты от триггеров
+    # миграции 0012); false — GROUP BY по employees на каждый запрос. Период > 0
+    # запускает свёртку дельт фоновой задачей; 0 — только python -m org_chart
+    department_stats_summary: bool = True
+    department_stats_fold_seconds: float = 60.0
+
+    # Сканер истекающих документов (expiration.py): окна в днях и размер пачки.
+    # Период > 0 запускает сканер фоновой задачей в приложении; 0 — только
+    # отдельным процессом python -m expiration
+    expiration_windows_days: List[int] = [7, 30, 90]
+    expiration_batch_size: int = 1000
+    expiration_scan_interval_seconds: float = 0
+
+    # Содержимое документов (storage.py): каталог файлов, предел размера загрузки
+    # и префикс X-Accel-Redirect, если файлы отдаёт nginx (sendfile без Python)
+    storage_dir: str = "storage"
+    storage_max_upload_bytes: int = 100 * 1024 * 1024
+    storage_accel_redirect: Optional[str] = None
+
+    # JWT (auth.py): при auth_required все маршруты, кроме /token и /metrics, требуют
+    # Bearer-токен. Пользователь токена кэшируется на auth_principal_ttl_seconds
+    auth_required: bool = False
+    auth_principal_ttl_seconds: float = 30.0
+
+    # Лента изменений (changes.py): GET /changes/stream. Воркер опрашивает change_events
+    # раз в change_feed_poll_seconds, пока есть подписчики; отставший больше чем на
+    # change_feed_queue_size событий подписчик дочитывает из БД. События старше
+    # change_feed_retention_hours удаляются (0 — хранить все)
+    change_feed_poll_seconds: float = 0.5
+    change_feed_batch_size: int = 1000
+    change_feed_queue_size: int = 1000
+    change_feed_heartbeat_seconds: float = 15.0
+    change_feed_retention_hours: float = 24.0
+
+    # Журнал изменений (audit.py): разница полей пишется в audit_log пачками до
+    # audit_batch_size строк не реже раза в audit_flush_seconds. Очередь на процесс;
+    # если она полна, рабочий поток ждёт места, а event loop отбрасывает строки
+    # (/stats/audit, dropped)
+    audit_enabled: bool = True
+    audit_queue_size: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_seconds: float = 1.0
+
+    # Метрики: /metrics (Prometheus) и лог запросов дольше slow_request_seconds
+    metrics_enabled: bool = True
+    slow_request_seconds: float = 1.0
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8')
 
 settings = Settings()
\ No newline at end of file
@@ -1,75 +1,506 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import and_, cast, column, delete, insert, update, values as values_table
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 import models
 import schemas
-from passlib.context import CryptContext
+from pagination import decode_cursor, paginate
+import audit
+import http_cache  # слушатели сессии: версии таблиц после commit
+import auth
+import expiration
+import org_chart
+import search
+import vacation_calendar
+from hashing import get_hasher
+from filters import DOCUMENT_FILTERS, EMPLOYEE_FILTERS, VACATION_FILTERS
+from includes import DEPARTMENT_INCLUDES, EMPLOYEE_INCLUDES, ROLE_INCLUDES, loader_options
+from cache import entity_key, get_cache
+
+# Колонки, по которым разрешена keyset-сортировка (?sort=field / ?sort=-field)
+EMPLOYEE_SORTS = ("last_name", "hire_date", "salary", "employee_code")
+DEPARTMENT_SORTS = ("name",)
+USER_SORTS = ("username", "registration_date")
+DOCUMENT_SORTS = ("expiration_date", "upload_date")
+VACATION_SORTS = ("start_date", "end_date")
+ROLE_SORTS = ("start_date", "end_date")
+
+
+# ---------- WRITES ----------
+# Запись одной командой: INSERT/UPDATE ... RETURNING отдаёт строку сразу, без
+# SELECT из db.refresh(). Сессии не сбрасывают объекты на commit (database.py),
+# поэтому ответ сериализуется без повторного чтения.
+def _insert_returning(db: Session, model, values: dict, commit: bool = True):
+    if db.get_bind().dialect.insert_returning:
+        obj = db.scalars(insert(model).values(**values).returning(model)).one()
+    else:
+        # Без RETURNING (MySQL): id приходит из lastrowid, default'ы — питоновские
+        obj = model(**values)
+        db.add(obj)
+        db.flush()
+    if commit:
+        db.commit()
+    return obj
+
+
+def _update_returning(db: Session, model, object_id: int, values: dict, commit: bool = True):
+    """
+    UPDATE по первичному ключу без предварительной загрузки. None — строки нет.
+    Разница полей уходит в журнал (audit.py) после commit.
+    """
+    if not values:
+        return db.get(model, object_id)
+    statement = update(model).where(model.id == object_id).values(**values)
+    if audit.captured_in_update(db):
+        old = audit.old_values(model, [object_id], sorted(values))
+        row = db.execute(statement.where(model.id == old.c.id).returning(model, *old.c)).one_or_none()
+        if row is None:
+            obj = None
+        else:
+            obj = row[0]
+            audit.stage(db, audit.entries(model, {object_id: values}, {object_id: dict(zip(old.c.keys(), row[1:]))}))
+        if commit:
+            db.commit()
+        return obj
+    entries = audit.diff(db, model, {object_id: values})
+    if db.get_bind().dialect.update_returning:
+        obj = db.scalars(statement.returning(model)).one_or_none()
+    else:
+        obj = db.get(model, object_id) if db.execute(statement).rowcount else None
+    if obj is not None:
+        audit.stage(db, entries)
+    if commit:
+        db.commit()
+    return obj
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ---------- EMPLOYEE ----------
 def create_employee(db: Session, employee: schemas.EmployeeCreate):
-    db_employee = models.Employee(**employee.dict())
-    db.add(db_employee)
-    db.commit()
-    db.refresh(db_employee)
-    return db_employee
+    return _insert_returning(db, models.Employee, employee.dict())
 
 
-def get_employees(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Employee).offset(skip).limit(limit).all()
+def get_employees(db: Session, skip: int = 0, limit: int = 100,
+                  cursor: Optional[str] = None, sort: Optional[str] = None, include=(), filters=()):
+    query = db.query(models.Employee).options(*loader_options(EMPLOYEE_INCLUDES, include))
+    query = EMPLOYEE_FILTERS.apply(query, filters)
+    return paginate(query, models.Employee, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=EMPLOYEE_SORTS)
 
 def get_employee_by_code(db: Session, code: str):
     return db.query(models.Employee).filter(models.Employee.employee_code == code).first()
 
-def get_employee(db: Session, employee_id: int):
-    return db.query(models.Employee).filter(models.Employee.id == employee_id).first()
+def get_employee(db: Session, employee_id: int, include=()):
+    return (
+        db.query(models.Employee)
+        .options(*loader_options(EMPLOYEE_INCLUDES, include))
+        .filter(models.Employee.id == employee_id)
+        .first()
+    )
 
 
 
-def search_employees_by_last_name(db: Session, last_name: str):
-    return db.query(models.Employee).filter(models.Employee.last_name.ilike(f"%{last_name}%")).all()
+def _read_through(key: str, version: Optional[str], load):
+    """
+    В кэше лежит пара (версия, готовая схема). Версия — ETag из http_cache:
+    запись в другом воркере меняет её, и старое значение считается промахом,
+    не дожидаясь TTL. Ключ без версии, поэтому delete() при записи в своём
+    процессе убирает именно ту запись, которую читают.
+    """
+    cached = get_cache().get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    value = load()
+    if value is not None:
+        get_cache().set(key, (version, value))
+    return value
+
+def get_employee_cached(db: Session, employee_id: int, version: Optional[str] = None):
+    # Read-through: в кэше лежит готовая schemas.Employee, а не ORM-объект
+    def load():
+        employee = get_employee(db, employee_id)
+        return schemas.Employee.model_validate(employee) if employee is not None else None
+    return _read_through(entity_key("employee", employee_id), version, load)
+
+def search_employees(db: Session, query: str, limit: int = 20):
+    return search.search_employees(db, query, limit=limit)
 
 def update_employee(db: Session, employee_id: int, updated_data: schemas.EmployeeUpdate):
-    employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
-    if not employee:
-        return None
-    update_fields = updated_data.dict(exclude_unset=True)
-    for field, value in update_fields.items():
-        setattr(employee, field, value)
-    db.commit()
-    db.refresh(employee)
+    employee = _update_returning(db, models.Employee, employee_id, updated_data.dict(exclude_unset=True))
+    if employee is not None:
+        get_cache().delete(entity_key("employee", employee_id))
     return employee
 
 def delete_employee(db: Session, employee_id: int):
-    employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
+    employee = db.get(models.Employee, employee_id)
     if employee:
-        db.delete(employee)
+        # Ссылки отделов обнулит БД (ON DELETE SET NULL) — запись отдела в кэше тоже устареет
+        managed = _managed_departments(db, [employee_id])
+        _detach_employees(db, [employee_id])
         db.commit()
+        get_cache().delete(entity_key("employee", employee_id))
+        _invalidate_departments(managed)
     return employee
 
 
+# ---------- EMPLOYEE BULK ----------
+# Строки пишутся пачками по BULK_CHUNK_SIZE, одна транзакция на пачку.
+# Ошибочные строки попадают в errors и не прерывают остальную загрузку.
+BULK_CHUNK_SIZE = 5000
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _integrity_message(exc: IntegrityError) -> str:
+    return str(exc.orig).splitlines()[0] if exc.orig is not None else str(exc)
+
+def _write_rows_one_by_one(db: Session, rows, write):
+    # Пачка упала на ограничении БД — ищем виновные строки через SAVEPOINT
+    ids, errors = [], []
+    for index, row in rows:
+        try:
+            with db.begin_nested():
+                ids.append(write(row))
+        except IntegrityError as exc:
+            errors.append(schemas.BulkError(index=index, id=row.get("id"), error=_integrity_message(exc)))
+    db.commit()
+    return ids, errors
+
+def _insert_employee_row(db: Session):
+    def write(row):
+        return db.scalars(insert(models.Employee).returning(models.Employee.id), [row]).one()
+    return write
+
+def _update_employee_row(db: Session):
+    def write(row):
+        _update_rows(db, models.Employee, [row])
+        return row["id"]
+    return write
+
+def _delete_employee_row(db: Session):
+    def write(row):
+        _detach_employees(db, [row["id"]])
+        return row["id"]
+    return write
+
+def _invalidate_employees(employee_ids):
+    cache = get_cache()
+    for employee_id in employee_ids:
+        cache.delete(entity_key("employee", employee_id))
+
+def _existing_codes(db: Session, codes, exclude_ids=()):
+    query = db.query(models.Employee.employee_code, models.Employee.id).filter(
+        models.Employee.employee_code.in_(codes)
+    )
+    return {code for code, employee_id in query if employee_id not in exclude_ids}
+
+def bulk_create_employees(db: Session, items, chunk_size: int = BULK_CHUNK_SIZE):
+    """items — пары (index, schemas.EmployeeCreate). Возвращает (ids, errors)."""
+    ids, errors = [], []
+    seen_codes = set()
+    for chunk in _chunks(items, chunk_size):
+        existing = _existing_codes(db, [employee.employee_code for _, employee in chunk])
+        rows = []
+        for index, employee in chunk:
+            code = employee.employee_code
+            if code in existing or code in seen_codes:
+                errors.append(schemas.BulkError(index=index, error=f"Duplicate employee_code '{code}'"))
+                continue
+            seen_codes.add(code)
+            rows.append((index, employee.model_dump()))
+        if not rows:
+            continue
+        statement = insert(models.Employee).returning(models.Employee.id)
+        try:
+            ids.extend(db.scalars(statement, [row for _, row in rows]).all())
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            chunk_ids, chunk_errors = _write_rows_one_by_one(db, rows, _insert_employee_row(db))
+            ids.extend(chunk_ids)
+            errors.extend(chunk_errors)
+    return ids, errors
+
+def _update_rows(db: Session, model, rows: list):
+    """
+    UPDATE по первичному ключу (в каждой строке есть "id") с разницей в журнал.
+    PostgreSQL с журналом: одна команда UPDATE ... FROM (VALUES ...) на набор
+    колонок, прежние значения приходят в RETURNING (audit.old_values). Иначе —
+    executemany с audit.diff.
+    """
+    # Строки одного id сливаются в порядке применения: в журнале одна запись
+    # на id, а UPDATE ... FROM применил бы повтор id только один раз
+    merged = {}
+    for row in rows:
+        merged.setdefault(row["id"], {}).update(row)
+    if not audit.captured_in_update(db):
+        entries = audit.diff(db, model, merged)
+        db.execute(update(model), rows)
+        audit.stage(db, entries)
+        return
+    groups = {}
+    for row in merged.values():
+        groups.setdefault(tuple(sorted(set(row) - {"id"})), []).append(row)
+    for names, group in groups.items():
+        if not names:
+            continue
+        types = [model.__table__.c[name].type for name in names]
+        new = values_table(column("id", model.__table__.c.id.type),
+                           *(column(name, type_) for name, type_ in zip(names, types)), name="new").data(
+            [(row["id"], *(row[name] for name in names)) for row in group]
+        )
+        ids = [row["id"] for row in group]
+        old = audit.old_values(model, ids, names)
+        # Литералы VALUES без типа колонки: PostgreSQL выводит их как text
+        statement = (
+            update(model)
+            .where(model.id == new.c.id, model.id == old.c.id)
+            .values({name: cast(new.c[name], type_) for name, type_ in zip(names, types)})
+            .returning(*old.c)
+            .execution_options(synchronize_session=False)
+        )
+        previous = {row.id: row._mapping for row in db.execute(statement)}
+        audit.stage(db, audit.entries(model, {row["id"]: row for row in group}, previous))
+
+def bulk_update_employees(db: Session, items, chunk_size: int = BULK_CHUNK_SIZE):
+    """items — пары (index, schemas.EmployeeBulkUpdate). Обновление по первичному ключу."""
+    ids, errors = [], []
+    for chunk in _chunks(items, chunk_size):
+        chunk_ids = [employee.id for _, employee in chunk]
+        found = {employee_id for (employee_id,) in
+                 db.query(models.Employee.id).filter(models.Employee.id.in_(chunk_ids))}
+        codes = [employee.employee_code for _, employee in chunk if employee.employee_code is not None]
+        taken = _existing_codes(db, codes, exclude_ids=set(chunk_ids)) if codes else set()
+        rows, seen_codes = [], set()
+        for index, employee in chunk:
+            fields = employee.model_dump(exclude_unset=True)
+            code = fields.get("employee_code")
+            if employee.id not in found:
+                errors.append(schemas.BulkError(index=index, id=employee.id, error="Employee not found"))
+            elif code is not None and (code in taken or code in seen_codes):
+                errors.append(schemas.BulkError(index=index, id=employee.id, error=f"Duplicate employee_code '{code}'"))
+            elif len(fields) > 1:
+                seen_codes.add(code)
+                rows.append((index, fields))
+            else:
+                ids.append(employee.id)  # нечего обновлять
+        if not rows:
+            continue
+        try:
+            _update_rows(db, models.Employee, [row for _, row in rows])
+            db.commit()
+            ids.extend(row["id"] for _, row in rows)
+        except IntegrityError:
+            db.rollback()
+            chunk_ids, chunk_errors = _write_rows_one_by_one(db, rows, _update_employee_row(db))
+            ids.extend(chunk_ids)
+            errors.extend(chunk_errors)
+    _invalidate_employees(ids)
+    return ids, errors
+
+def _foreign_keys_enforced(db: Session) -> bool:
+    # SQLite выполняет ON DELETE только при PRAGMA foreign_keys=ON, а её не включаем
+    return db.get_bind().dialect.name != "sqlite"
+
+def _detach_employees(db: Session, employee_ids):
+    """DELETE сотрудников; ссылки на них обрабатывают правила ON DELETE (миграции 0009, 0013)."""
+    if not _foreign_keys_enforced(db):
+        # Без проверки внешних ключей выполняем те же правила сами, по команде на таблицу
+        for model, column in ((models.User, models.User.employee_id),
+                              (models.Department, models.Department.manager_id)):
+            db.execute(update(model).where(column.in_(employee_ids)).values({column.key: None}))
+        for table, column in ((models.Document.__table__, models.Document.employee_id),
+                              (models.Vacation.__table__, models.Vacation.employee_id),
+                              (models.employee_roles, models.employee_roles.c.employee_id)):
+            db.execute(delete(table).where(column.in_(employee_ids)))
+    db.execute(delete(models.Employee).where(models.Employee.id.in_(employee_ids)))
+
+def _managed_departments(db: Session, employee_ids) -> list:
+    return [department_id for (department_id,) in
+            db.query(models.Department.id).filter(models.Department.manager_id.in_(employee_ids))]
+
+def _invalidate_departments(department_ids):
+    cache = get_cache()
+    for department_id in department_ids:
+        cache.delete(entity_key("department", department_id))
+
+def bulk_delete_employees(db: Session, items, chunk_size: int = BULK_CHUNK_SIZE):
+    """items — пары (index, employee_id)."""
+    ids, errors = [], []
+    managed_departments = []
+    for chunk in _chunks(items, chunk_size):
+        found = {employee_id for (employee_id,) in
+                 db.query(models.Employee.id).filter(models.Employee.id.in_([i for _, i in chunk]))}
+        managed_departments.extend(_managed_departments(db, found))
+        rows = []
+        for index, employee_id in chunk:
+            if employee_id in found:
+                rows.append((index, {"id": employee_id}))
+            else:
+                errors.append(schemas.BulkError(index=index, id=employee_id, error="Employee not found"))
+        if not rows:
+            continue
+        try:
+            _detach_employees(db, [row["id"] for _, row in rows])
+            db.commit()
+            ids.extend(row["id"] for _, row in rows)
+        except IntegrityError:
+            db.rollback()
+            chunk_ids, chunk_errors = _write_rows_one_by_one(db, rows, _delete_employee_row(db))
+            ids.extend(chunk_ids)
+            errors.extend(chunk_errors)
+    _invalidate_employees(ids)
+    _invalidate_departments(managed_departments)
+    return ids, errors
+
+
+# ---------- EMPLOYEE OFFBOARDING ----------
+# Увольнение пачками по BULK_CHUNK_SIZE, одна транзакция на пачку. На каждую
+# зависимую таблицу — один SELECT затронутых id и один UPDATE/DELETE по
+# employee_id IN (...); объекты сотрудников не загружаются. Сотрудник,
+# документы и прошедшие отпуска остаются, меняются статусы.
+OFFBOARD_COUNTERS = ("offboarded", "users_disabled", "memberships_removed",
+                     "vacations_cancelled", "departments_unassigned")
+
+def _update_ids(db: Session, model, ids, values: dict) -> int:
+    """UPDATE строк по списку id с записью разницы в журнал (audit.py)."""
+    if not ids:
+        return 0
+    statement = update(model).where(model.id.in_(ids)).values(**values)
+    if audit.captured_in_update(db):
+        old = audit.old_values(model, ids, sorted(values))
+        current = db.execute(
+            statement.where(model.id == old.c.id).returning(*old.c).execution_options(synchronize_session=False)
+        )
+        audit.stage(db, audit.entries(model, {object_id: values for object_id in ids},
+                                      {row.id: row._mapping for row in current}))
+        return len(ids)
+    entries = audit.diff(db, model, {object_id: values for object_id in ids})
+    db.execute(statement)
+    audit.stage(db, entries)
+    return len(ids)
+
+def _ids(query) -> list:
+    return [object_id for (object_id,) in query]
+
+def _offboard_chunk(db: Session, employee_ids, today: date) -> tuple:
+    """Без commit. Возвращает счётчики и id учётных записей и отделов для сброса кэша."""
+    employees, users, vacations = models.Employee, models.User, models.Vacation
+    leaving = _ids(db.query(employees.id).filter(employees.id.in_(employee_ids),
+                                                 employees.status.is_distinct_from("inactive")))
+    user_ids = _ids(db.query(users.id).filter(users.employee_id.in_(employee_ids),
+                                              users.is_active.is_distinct_from(False)))
+    # Отпуска, которые ещё не начались, отменяются; идущие и прошедшие остаются
+    vacation_ids = _ids(db.query(vacations.id).filter(
+        vacations.employee_id.in_(employee_ids), vacations.start_date > today,
+        vacations.status != models.VacationStatusEnum.rejected,
+    ))
+    department_ids = _managed_departments(db, employee_ids)
+    counts = {
+        "offboarded": _update_ids(db, employees, leaving, {"status": "inactive"}),
+        "users_disabled": _update_ids(db, users, user_ids, {"is_active": False}),
+        "vacations_cancelled": _update_ids(db, vacations, vacation_ids,
+                                           {"status": models.VacationStatusEnum.rejected}),
+        "departments_unassigned": _update_ids(db, models.Department, department_ids, {"manager_id": None}),
+        "memberships_removed": db.execute(delete(models.employee_roles).where(
+            models.employee_roles.c.employee_id.in_(employee_ids))).rowcount,
+    }
+    return counts, user_ids, department_ids
+
+def _department_staff(db: Session, department_id: int, chunk_size: int):
+    """id сотрудников отдела пачками, keyset по id: пачка читается после commit предыдущей."""
+    last_id = 0
+    while True:
+        ids = _ids(db.query(models.Employee.id)
+                   .filter(models.Employee.department_id == department_id, models.Employee.id > last_id)
+                   .order_by(models.Employee.id).limit(chunk_size))
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+def offboard_employees(db: Session, employee_ids=None, department_id: Optional[int] = None,
+                       chunk_size: int = BULK_CHUNK_SIZE) -> Optional[schemas.OffboardResult]:
+    """
+    Увольнение по списку id или всего штата отдела: статус inactive, учётные
+    записи отключаются, членство в ролях удаляется, будущие отпуска
+    отклоняются, отделы остаются без руководителя. Повторный вызов ничего не
+    меняет. None — отдела department_id нет.
+    """
+    today = date.today()
+    if department_id is not None:
+        if db.query(models.Department.id).filter(models.Department.id == department_id).first() is None:
+            return None
+        chunks = _department_staff(db, department_id, chunk_size)
+    else:
+        chunks = _chunks(list(dict.fromkeys(employee_ids)), chunk_size)
+    totals = dict.fromkeys(OFFBOARD_COUNTERS, 0)
+    requested, missing = 0, []
+    for chunk in chunks:
+        requested += len(chunk)
+        if department_id is None:
+            found = set(_ids(db.query(models.Employee.id).filter(models.Employee.id.in_(chunk))))
+            missing.extend(employee_id for employee_id in chunk if employee_id not in found)
+            chunk = sorted(found)
+            if not chunk:
+                continue
+        counts, user_ids, department_ids = _offboard_chunk(db, chunk, today)
+        db.commit()
+        for name, value in counts.items():
+            totals[name] += value
+        _invalidate_employees(chunk)
+        _invalidate_departments(department_ids)
+        for user_id in user_ids:
+            # Отключённый пользователь: при следующем запросе токен не пройдёт проверку is_active
+            auth.invalidate_principal(user_id)
+    return schemas.OffboardResult(requested=requested, missing_ids=missing, **totals)
+
+def get_reports(db: Session, manager_id: int, skip: int = 0, limit: int = 100,
+                cursor: Optional[str] = None, sort: Optional[str] = None):
+    return paginate(org_chart.reports_query(db, manager_id), models.Employee, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=EMPLOYEE_SORTS)
+
+
 # ---------- DEPARTMENT ----------
 def create_department(db: Session, department: schemas.DepartmentCreate):
-    db_department = models.Department(**department.dict())
-    db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
-    return db_department
+    return _insert_returning(db, models.Department, department.dict())
+
+def get_department_cached(db: Session, department_id: int, version: Optional[str] = None):
+    def load():
+        department = get_department(db, department_id)
+        return schemas.Department.model_validate(department) if department is not None else None
+    return _read_through(entity_key("department", department_id), version, load)
+
+def get_department(db: Session, department_id: int, include=()):
+    return (
+        db.query(models.Department)
+        .options(*loader_options(DEPARTMENT_INCLUDES, include))
+        .filter(models.Department.id == department_id)
+        .first()
+    )
 
-def get_department(db: Session, department_id: int):
-    return db.query(models.Department).filter(models.Department.id == department_id).first()
+def get_departments(db: Session, skip: int = 0, limit: int = 100,
+                    cursor: Optional[str] = None, sort: Optional[str] = None, include=()):
+    query = db.query(models.Department).options(*loader_options(DEPARTMENT_INCLUDES, include))
+    return paginate(query, models.Department, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=DEPARTMENT_SORTS)
 
-def get_departments(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Department).offset(skip).limit(limit).all()
+def get_departments_stats(db: Session, skip: int = 0, limit: int = 100,
+                          cursor: Optional[str] = None, sort: Optional[str] = None,
+                          summary: bool = True):
+    query = org_chart.stats_query(db, summary)
+    return paginate(query, models.Department, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=DEPARTMENT_SORTS)
+
+def get_department_stats(db: Session, department_id: int, summary: bool = True):
+    return org_chart.stats_query(db, summary, department_id).first()
 
 def update_department(db: Session, department_id: int, updated_data: schemas.DepartmentCreate):
-    department = db.query(models.Department).filter(models.Department.id == department_id).first()
-    if not department:
-        return None
-    update_fields = updated_data.dict(exclude_unset=True)
-    for field, value in update_fields.items():
-        setattr(department, field, value)
-    db.commit()
-    db.refresh(department)
+    department = _update_returning(db, models.Department, department_id,
+                                   updated_data.dict(exclude_unset=True))
+    if department is not None:
+        get_cache().delete(entity_key("department", department_id))
     return department
 
 def delete_department(db: Session, department_id: int):
@@ -77,37 +508,58 @@ def delete_department(db: Session, department_id: int):
     if department:
         db.delete(department)
         db.commit()
+        get_cache().delete(entity_key("department", department_id))
     return department
 
 
 # ---------- USER ----------
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = pwd_context.hash(user.password)
-    db_user = models.User(
-        username=user.username,
-        email=user.email,
-        password=hashed_password,
-        employee_id=user.employee_id,
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
-
-def update_user(db: Session, user_id: int, updated_data: schemas.UserUpdate):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        return None
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    # Асинхронный режим хеширует заранее, не блокируя event loop
+    if hashed_password is None:
+        hashed_password = get_hasher().hash(user.password)
+    return _insert_returning(db, models.User, {
+        "username": user.username,
+        "email": user.email,
+        "password": hashed_password,
+        "employee_id": user.employee_id,
+    })
+
+def get_user_by_username(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+def get_users(db: Session, skip: int = 0, limit: int = 100,
+              cursor: Optional[str] = None, sort: Optional[str] = None):
+    return paginate(db.query(models.User), models.User, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=USER_SORTS)
+
+def get_user_password(db: Session, user_id: int) -> Optional[str]:
+    """Хэш пароля пользователя; None — пользователя нет."""
+    return db.query(models.User.password).filter(models.User.id == user_id).scalar()
+
+def update_user(db: Session, user_id: int, updated_data: schemas.UserUpdate,
+                hashed_password: Optional[str] = None):
+    """
+    Меняет только переданные поля. hashed_password — хэш нового пароля, если его
+    уже посчитал вызывающий (crud_async: bcrypt вне потока БД). Иначе пароль
+    сверяется с текущим хэшем: тот же пароль не перехэшируется и не отзывает
+    токены, а новый хэшируется после проверки, что пользователь есть.
+    """
     update_fields = updated_data.dict(exclude_unset=True)
-    for field, value in update_fields.items():
-        if field == "password":
-            value = pwd_context.hash(value)
-        setattr(user, field, value)
-    db.commit()
-    db.refresh(user)
+    password = update_fields.pop("password", None)
+    if password is not None and hashed_password is None:
+        current = get_user_password(db, user_id)
+        if current is None:
+            return None
+        if not get_hasher().verify(password, current):
+            hashed_password = get_hasher().hash(password)
+    if hashed_password is not None:
+        update_fields["password"] = hashed_password
+    user = _update_returning(db, models.User, user_id, update_fields)
+    if user is not None:
+        auth.invalidate_principal(user_id)
+        if hashed_password is not None:
+            # Токены, выданные по прежнему паролю, больше не действуют
+            auth.get_revocations().revoke_user(user_id)
     return user
 
 def delete_user(db: Session, user_id: int):
@@ -115,30 +567,32 @@ def delete_user(db: Session, user_id: int):
     if user:
         db.delete(user)
         db.commit()
+        auth.invalidate_principal(user_id)
+        auth.get_revocations().revoke_user(user_id)
     return user
 
 
 # ---------- DOCUMENT ----------
 def create_document(db: Session, document: schemas.DocumentCreate):
-    db_document = models.Document(**document.dict())
-    db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
-    return db_document
+    return _insert_returning(db, models.Document, document.dict())
 
-def get_documents(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Document).offset(skip).limit(limit).all()
+def get_documents(db: Session, skip: int = 0, limit: int = 100,
+                  cursor: Optional[str] = None, sort: Optional[str] = None, filters=()):
+    query = DOCUMENT_FILTERS.apply(db.query(models.Document), filters)
+    return paginate(query, models.Document, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=DOCUMENT_SORTS)
+
+def get_document(db: Session, document_id: int):
+    return db.query(models.Document).filter(models.Document.id == document_id).first()
+
+def set_document_content(db: Session, document_id: int, blob, content_type: Optional[str]):
+    """blob — storage.Blob уже записанного файла."""
+    return _update_returning(db, models.Document, document_id, {
+        "content_sha256": blob.sha256, "content_size": blob.size, "content_type": content_type,
+    })
 
 def update_document(db: Session, document_id: int, updated_data: schemas.DocumentCreate):
-    document = db.query(models.Document).filter(models.Document.id == document_id).first()
-    if not document:
-        return None
-    update_fields = updated_data.dict(exclude_unset=True)
-    for field, value in update_fields.items():
-        setattr(document, field, value)
-    db.commit()
-    db.refresh(document)
-    return document
+    return _update_returning(db, models.Document, document_id, updated_data.dict(exclude_unset=True))
 
 def delete_document(db: Session, document_id: int):
     document = db.query(models.Document).filter(models.Document.id == document_id).first()
@@ -148,28 +602,53 @@ def delete_document(db: Session, document_id: int):
     return document
 
 
+def get_expiring_documents(db: Session, within_days: int, skip: int = 0, limit: int = 100,
+                           cursor: Optional[str] = None):
+    # Порядок всегда по сроку: ближайшие истечения первыми
+    return paginate(expiration.expiring_query(db, within_days), models.Document, skip=skip, limit=limit,
+                    cursor=cursor, sort="expiration_date", allowed_sorts=DOCUMENT_SORTS)
+
+
 # ---------- VACATION ----------
 def create_vacation(db: Session, vacation: schemas.VacationCreate):
-    db_vacation = models.Vacation(**vacation.dict())
-    db.add(db_vacation)
-    db.commit()
-    db.refresh(db_vacation)
-    return db_vacation
+    vacation_calendar.ensure_no_overlap(db, vacation.employee_id, vacation.start_date,
+                                        vacation.end_date, vacation.status)
+    return _insert_returning(db, models.Vacation, vacation.dict())
 
-def get_vacations(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Vacation).offset(skip).limit(limit).all()
+def get_vacations(db: Session, skip: int = 0, limit: int = 100,
+                  cursor: Optional[str] = None, sort: Optional[str] = None, filters=()):
+    query = VACATION_FILTERS.apply(db.query(models.Vacation), filters)
+    return paginate(query, models.Vacation, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=VACATION_SORTS)
 
 def update_vacation(db: Session, vacation_id: int, updated_data: schemas.VacationCreate):
-    vacation = db.query(models.Vacation).filter(models.Vacation.id == vacation_id).first()
-    if not vacation:
+    # Сначала UPDATE ... RETURNING, затем проверка пересечений по итоговому периоду
+    # в той же транзакции: при конфликте откатываем
+    vacation = _update_returning(db, models.Vacation, vacation_id,
+                                 updated_data.dict(exclude_unset=True), commit=False)
+    if vacation is None:
         return None
-    update_fields = updated_data.dict(exclude_unset=True)
-    for field, value in update_fields.items():
-        setattr(vacation, field, value)
+    try:
+        vacation_calendar.ensure_no_overlap(db, vacation.employee_id, vacation.start_date,
+                                            vacation.end_date, vacation.status, exclude_id=vacation_id)
+    except (vacation_calendar.InvalidPeriod, vacation_calendar.VacationConflict):
+        db.rollback()
+        raise
     db.commit()
-    db.refresh(vacation)
     return vacation
 
+def get_vacation_calendar(db: Session, date_from: date, date_to: date,
+                          department_id: Optional[int] = None, status: Optional[str] = None,
+                          skip: int = 0, limit: int = 100,
+                          cursor: Optional[str] = None, sort: Optional[str] = None):
+    query = vacation_calendar.calendar_query(db, date_from, date_to, department_id, status)
+    return paginate(query, models.Vacation, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=VACATION_SORTS)
+
+def get_vacation_headcount(db: Session, date_from: date, date_to: date,
+                           department_id: Optional[int] = None, status: Optional[str] = None):
+    return vacation_calendar.absence_by_day(db, date_from, date_to, department_id, status)
+
 def delete_vacation(db: Session, vacation_id: int):
     vacation = db.query(models.Vacation).filter(models.Vacation.id == vacation_id).first()
     if vacation:
@@ -179,40 +658,121 @@ def delete_vacation(db: Session, vacation_id: int):
 
 
 # ---------- ROLE ----------
-def create_role(db: Session, role: schemas.RoleCreate):
-    employee_objs = db.query(models.Employee).filter(models.Employee.id.in_(role.employee_ids)).all()
-    db_role = models.Role(
-        role_type=role.role_type,
-        start_date=role.start_date,
-        end_date=role.end_date,
-        status=role.status,
-        employees=employee_objs,
+# Состав роли пишется разницей: в employee_roles уходят только недостающие или
+# лишние пары, объекты Employee не загружаются. Неизвестные id сотрудников
+# отсеиваются тем же SELECT, что находит текущих участников.
+def _role_values(role: schemas.RoleCreate) -> dict:
+    return role.model_dump(exclude={"employee_ids"})
+
+def _membership(db: Session, role_id: int, employee_ids) -> dict:
+    """{id: уже в роли} для тех employee_ids, что есть в employees."""
+    roles = models.employee_roles.c
+    query = (
+        db.query(models.Employee.id, roles.role_id)
+        .outerjoin(models.employee_roles, and_(roles.employee_id == models.Employee.id, roles.role_id == role_id))
+        .filter(models.Employee.id.in_(employee_ids))
     )
-    db.add(db_role)
+    return {employee_id: member is not None for employee_id, member in query}
+
+def _add_members(db: Session, role_id: int, employee_ids, chunk_size: int = BULK_CHUNK_SIZE):
+    """Возвращает (добавлено пар, id несуществующих сотрудников). Без commit."""
+    added, missing = 0, []
+    for chunk in _chunks(employee_ids, chunk_size):
+        membership = _membership(db, role_id, chunk)
+        missing.extend(employee_id for employee_id in chunk if employee_id not in membership)
+        rows = [{"employee_id": employee_id, "role_id": role_id}
+                for employee_id in chunk if membership.get(employee_id) is False]
+        if rows:
+            db.execute(insert(models.employee_roles), rows)
+            added += len(rows)
+    return added, missing
+
+def _remove_members(db: Session, role_id: int, employee_ids, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    roles = models.employee_roles.c
+    removed = 0
+    for chunk in _chunks(employee_ids, chunk_size):
+        removed += db.execute(
+            delete(models.employee_roles).where(roles.role_id == role_id, roles.employee_id.in_(chunk))
+        ).rowcount
+    return removed
+
+def create_role(db: Session, role: schemas.RoleCreate):
+    db_role = _insert_returning(db, models.Role, _role_values(role), commit=False)
+    _add_members(db, db_role.id, list(dict.fromkeys(role.employee_ids)))
     db.commit()
-    db.refresh(db_role)
     return db_role
 
-def get_roles(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Role).offset(skip).limit(limit).all()
+def get_role(db: Session, role_id: int, include=()):
+    return (
+        db.query(models.Role)
+        .options(*loader_options(ROLE_INCLUDES, include))
+        .filter(models.Role.id == role_id)
+        .first()
+    )
+
+def get_roles(db: Session, skip: int = 0, limit: int = 100,
+              cursor: Optional[str] = None, sort: Optional[str] = None, include=()):
+    query = db.query(models.Role).options(*loader_options(ROLE_INCLUDES, include))
+    return paginate(query, models.Role, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=ROLE_SORTS)
 
 def update_role(db: Session, role_id: int, updated_data: schemas.RoleCreate):
-    role = db.query(models.Role).filter(models.Role.id == role_id).first()
-    if not role:
+    """Полная замена: поля роли и состав ровно по employee_ids (неизвестные id пропускаются)."""
+    role = _update_returning(db, models.Role, role_id, _role_values(updated_data), commit=False)
+    if role is None:
         return None
-    role.role_type = updated_data.role_type
-    role.start_date = updated_data.start_date
-    role.end_date = updated_data.end_date
-    role.status = updated_data.status
-    employee_objs = db.query(models.Employee).filter(models.Employee.id.in_(updated_data.employee_ids)).all()
-    role.employees = employee_objs
+    wanted = set(updated_data.employee_ids)
+    current = {employee_id for (employee_id,) in db.query(models.employee_roles.c.employee_id)
+               .filter(models.employee_roles.c.role_id == role_id)}
+    _remove_members(db, role_id, sorted(current - wanted))
+    _add_members(db, role_id, sorted(wanted - current))
     db.commit()
-    db.refresh(role)
     return role
 
+def add_role_members(db: Session, role_id: int, employee_ids) -> Optional[schemas.RoleMembersResult]:
+    if db.query(models.Role.id).filter(models.Role.id == role_id).first() is None:
+        return None
+    employee_ids = list(dict.fromkeys(employee_ids))
+    added, missing = _add_members(db, role_id, employee_ids)
+    db.commit()
+    return schemas.RoleMembersResult(requested=len(employee_ids), changed=added, missing_ids=missing)
+
+def remove_role_members(db: Session, role_id: int, employee_ids) -> Optional[schemas.RoleMembersResult]:
+    if db.query(models.Role.id).filter(models.Role.id == role_id).first() is None:
+        return None
+    employee_ids = list(dict.fromkeys(employee_ids))
+    removed = _remove_members(db, role_id, employee_ids)
+    db.commit()
+    return schemas.RoleMembersResult(requested=len(employee_ids), changed=removed)
+
+def get_role_members(db: Session, role_id: int, skip: int = 0, limit: int = 100,
+                     cursor: Optional[str] = None, sort: Optional[str] = None):
+    return paginate(role_members_query(db, role_id), models.Employee, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=EMPLOYEE_SORTS)
+
+def role_members_query(db: Session, role_id: int):
+    members = (
+        db.query(models.employee_roles.c.employee_id)
+        .filter(models.employee_roles.c.role_id == role_id)
+    )
+    return db.query(models.Employee).filter(models.Employee.id.in_(members.scalar_subquery()))
+
 def delete_role(db: Session, role_id: int):
     role = db.query(models.Role).filter(models.Role.id == role_id).first()
     if role:
-        db.delete(role)
+        # db.delete(role) загрузил бы всех участников ради очистки employee_roles;
+        # её делает ON DELETE CASCADE, а где внешние ключи не проверяются — отдельный DELETE
+        if not _foreign_keys_enforced(db):
+            db.execute(delete(models.employee_roles).where(models.employee_roles.c.role_id == role_id))
+        db.execute(delete(models.Role).where(models.Role.id == role_id))
         db.commit()
     return role
+
+# ---------- HISTORY ----------
+def get_history(db: Session, entity: str, entity_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """Журнал изменений сущности, новые первыми: keyset по убыванию id (ix_audit_log_entity)."""
+    query = db.query(models.AuditLog).filter(models.AuditLog.entity == entity,
+                                             models.AuditLog.entity_id == entity_id)
+    if cursor:
+        query = query.filter(models.AuditLog.id < decode_cursor(cursor)["id"])
+    return query.order_by(models.AuditLog.id.desc()).limit(limit).all()
@@ -0,0 +1,174 @@
+from typing import Optional
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+import crud
+import schemas
+from hashing import get_hasher
+import serialization
+
+# Асинхронные варианты функций crud.py. Запросы выполняются через
+# AsyncSession.run_sync: логика общая с синхронным режимом, а ожидание
+# БД не занимает поток из пула Starlette.
+
+
+# ---------- EMPLOYEE ----------
+async def create_employee(db: AsyncSession, employee: schemas.EmployeeCreate):
+    return await db.run_sync(crud.create_employee, employee)
+
+async def get_employees(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_employees, **params)
+
+async def get_employee(db: AsyncSession, employee_id: int, include=()):
+    return await db.run_sync(crud.get_employee, employee_id, include=include)
+
+async def get_employee_cached(db: AsyncSession, employee_id: int, version: Optional[str] = None):
+    return await db.run_sync(crud.get_employee_cached, employee_id, version)
+
+async def search_employees(db: AsyncSession, query: str, limit: int = 20):
+    return await db.run_sync(crud.search_employees, query, limit=limit)
+
+async def update_employee(db: AsyncSession, employee_id: int, updated_data: schemas.EmployeeUpdate):
+    return await db.run_sync(crud.update_employee, employee_id, updated_data)
+
+async def delete_employee(db: AsyncSession, employee_id: int):
+    return await db.run_sync(crud.delete_employee, employee_id)
+
+async def get_reports(db: AsyncSession, manager_id: int, **params):
+    return await db.run_sync(crud.get_reports, manager_id, **params)
+
+
+# ---------- DEPARTMENT ----------
+async def create_department(db: AsyncSession, department: schemas.DepartmentCreate):
+    return await db.run_sync(crud.create_department, department)
+
+async def get_department(db: AsyncSession, department_id: int, include=()):
+    return await db.run_sync(crud.get_department, department_id, include=include)
+
+async def get_department_cached(db: AsyncSession, department_id: int, version: Optional[str] = None):
+    return await db.run_sync(crud.get_department_cached, department_id, version)
+
+async def get_departments(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_departments, **params)
+
+async def get_departments_stats(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_departments_stats, **params)
+
+async def get_department_stats(db: AsyncSession, department_id: int, summary: bool = True):
+    return await db.run_sync(crud.get_department_stats, department_id, summary)
+
+async def update_department(db: AsyncSession, department_id: int, updated_data: schemas.DepartmentCreate):
+    return await db.run_sync(crud.update_department, department_id, updated_data)
+
+async def delete_department(db: AsyncSession, department_id: int):
+    return await db.run_sync(crud.delete_department, department_id)
+
+
+# ---------- USER ----------
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    hashed_password = await get_hasher().hash_async(user.password)
+    return await db.run_sync(crud.create_user, user, hashed_password)
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.run_sync(crud.get_user_by_username, username)
+
+async def get_users(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_users, **params)
+
+async def update_user(db: AsyncSession, user_id: int, updated_data: schemas.UserUpdate):
+    # bcrypt — в пуле hashing.py вне потока БД; пользователя проверяем до него
+    hashed_password = None
+    if updated_data.password is not None:
+        current = await db.run_sync(crud.get_user_password, user_id)
+        if current is None:
+            return None
+        if await get_hasher().verify_async(updated_data.password, current):
+            # Тот же пароль: не перехэшировать и не отзывать токены
+            updated_data = schemas.UserUpdate(**updated_data.dict(exclude_unset=True, exclude={"password"}))
+        else:
+            hashed_password = await get_hasher().hash_async(updated_data.password)
+    return await db.run_sync(crud.update_user, user_id, updated_data, hashed_password)
+
+async def delete_user(db: AsyncSession, user_id: int):
+    return await db.run_sync(crud.delete_user, user_id)
+
+
+# ---------- DOCUMENT ----------
+async def create_document(db: AsyncSession, document: schemas.DocumentCreate):
+    return await db.run_sync(crud.create_document, document)
+
+async def get_documents(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_documents, **params)
+
+async def get_expiring_documents(db: AsyncSession, within_days: int, **params):
+    return await db.run_sync(crud.get_expiring_documents, within_days, **params)
+
+async def get_document(db: AsyncSession, document_id: int):
+    return await db.run_sync(crud.get_document, document_id)
+
+async def set_document_content(db: AsyncSession, document_id: int, blob, content_type: Optional[str]):
+    return await db.run_sync(crud.set_document_content, document_id, blob, content_type)
+
+async def update_document(db: AsyncSession, document_id: int, updated_data: schemas.DocumentCreate):
+    return await db.run_sync(crud.update_document, document_id, updated_data)
+
+async def delete_document(db: AsyncSession, document_id: int):
+    return await db.run_sync(crud.delete_document, document_id)
+
+
+# ---------- VACATION ----------
+async def create_vacation(db: AsyncSession, vacation: schemas.VacationCreate):
+    return await db.run_sync(crud.create_vacation, vacation)
+
+async def get_vacations(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_vacations, **params)
+
+async def update_vacation(db: AsyncSession, vacation_id: int, updated_data: schemas.VacationCreate):
+    return await db.run_sync(crud.update_vacation, vacation_id, updated_data)
+
+async def get_vacation_calendar(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_vacation_calendar, **params)
+
+async def get_vacation_headcount(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_vacation_headcount, **params)
+
+async def delete_vacation(db: AsyncSession, vacation_id: int):
+    return await db.run_sync(crud.delete_vacation, vacation_id)
+
+
+# ---------- ROLE ----------
+async def create_role(db: AsyncSession, role: schemas.RoleCreate):
+    return await db.run_sync(crud.create_role, role)
+
+async def get_role(db: AsyncSession, role_id: int, include=()):
+    return await db.run_sync(crud.get_role, role_id, include)
+
+async def get_roles(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_roles, **params)
+
+async def update_role(db: AsyncSession, role_id: int, updated_data: schemas.RoleCreate):
+    return await db.run_sync(crud.update_role, role_id, updated_data)
+
+async def delete_role(db: AsyncSession, role_id: int):
+    return await db.run_sync(crud.delete_role, role_id)
+
+async def add_role_members(db: AsyncSession, role_id: int, employee_ids):
+    return await db.run_sync(crud.add_role_members, role_id, employee_ids)
+
+async def remove_role_members(db: AsyncSession, role_id: int, employee_ids):
+    return await db.run_sync(crud.remove_role_members, role_id, employee_ids)
+
+async def get_role_members(db: AsyncSession, role_id: int, **params):
+    return await db.run_sync(crud.get_role_members, role_id, **params)
+
+
+# ---------- FAST SERIALIZATION ----------
+async def page_response(db: AsyncSession, response: Response, projection, **params):
+    return await db.run_sync(serialization.page_response, response, projection, **params)
+
+async def calendar_page_response(db: AsyncSession, response: Response, *args, **params):
+    return await db.run_sync(serialization.calendar_page_response, response, *args, **params)
+
+
+# ---------- HISTORY ----------
+async def get_history(db: AsyncSession, entity: str, entity_id: int, **params):
+    return await db.run_sync(crud.get_history, entity, entity_id, **params)
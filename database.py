@@ -1,12 +1,152 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DisconnectionError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config import settings
+import metrics
+
+# ---------- POOL ----------
+# Пул на каждый воркер: при N воркерах uvicorn к БД открывается до
+# N * (db_pool_size + db_max_overflow) соединений — держать ниже max_connections.
+PRE_PING_POLICIES = ("always", "idle", "never")
+
+
+def pool_options(**overrides) -> dict:
+    if settings.db_pool_pre_ping not in PRE_PING_POLICIES:
+        raise ValueError(f"db_pool_pre_ping must be one of {', '.join(PRE_PING_POLICIES)}")
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        # LIFO: лишние соединения простаивают и закрываются по recycle, а не крутятся по кругу
+        "pool_use_lifo": True,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+    options.update(overrides)
+    return options
+
+
+def ping_idle_connections(engine, idle_seconds: float):
+    """
+    Pre-ping только для соединений, простоявших в пуле дольше idle_seconds:
+    под нагрузкой соединения возвращаются быстро и лишний SELECT 1 не нужен.
+    """
+    dialect = engine.dialect
+
+    @event.listens_for(engine, "checkin")
+    def remember_checkin(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def ping_if_idle(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as exc:
+            # Пул закроет соединение и повторит checkout с новым
+            raise DisconnectionError("Connection failed idle pre-ping") from exc
+
+
+def make_engine(url: str, **overrides):
+    engine = create_engine(
+        url,
+        poolclass=metrics.TimedQueuePool if settings.metrics_enabled else None,
+        **pool_options(**overrides),
+    )
+    if settings.db_pool_pre_ping == "idle":
+        ping_idle_connections(engine, settings.db_pool_ping_idle_seconds)
+    if settings.metrics_enabled:
+        metrics.instrument_engine(engine)
+    return engine
+
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=3600
+engine = make_engine(settings.database_url)
+# expire_on_commit=False: записанный объект (INSERT/UPDATE ... RETURNING в crud.py)
+# отдаётся в ответ как есть, без SELECT на каждый атрибут после commit
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Реплика для чтения: GET-маршруты и выгрузки. Без неё читаем с основной базы.
+# Реплика отстаёт, поэтому чтение-перед-записью (update_*, delete_*) идёт в основную.
+replica_engine = make_engine(settings.database_replica_url) if settings.database_replica_url else engine
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica_engine)
+    if replica_engine is not engine else SessionLocal
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def pool_stats() -> dict:
+    engines = {"primary": engine}
+    if replica_engine is not engine:
+        engines["replica"] = replica_engine
+    if async_engine is not None:
+        engines["async_primary"] = async_engine.sync_engine
+    if async_replica_engine is not None and async_replica_engine is not async_engine:
+        engines["async_replica"] = async_replica_engine.sync_engine
+    return {name: _pool_state(bound.pool) for name, bound in engines.items()}
+
+
+def _pool_state(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+
+# ---------- ASYNC ----------
+# Асинхронные драйверы для синхронных URL из DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+    "mysql": "aiomysql",
+}
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+async_engine = None
+async_replica_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+if settings.async_db:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    def make_async_engine(url: str):
+        created = create_async_engine(
+            url,
+            poolclass=metrics.TimedAsyncQueuePool if settings.metrics_enabled else None,
+            **pool_options(),
+        )
+        if settings.db_pool_pre_ping == "idle":
+            ping_idle_connections(created.sync_engine, settings.db_pool_ping_idle_seconds)
+        if settings.metrics_enabled:
+            metrics.instrument_engine(created.sync_engine)
+        return created
+
+    async_engine = make_async_engine(settings.async_database_url or async_database_url(settings.database_url))
+    async_replica_engine = (
+        make_async_engine(async_database_url(settings.database_replica_url))
+        if settings.database_replica_url else async_engine
+    )
+    # expire_on_commit=False: после commit атрибуты нельзя догружать вне greenlet
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = (
+        async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+        if async_replica_engine is not async_engine else AsyncSessionLocal
+    )
@@ -0,0 +1,169 @@
+"""
+Сканер истекающих документов: пишет уведомления в document_notifications.
+
+    python -m expiration            # проход раз в --interval секунд
+    python -m expiration --once     # один проход (cron)
+
+Окна (EXPIRATION_WINDOWS_DAYS, по умолчанию 7, 30, 90) делят будущее на
+непересекающиеся диапазоны expiration_date: [сегодня, +7], (+7, +30],
+(+30, +90]; документ получает уведомление самого узкого окна, в которое попал.
+Диапазон читается по индексу ix_documents_expiration_date пачками с keyset по
+(expiration_date, id), каждая пачка — своя короткая транзакция. Повторный или
+прерванный проход безопасен: уже записанные уведомления отсекает уникальный ключ.
+
+В приложении тот же проход запускается фоновой задачей, если
+EXPIRATION_SCAN_INTERVAL_SECONDS > 0: он идёт в потоке (asyncio.to_thread) и
+цикл событий не занимает. При нескольких воркерах каждый сканирует сам —
+результат тот же, но работа повторяется; тогда лучше отдельный процесс.
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+import models
+
+logger = logging.getLogger("expiration")
+
+# INSERT ... ON CONFLICT DO NOTHING есть в обеих СУБД, но строится диалектом
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def expiring_query(db: Session, within_days: int, today: Optional[date] = None):
+    """Документы, истекающие с сегодняшнего дня по today + within_days включительно."""
+    today = today or date.today()
+    return db.query(models.Document).filter(
+        models.Document.expiration_date >= today,
+        models.Document.expiration_date <= today + timedelta(days=within_days),
+    )
+
+
+def window_ranges(windows, today: date) -> list:
+    """(окно, первый день, последний день) для каждого окна по возрастанию."""
+    ranges, first_day = [], today
+    for days in sorted(set(windows)):
+        last_day = today + timedelta(days=days)
+        ranges.append((days, first_day, last_day))
+        first_day = last_day + timedelta(days=1)
+    return ranges
+
+
+def scan_batch(db: Session, window_days: int, first_day: date, last_day: date,
+               after: Optional[tuple] = None, batch_size: int = 1000) -> tuple:
+    """
+    Одна пачка окна после ключа after. Возвращает (ключ последнего документа
+    или None, документов в пачке, новых уведомлений) и фиксирует транзакцию.
+    """
+    document = models.Document
+    query = select(document.id, document.employee_id, document.document_type, document.expiration_date).where(
+        document.expiration_date >= first_day, document.expiration_date <= last_day
+    )
+    if after is not None:
+        query = query.where(tuple_(document.expiration_date, document.id) > tuple_(*after))
+    rows = db.execute(query.order_by(document.expiration_date, document.id).limit(batch_size)).all()
+    if not rows:
+        return None, 0, 0
+    now = datetime.utcnow()
+    values = [
+        {
+            "document_id": row.id,
+            "employee_id": row.employee_id,
+            "document_type": row.document_type.value,
+            "expiration_date": row.expiration_date,
+            "window_days": window_days,
+            "created_at": now,
+        }
+        for row in rows
+    ]
+    # executemany с RETURNING: оператор компилируется один раз и кэшируется,
+    # SQLAlchemy склеивает строки в многострочные INSERT; RETURNING отдаёт только
+    # вставленные строки — пропущенные по уникальному ключу не считаются
+    statement = (
+        _INSERTS[db.get_bind().dialect.name](models.DocumentNotification)
+        .on_conflict_do_nothing()
+        .returning(models.DocumentNotification.id)
+    )
+    created = len(db.execute(statement, values).all())
+    db.commit()
+    last = rows[-1]
+    return (last.expiration_date, last.id), len(rows), created
+
+
+def scan(session_factory, windows, batch_size: int = 1000, today: Optional[date] = None,
+         stop: Optional[threading.Event] = None) -> dict:
+    """Полный проход по всем окнам; stop прерывает его между пачками."""
+    today = today or date.today()
+    result = {"documents": 0, "notifications": 0, "batches": 0}
+    started = time.perf_counter()
+    for window_days, first_day, last_day in window_ranges(windows, today):
+        after = None
+        while stop is None or not stop.is_set():
+            # Сессия на пачку: соединение возвращается в пул между пачками
+            with session_factory() as db:
+                after, documents, created = scan_batch(db, window_days, first_day, last_day, after, batch_size)
+            result["documents"] += documents
+            result["notifications"] += created
+            result["batches"] += documents > 0
+            if documents < batch_size:
+                break
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("Document expiration scan: %s", result)
+    return result
+
+
+class BackgroundScanner:
+    """Фоновая задача приложения: проход раз в interval секунд."""
+
+    def __init__(self, session_factory, windows, batch_size: int, interval: float):
+        self.session_factory = session_factory
+        self.windows = windows
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.to_thread(scan, self.session_factory, self.windows,
+                                        self.batch_size, stop=self._stop)
+            except Exception:
+                logger.exception("Document expiration scan failed")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        # Поток прохода отмену не видит — остановится после текущей пачки
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def main():
+    from config import settings
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--interval", type=float, default=settings.expiration_scan_interval_seconds or 3600)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        scan(SessionLocal, settings.expiration_windows_days, settings.expiration_batch_size)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import select
+import models
+from database import ReadSessionLocal
+
+# Потоковая выгрузка: строки читаются пачками через yield_per (на PostgreSQL —
+# серверный курсор) и сериализуются по пачке, без списков ORM-объектов и
+# без валидации Pydantic. Память не растёт с размером таблицы.
+
+EXPORT_BATCH_SIZE = 2000
+
+EMPLOYEE_COLUMNS = (
+    models.Employee.id, models.Employee.employee_code, models.Employee.last_name,
+    models.Employee.first_name, models.Employee.position, models.Employee.hire_date,
+    models.Employee.salary, models.Employee.status, models.Employee.department_id,
+)
+VACATION_COLUMNS = (
+    models.Vacation.id, models.Vacation.employee_id, models.Vacation.start_date,
+    models.Vacation.end_date, models.Vacation.vacation_type, models.Vacation.status,
+    models.Vacation.notes,
+)
+DOCUMENT_COLUMNS = (
+    models.Document.id, models.Document.employee_id, models.Document.document_type,
+    models.Document.file_path, models.Document.expiration_date, models.Document.upload_date,
+)
+
+
+# ---------- QUERIES ----------
+def employees_query(department_id: Optional[int] = None, status: Optional[str] = None,
+                    hired_from: Optional[date] = None, hired_to: Optional[date] = None):
+    query = select(*EMPLOYEE_COLUMNS)
+    if department_id is not None:
+        query = query.where(models.Employee.department_id == department_id)
+    if status is not None:
+        query = query.where(models.Employee.status == status)
+    if hired_from is not None:
+        query = query.where(models.Employee.hire_date >= hired_from)
+    if hired_to is not None:
+        query = query.where(models.Employee.hire_date <= hired_to)
+    return query.order_by(models.Employee.id)
+
+
+def vacations_query(department_id: Optional[int] = None, status: Optional[str] = None,
+                    vacation_type: Optional[str] = None,
+                    date_from: Optional[date] = None, date_to: Optional[date] = None):
+    query = select(*VACATION_COLUMNS)
+    if department_id is not None:
+        query = query.join(models.Employee, models.Employee.id == models.Vacation.employee_id).where(
+            models.Employee.department_id == department_id
+        )
+    if status is not None:
+        query = query.where(models.Vacation.status == status)
+    if vacation_type is not None:
+        query = query.where(models.Vacation.vacation_type == vacation_type)
+    # Отпуска, пересекающиеся с периодом [date_from, date_to]
+    if date_from is not None:
+        query = query.where(models.Vacation.end_date >= date_from)
+    if date_to is not None:
+        query = query.where(models.Vacation.start_date <= date_to)
+    return query.order_by(models.Vacation.id)
+
+
+def documents_query(department_id: Optional[int] = None, document_type: Optional[str] = None,
+                    expires_before: Optional[date] = None):
+    query = select(*DOCUMENT_COLUMNS)
+    if department_id is not None:
+        query = query.join(models.Employee, models.Employee.id == models.Document.employee_id).where(
+            models.Employee.department_id == department_id
+        )
+    if document_type is not None:
+        query = query.where(models.Document.document_type == document_type)
+    if expires_before is not None:
+        query = query.where(models.Document.expiration_date <= expires_before)
+    return query.order_by(models.Document.id)
+
+
+# ---------- SERIALIZATION ----------
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _batches(query, batch_size: int):
+    # Своя сессия (на реплике, если есть): генератор живёт дольше, чем Depends(get_db)
+    with ReadSessionLocal() as db:
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield partition
+
+
+def stream_ndjson(query, batch_size: int = EXPORT_BATCH_SIZE):
+    for partition in _batches(query, batch_size):
+        yield "".join(
+            json.dumps({key: _plain(value) for key, value in row._mapping.items()}, ensure_ascii=False) + "\n"
+            for row in partition
+        )
+
+
+def stream_csv(query, batch_size: int = EXPORT_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in query.selected_columns])
+    for partition in _batches(query, batch_size):
+        writer.writerows([_plain(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+STREAMS = {"ndjson": stream_ndjson, "csv": stream_csv}
@@ -0,0 +1,95 @@
+"""
+Фильтры списков: ?status=active&salary__gte=1000&department_id__in=1,2.
+
+Параметр — поле или поле__оператор. Поля и операторы — белый список ресурса
+(EMPLOYEE_FILTERS и др.): колонка берётся из models, тип значения — из
+аннотации поля схемы ответа. Каждое разрешённое поле покрыто индексом,
+это проверяет benchmarks.index_audit: фильтр без индекса его не пройдёт.
+Сортировка — прежний ?sort= (pagination.py) со своим белым списком.
+"""
+from typing import Any, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+import models
+import schemas
+
+EXACT = ("eq", "in")
+RANGE = ("eq", "gt", "gte", "lt", "lte")
+RANGE_ONLY = frozenset(("gt", "gte", "lt", "lte"))
+
+# Значений в одном __in: IN-список больше этого — уже не фильтр страницы
+MAX_IN_VALUES = 100
+
+_OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "in": lambda column, value: column.in_(value),
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+}
+
+
+class FilterSet:
+    """Разрешённые фильтры ресурса: {поле: операторы}."""
+
+    def __init__(self, model, schema, **fields):
+        self.model = model
+        self.fields = {}
+        for name, operators in fields.items():
+            annotation = schema.model_fields[name].annotation
+            self.fields[name] = (getattr(model, name), TypeAdapter(annotation), operators)
+        self.columns = frozenset(model.__table__.columns.keys())
+
+    def parse(self, params) -> Tuple[Tuple[str, str, Any], ...]:
+        """Пары запроса -> ((поле, оператор, значение), ...). Прочие параметры пропускаются."""
+        conditions = []
+        for key, raw in params:
+            name, separator, operator = key.partition("__")
+            if name not in self.fields:
+                # Колонка без индекса или поле__оператор у чужого поля — ошибка, а не молчаливый пропуск
+                if separator or name in self.columns:
+                    raise HTTPException(status_code=400, detail=(
+                        f"Filtering by '{name}' is not supported. Allowed: {', '.join(self.fields)}"))
+                continue
+            _, adapter, operators = self.fields[name]
+            operator = operator or "eq"
+            if operator not in operators:
+                raise HTTPException(status_code=400, detail=(
+                    f"Operator '{operator}' is not supported for '{name}'. Allowed: {', '.join(operators)}"))
+            try:
+                if operator == "in":
+                    values = [value.strip() for value in raw.split(",") if value.strip()]
+                    if not values or len(values) > MAX_IN_VALUES:
+                        raise HTTPException(status_code=400, detail=(
+                            f"'{key}' takes 1 to {MAX_IN_VALUES} comma-separated values"))
+                    value = tuple(adapter.validate_strings(value) for value in values)
+                else:
+                    value = adapter.validate_strings(raw)
+            except ValidationError:
+                raise HTTPException(status_code=400, detail=f"Invalid value for '{key}': {raw!r}")
+            if value is None:
+                raise HTTPException(status_code=400, detail=f"Invalid value for '{key}': {raw!r}")
+            conditions.append((name, operator, value))
+        return tuple(conditions)
+
+    def apply(self, query, conditions):
+        for name, operator, value in conditions:
+            query = query.filter(_OPERATORS[operator](self.fields[name][0], value))
+        return query
+
+
+EMPLOYEE_FILTERS = FilterSet(models.Employee, schemas.Employee,
+                             status=EXACT, department_id=EXACT, salary=RANGE, hire_date=RANGE)
+DOCUMENT_FILTERS = FilterSet(models.Document, schemas.Document,
+                             document_type=EXACT, employee_id=EXACT, expiration_date=RANGE)
+VACATION_FILTERS = FilterSet(models.Vacation, schemas.Vacation,
+                             status=EXACT, vacation_type=EXACT, employee_id=EXACT)
+
+
+def filter_param(allowed: FilterSet):
+    """Dependency: фильтры из строки запроса. async — без похода в пул потоков."""
+    async def dependency(request: Request) -> Tuple[Tuple[str, str, Any], ...]:
+        return allowed.parse(request.query_params.multi_items())
+    return dependency
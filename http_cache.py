@@ -0,0 +1,236 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, object_mapper
+import models
+
+# Условные GET: ETag и Last-Modified строятся из счётчиков версий таблиц
+# (table_versions). Проверка идёт до чтения данных: совпал If-None-Match —
+# ответ 304 после одного SELECT по первичному ключу table_versions, без
+# запроса строк и сериализации.
+#
+# PostgreSQL: счётчики поднимает приложение сразу после commit записи,
+# отдельной короткой командой в autocommit (см. WRITES ниже), а не триггеры
+# в транзакции писателя: строка table_versions блокируется на время одного
+# UPDATE, а не всей транзакции, и писатели одной таблицы друг друга не ждут.
+# Версия растёт чуть позже, чем становятся видны данные: If-None-Match в этом
+# промежутке ещё получает 304, как если бы запрос пришёл до записи. Сам
+# писатель ответ получает уже после подъёма версии. Запись в обход сессий
+# приложения (SQL руками, миграции данных) версию не поднимает — после неё
+# вызвать bump_versions().
+#
+# SQLite: счётчики по-прежнему поднимают триггеры миграции 0003 — писатель
+# там один на базу, а отдельная транзакция стоила бы лишнего fsync на запись.
+
+logger = logging.getLogger("http_cache")
+
+# Поднять при изменении формата ответов, чтобы клиенты не держали старые ETag
+REPRESENTATION_VERSION = 1
+
+# Cache-Control по умолчанию: хранить можно, но перед использованием сверять ETag
+REVALIDATE = "private, no-cache"
+
+# Таблицы, от которых зависит ответ маршрута, с учётом ?include=
+EMPLOYEE_TABLES = ("employees", "departments", "documents", "vacations")
+DEPARTMENT_TABLES = ("departments", "employees")
+ROLE_TABLES = ("roles", "employee_roles", "employees")
+DOCUMENT_TABLES = ("documents",)
+# Фильтр календаря по отделу соединяет отпуска с сотрудниками
+VACATION_TABLES = ("vacations", "employees")
+
+# Таблицы со строкой в table_versions (миграция 0003)
+VERSIONED_TABLES = frozenset(("employees", "departments", "users", "documents", "vacations", "roles",
+                              "employee_roles"))
+
+
+# ---------- WRITES ----------
+# Сессия собирает имена таблиц, в которые писала: DML-команды db.execute
+# (do_orm_execute) и unit of work (after_flush). Удаление задевает и таблицы,
+# которые ссылаются на удаляемую (ON DELETE, обнуление ссылок в ORM). Commit
+# точки сохранения список не отдаёт, откат транзакции его выбрасывает; после
+# конца корневой транзакции, когда соединение уже вернулось в пул, версии
+# поднимает bump_versions().
+
+_DEPENDENTS: Optional[dict] = None
+
+
+def _dependents() -> dict:
+    """{таблица: таблицы, которые меняет удаление её строк}."""
+    global _DEPENDENTS
+    if _DEPENDENTS is None:
+        direct, cascade = {}, {}
+        for table in models.Base.metadata.tables.values():
+            for fk in table.foreign_keys:
+                referred = fk.column.table.name
+                direct.setdefault(referred, set()).add(table.name)
+                if fk.ondelete and fk.ondelete.upper() == "CASCADE":
+                    cascade.setdefault(referred, set()).add(table.name)
+        dependents = {}
+        for name in direct:
+            found, pending = set(), [name]
+            while pending:
+                current = pending.pop()
+                for child in direct.get(current, ()):
+                    if child not in found:
+                        found.add(child)
+                        if child in cascade.get(current, ()):
+                            pending.append(child)
+            dependents[name] = found
+        _DEPENDENTS = dependents
+    return _DEPENDENTS
+
+
+def _mark(session: Session, table: str, deleted: bool = False):
+    written = session.info.setdefault("written_tables", set())
+    written.add(table)
+    if deleted:
+        written.update(_dependents().get(table, ()))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        _mark(state.session, state.statement.table.name, deleted=state.is_delete)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in session.new:
+        _mark(session, object_mapper(obj).local_table.name)
+    for obj in session.deleted:
+        _mark(session, object_mapper(obj).local_table.name, deleted=True)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            state = inspect(obj)
+            _mark(session, state.mapper.local_table.name)
+            for relationship in state.mapper.relationships:
+                if relationship.secondary is not None and state.attrs[relationship.key].history.has_changes():
+                    _mark(session, relationship.secondary.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.in_nested_transaction():
+        return
+    written = session.info.pop("written_tables", None)
+    if written:
+        session.info["committed_tables"] = written
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    if not session.in_nested_transaction():
+        session.info.pop("written_tables", None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    if transaction.parent is not None:
+        return
+    committed = session.info.pop("committed_tables", None)
+    if not committed:
+        return
+    bind = session.get_bind()
+    if bind.dialect.name == "sqlite":
+        return  # триггеры 0003
+    try:
+        bump_versions(bind, committed)
+    except Exception:
+        # Данные уже зафиксированы; без новой версии клиент получит прежний
+        # ETag до следующей записи в таблицу
+        logger.exception("Failed to bump table versions for %s", sorted(committed))
+
+
+def bump_versions(bind, tables):
+    """
+    Поднимает версии таблиц одной командой вне транзакции записи (autocommit).
+    Строки table_versions блокируются в порядке имени таблицы.
+    """
+    tables = sorted(VERSIONED_TABLES.intersection(tables))
+    if not tables:
+        return
+    version = models.TableVersion
+    locked = (
+        select(version.table_name)
+        .where(version.table_name.in_(tables))
+        .order_by(version.table_name)
+        .with_for_update()
+    )
+    engine = getattr(bind, "engine", bind)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(
+            update(version)
+            .where(version.table_name.in_(locked))
+            .values(version=version.version + 1, updated_at=datetime.utcnow())
+        )
+
+
+class NotModified(Exception):
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+
+def read_versions(db: Session, tables) -> list:
+    return (
+        db.query(models.TableVersion.version, models.TableVersion.updated_at)
+        .filter(models.TableVersion.table_name.in_(tables))
+        .order_by(models.TableVersion.table_name)
+        .all()
+    )
+
+
+def validators(request: Request, versions) -> tuple:
+    """(ETag, Last-Modified или None). ETag слабый: байты ответа между релизами не гарантируются."""
+    state = ",".join(str(row.version) for row in versions)
+    digest = hashlib.blake2b(
+        f"{REPRESENTATION_VERSION}|{state}|{request.url.path}?{request.url.query}".encode(),
+        digest_size=8,
+    ).hexdigest()
+    updated = [row.updated_at for row in versions if row.updated_at is not None]
+    last_modified = max(updated).replace(microsecond=0, tzinfo=timezone.utc) if updated else None
+    return f'W/"{digest}"', last_modified
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _not_modified_since(header: Optional[str], last_modified: datetime) -> bool:
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def check(request: Request, response: Response, versions, cache_control: str = REVALIDATE) -> str:
+    """
+    Ставит ETag, Last-Modified и Cache-Control на ответ или бросает NotModified.
+    If-Modified-Since учитывается, только если нет If-None-Match (RFC 9110).
+    """
+    etag, last_modified = validators(request, versions)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    # Точность Last-Modified — секунда: изменение в ту же секунду, что и ответ,
+    # If-Modified-Since не заметит. Такой ответ отдаём только с ETag
+    if last_modified is not None and datetime.now(timezone.utc) - last_modified >= timedelta(seconds=1):
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            raise NotModified(headers)
+    elif "Last-Modified" in headers and _not_modified_since(request.headers.get("if-modified-since"), last_modified):
+        raise NotModified(headers)
+    response.headers.update(headers)
+    return etag
@@ -0,0 +1,56 @@
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import joinedload, selectinload
+import models
+
+# Связи, которые клиент может запросить через ?include=a,b
+EMPLOYEE_INCLUDES = {
+    "department": joinedload(models.Employee.department),
+    "documents": selectinload(models.Employee.documents),
+    "vacations": selectinload(models.Employee.vacations),
+}
+DEPARTMENT_INCLUDES = {
+    "manager": joinedload(models.Department.manager),
+    "employees": selectinload(models.Department.employees),
+}
+ROLE_INCLUDES = {
+    "employees": selectinload(models.Role.employees),
+}
+
+
+def include_param(allowed: dict):
+    """Dependency: разбирает ?include= и проверяет имена по белому списку."""
+    def dependency(include: Optional[str] = None) -> Tuple[str, ...]:
+        if not include:
+            return ()
+        names = tuple(dict.fromkeys(name.strip() for name in include.split(",") if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown include: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+            )
+        return names
+    return dependency
+
+
+def loader_options(allowed: dict, include: Tuple[str, ...]):
+    return [allowed[name] for name in include]
+
+
+def expand(obj, schema, include: Tuple[str, ...]):
+    """
+    Собирает ответ из колонок и только запрошенных связей, не трогая остальные
+    (иначе сериализация догрузит их лениво). Отдавать с response_model_exclude_unset.
+    """
+    if obj is None:
+        return None
+    data = {
+        name: getattr(obj, name)
+        for name in schema.model_fields
+        if name in obj.__table__.columns.keys()
+    }
+    for name in include:
+        data[name] = getattr(obj, name)
+    return schema.model_validate(data)
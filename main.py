@@ -1,15 +1,64 @@
-from fastapi import FastAPI, Depends, HTTPException
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import Any, List, Literal, Optional, Tuple
+import audit
+import auth
+import changes
 import crud
-import models
 import schemas
-from database import SessionLocal, engine
-
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+from config import settings
+import database
+from database import ReadSessionLocal, SessionLocal
+from hashing import HashingPoolSaturated, get_hasher
+from cache import get_cache
+from filters import DOCUMENT_FILTERS, EMPLOYEE_FILTERS, VACATION_FILTERS, filter_param
+from includes import DEPARTMENT_INCLUDES, EMPLOYEE_INCLUDES, ROLE_INCLUDES, expand, include_param
+from pagination import InvalidCursor, with_next_cursor
+import serialization
+import storage
+from vacation_calendar import InvalidPeriod, VacationConflict
+from bulk import bulk_result, read_bulk_payload, validate_rows
+import export
+import expiration
+import http_cache
+import metrics
+import org_chart
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scanner = None
+    if settings.expiration_scan_interval_seconds > 0:
+        scanner = expiration.BackgroundScanner(SessionLocal, settings.expiration_windows_days,
+                                               settings.expiration_batch_size,
+                                               settings.expiration_scan_interval_seconds)
+        scanner.start()
+    stats_fold = None
+    if settings.department_stats_fold_seconds > 0:
+        stats_fold = org_chart.BackgroundFold(SessionLocal, settings.department_stats_fold_seconds)
+        stats_fold.start()
+    # Опрос ленты изменений стоит, пока нет подписчиков; задача нужна и для чистки
+    changes.get_change_feed().start()
+    yield
+    if scanner is not None:
+        await scanner.stop()
+    if stats_fold is not None:
+        await stats_fold.stop()
+    await changes.get_change_feed().stop()
+    # Дописать журнал изменений до выхода
+    await run_in_threadpool(audit.get_audit_writer().stop)
+    get_hasher().shutdown()
+
+
+# AUTH_REQUIRED=true: токен проверяется dependency на всех маршрутах (auth.PUBLIC_PATHS — без него)
+app = FastAPI(lifespan=lifespan,
+              dependencies=[Depends(auth.require_principal)] if settings.auth_required else None)
 
 # Настройка CORS
 app.add_middleware(
@@ -18,8 +67,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+# Добавлен последним — внешний слой, время считается вместе с остальными middleware
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware, slow_request_seconds=settings.slow_request_seconds)
+
+
+@app.exception_handler(InvalidCursor)
+def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(InvalidPeriod)
+def invalid_period_handler(request: Request, exc: InvalidPeriod):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(VacationConflict)
+def vacation_conflict_handler(request: Request, exc: VacationConflict):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+@app.exception_handler(http_cache.NotModified)
+def not_modified_handler(request: Request, exc: http_cache.NotModified):
+    return Response(status_code=304, headers=exc.headers)
+
+
+@app.exception_handler(storage.UploadTooLarge)
+def upload_too_large_handler(request: Request, exc: storage.UploadTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.exception_handler(auth.InvalidToken)
+def invalid_token_handler(request: Request, exc: auth.InvalidToken):
+    return JSONResponse(status_code=401, content={"detail": str(exc)}, headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.exception_handler(HashingPoolSaturated)
+def hashing_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+# Асинхронные маршруты регистрируются первыми и перекрывают синхронные
+if settings.async_db:
+    import async_api
+    app.include_router(async_api.router)
+
 # Dependency для получения сессии БД
 def get_db():
     db = SessionLocal()
@@ -28,25 +122,127 @@ def get_db():
     finally:
         db.close()
 
+# Сессия только для чтения: на реплику, если она настроена (DATABASE_REPLICA_URL)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def conditional(*tables, cache_control: str = http_cache.REVALIDATE):
+    """Dependency: ETag по версиям tables, 304 до запроса данных. Возвращает ETag."""
+    def dependency(request: Request, response: Response, db: Session = Depends(get_read_db)) -> str:
+        return http_cache.check(request, response, http_cache.read_versions(db, tables), cache_control)
+    return dependency
+
+# ---------- Auth ----------
+@app.post("/token", response_model=schemas.Token)
+async def issue_token(credentials: schemas.TokenRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(crud.get_user_by_username, db, credentials.username)
+    # Соединение не держим, пока bcrypt считается в пуле процессов
+    await run_in_threadpool(db.close)
+    if not await auth.check_password(user, credentials.password):
+        raise auth.InvalidToken("Incorrect username or password")
+    return auth.issue_token(user.id, settings.secret_key, settings.algorithm, settings.access_token_expire_minutes)
+
+
+@app.post("/token/revoke", status_code=204)
+async def revoke_token(claims: dict = Depends(auth.token_claims)):
+    auth.get_revocations().revoke_token(claims["jti"], claims["exp"])
+
+
+@app.get("/me", response_model=schemas.Principal)
+async def read_me(principal: schemas.Principal = Depends(auth.current_principal)):
+    return principal
+
+
 # ---------- Employees ----------
 @app.post("/employees/", response_model=schemas.Employee)
 def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db)):
     return crud.create_employee(db=db, employee=employee)
 
-@app.get("/employees/", response_model=List[schemas.Employee])
-def read_employees(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_employees(db, skip=skip, limit=limit)
-
-@app.get("/employees/{employee_id}", response_model=schemas.Employee)
-def read_employee(employee_id: int, db: Session = Depends(get_db)):
-    employee = crud.get_employee(db, employee_id)
+@app.get("/employees/", response_model=List[schemas.EmployeeExpanded], response_model_exclude_unset=True,
+         dependencies=[Depends(conditional(*http_cache.EMPLOYEE_TABLES))])
+def read_employees(response: Response, skip: int = 0, limit: int = 100,
+                   cursor: Optional[str] = None, sort: Optional[str] = None,
+                   include: Tuple[str, ...] = Depends(include_param(EMPLOYEE_INCLUDES)),
+                   filters: tuple = Depends(filter_param(EMPLOYEE_FILTERS)),
+                   db: Session = Depends(get_read_db)):
+    if settings.fast_serialization and not include:
+        return serialization.page_response(db, response, serialization.EMPLOYEES,
+                                           skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    items = crud.get_employees(db, skip=skip, limit=limit, cursor=cursor, sort=sort,
+                               include=include, filters=filters)
+    with_next_cursor(response, items, limit, sort)
+    return [expand(item, schemas.EmployeeExpanded, include) for item in items]
+
+# Массовые операции объявлены раньше /employees/{employee_id}
+@app.post("/employees/bulk", response_model=schemas.BulkResult)
+def create_employees_bulk(rows: List[Any] = Depends(read_bulk_payload), db: Session = Depends(get_db)):
+    valid, errors = validate_rows(rows, schemas.EmployeeCreate)
+    ids, write_errors = crud.bulk_create_employees(db, valid)
+    return bulk_result(rows, ids, errors, write_errors)
+
+@app.patch("/employees/bulk", response_model=schemas.BulkResult)
+def update_employees_bulk(rows: List[Any] = Depends(read_bulk_payload), db: Session = Depends(get_db)):
+    valid, errors = validate_rows(rows, schemas.EmployeeBulkUpdate)
+    ids, write_errors = crud.bulk_update_employees(db, valid)
+    return bulk_result(rows, ids, errors, write_errors)
+
+@app.delete("/employees/bulk", response_model=schemas.BulkResult)
+def delete_employees_bulk(rows: List[Any] = Depends(read_bulk_payload), db: Session = Depends(get_db)):
+    valid, errors = validate_rows(rows, int)
+    ids, write_errors = crud.bulk_delete_employees(db, valid)
+    return bulk_result(rows, ids, errors, write_errors)
+
+@app.post("/employees/offboard", response_model=schemas.OffboardResult)
+def offboard_employees(offboard: schemas.EmployeeOffboard, db: Session = Depends(get_db)):
+    if (offboard.employee_ids is None) == (offboard.department_id is None):
+        raise HTTPException(status_code=400, detail="Pass either 'employee_ids' or 'department_id'")
+    result = crud.offboard_employees(db, offboard.employee_ids, offboard.department_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return result
+
+@app.get("/employees/{employee_id}", response_model=schemas.EmployeeExpanded, response_model_exclude_unset=True)
+def read_employee(employee_id: int, include: Tuple[str, ...] = Depends(include_param(EMPLOYEE_INCLUDES)),
+                  etag: str = Depends(conditional(*http_cache.EMPLOYEE_TABLES)),
+                  db: Session = Depends(get_read_db)):
+    if include:
+        employee = expand(crud.get_employee(db, employee_id, include=include), schemas.EmployeeExpanded, include)
+    else:
+        employee = crud.get_employee_cached(db, employee_id, version=etag)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     return employee
 
+@app.get("/employees/{employee_id}/reports", response_model=List[schemas.Employee],
+         dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+def read_reports(employee_id: int, response: Response, skip: int = 0, limit: int = 100,
+                 cursor: Optional[str] = None, sort: Optional[str] = None,
+                 db: Session = Depends(get_read_db)):
+    items = crud.get_reports(db, employee_id, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    # Существование сотрудника проверяем, только если подчинённых нет
+    if not items and not cursor and crud.get_employee(db, employee_id) is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return with_next_cursor(response, items, limit, sort)
+
+@app.get("/employees/{employee_id}/history", response_model=List[schemas.HistoryEntry])
+def read_employee_history(employee_id: int, response: Response, limit: int = Query(100, ge=1, le=1000),
+                          cursor: Optional[str] = None, db: Session = Depends(get_read_db)):
+    # Журнал пишется с задержкой до AUDIT_FLUSH_SECONDS; история удалённого сотрудника остаётся
+    items = crud.get_history(db, "employees", employee_id, limit=limit, cursor=cursor)
+    return with_next_cursor(response, items, limit)
+
 @app.get("/employees/search/", response_model=List[schemas.Employee])
-def search_employees(last_name: str, db: Session = Depends(get_db)):
-    return crud.search_employees_by_last_name(db, last_name)
+def search_employees(q: Optional[str] = None, last_name: Optional[str] = None,
+                     limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_read_db)):
+    # last_name оставлен для совместимости со старыми клиентами
+    query = q if q is not None else last_name
+    if not query:
+        raise HTTPException(status_code=400, detail="Query parameter 'q' is required")
+    return crud.search_employees(db, query, limit=limit)
 
 @app.put("/employees/{employee_id}", response_model=schemas.Employee)
 def update_employee(employee_id: int, employee: schemas.EmployeeUpdate, db: Session = Depends(get_db)):
@@ -65,6 +261,97 @@ def delete_employee(employee_id: int, db: Session = Depends(get_db)):
 # ... (остальные CRUD endpoints для других моделей остаются такими же)
 
 
+# ---------- Stats ----------
+@app.get("/stats/hashing")
+def hashing_stats():
+    return get_hasher().stats()
+
+
+@app.get("/stats/cache")
+def cache_stats():
+    return get_cache().stats()
+
+
+@app.get("/stats/auth")
+def auth_stats():
+    return auth.get_revocations().stats()
+
+
+@app.get("/stats/changes")
+def changes_stats():
+    return changes.get_change_feed().stats()
+
+
+@app.get("/stats/audit")
+def audit_stats():
+    return audit.get_audit_writer().stats()
+
+
+@app.get("/stats/pool")
+def pool_stats():
+    return database.pool_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(database.pool_stats()), media_type=metrics.CONTENT_TYPE)
+
+
+# ---------- Changes ----------
+# Вместо опроса списков: события о записях во все отслеживаемые таблицы (changes.py)
+@app.get("/changes/stream")
+async def stream_changes(request: Request, since: Optional[int] = Query(None, ge=0),
+                         tables: Optional[frozenset] = Depends(changes.tables_param)):
+    # Last-Event-ID присылает EventSource при переподключении; он важнее ?since=
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        changes.get_change_feed().stream(since, tables),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------- Export ----------
+# Потоковая выгрузка: /export/employees.ndjson, /export/employees.csv и т.д.
+ExportFormat = Literal["ndjson", "csv"]
+
+def export_response(query, fmt: str, name: str):
+    return StreamingResponse(
+        export.STREAMS[fmt](query),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@app.get("/export/employees.{fmt}")
+def export_employees(fmt: ExportFormat, department_id: Optional[int] = None,
+                     status: Optional[schemas.EmployeeStatus] = None,
+                     hired_from: Optional[date] = None, hired_to: Optional[date] = None):
+    query = export.employees_query(department_id, status, hired_from, hired_to)
+    return export_response(query, fmt, "employees")
+
+
+@app.get("/export/vacations.{fmt}")
+def export_vacations(fmt: ExportFormat, department_id: Optional[int] = None,
+                     status: Optional[schemas.VacationStatus] = None,
+                     vacation_type: Optional[schemas.VacationType] = None,
+                     date_from: Optional[date] = None, date_to: Optional[date] = None):
+    query = export.vacations_query(department_id, status, vacation_type, date_from, date_to)
+    return export_response(query, fmt, "vacations")
+
+
+@app.get("/export/documents.{fmt}")
+def export_documents(fmt: ExportFormat, department_id: Optional[int] = None,
+                     document_type: Optional[schemas.DocumentType] = None,
+                     expires_before: Optional[date] = None):
+    query = export.documents_query(department_id, document_type, expires_before)
+    return export_response(query, fmt, "documents")
+
+
 # ---------- Departments ----------
 
 @app.post("/departments/", response_model=schemas.Department)
@@ -72,14 +359,48 @@ def create_department(department: schemas.DepartmentCreate, db: Session = Depend
     return crud.create_department(db, department)
 
 
-@app.get("/departments/", response_model=List[schemas.Department])
-def read_departments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_departments(db, skip, limit)
+@app.get("/departments/", response_model=List[schemas.DepartmentExpanded], response_model_exclude_unset=True,
+         dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+def read_departments(response: Response, skip: int = 0, limit: int = 100,
+                     cursor: Optional[str] = None, sort: Optional[str] = None,
+                     include: Tuple[str, ...] = Depends(include_param(DEPARTMENT_INCLUDES)),
+                     db: Session = Depends(get_read_db)):
+    if settings.fast_serialization and not include:
+        return serialization.page_response(db, response, serialization.DEPARTMENTS,
+                                           skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = crud.get_departments(db, skip=skip, limit=limit, cursor=cursor, sort=sort, include=include)
+    with_next_cursor(response, items, limit, sort)
+    return [expand(item, schemas.DepartmentExpanded, include) for item in items]
+
+
+# Объявлен раньше /departments/{department_id}
+@app.get("/departments/stats", response_model=List[schemas.DepartmentStats],
+         dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+def read_departments_stats(response: Response, skip: int = 0, limit: int = 100,
+                           cursor: Optional[str] = None, sort: Optional[str] = None,
+                           db: Session = Depends(get_read_db)):
+    items = crud.get_departments_stats(db, skip=skip, limit=limit, cursor=cursor, sort=sort,
+                                       summary=settings.department_stats_summary)
+    return with_next_cursor(response, items, limit, sort)
+
+
+@app.get("/departments/{department_id}/stats", response_model=schemas.DepartmentStats,
+         dependencies=[Depends(conditional(*http_cache.DEPARTMENT_TABLES))])
+def read_department_stats(department_id: int, db: Session = Depends(get_read_db)):
+    stats = crud.get_department_stats(db, department_id, summary=settings.department_stats_summary)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return stats
 
 
-@app.get("/departments/{department_id}", response_model=schemas.Department)
-def read_department(department_id: int, db: Session = Depends(get_db)):
-    department = crud.get_department(db, department_id)
+@app.get("/departments/{department_id}", response_model=schemas.DepartmentExpanded, response_model_exclude_unset=True)
+def read_department(department_id: int, include: Tuple[str, ...] = Depends(include_param(DEPARTMENT_INCLUDES)),
+                    etag: str = Depends(conditional(*http_cache.DEPARTMENT_TABLES)),
+                    db: Session = Depends(get_read_db)):
+    if include:
+        department = expand(crud.get_department(db, department_id, include=include), schemas.DepartmentExpanded, include)
+    else:
+        department = crud.get_department_cached(db, department_id, version=etag)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     return department
@@ -109,12 +430,18 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 @app.get("/users/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_users(db, skip, limit)
+def read_users(response: Response, skip: int = 0, limit: int = 100,
+               cursor: Optional[str] = None, sort: Optional[str] = None,
+               db: Session = Depends(get_read_db)):
+    if settings.fast_serialization:
+        return serialization.page_response(db, response, serialization.USERS,
+                                           skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = crud.get_users(db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    return with_next_cursor(response, items, limit, sort)
 
 
 @app.put("/users/{user_id}", response_model=schemas.User)
-def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_db)):
+def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db)):
     updated = crud.update_user(db, user_id, user)
     if not updated:
         raise HTTPException(status_code=404, detail="User not found")
@@ -136,9 +463,26 @@ def create_document(document: schemas.DocumentCreate, db: Session = Depends(get_
     return crud.create_document(db, document)
 
 
-@app.get("/documents/", response_model=List[schemas.Document])
-def read_documents(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_documents(db, skip, limit)
+@app.get("/documents/", response_model=List[schemas.Document],
+         dependencies=[Depends(conditional(*http_cache.DOCUMENT_TABLES))])
+def read_documents(response: Response, skip: int = 0, limit: int = 100,
+                   cursor: Optional[str] = None, sort: Optional[str] = None,
+                   filters: tuple = Depends(filter_param(DOCUMENT_FILTERS)),
+                   db: Session = Depends(get_read_db)):
+    if settings.fast_serialization:
+        return serialization.page_response(db, response, serialization.DOCUMENTS,
+                                           skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    items = crud.get_documents(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    return with_next_cursor(response, items, limit, sort)
+
+
+# Без ETag: ответ зависит от текущей даты, а не только от версий таблиц
+@app.get("/documents/expiring", response_model=List[schemas.Document])
+def read_expiring_documents(response: Response, within_days: int = Query(30, ge=0, le=3660),
+                            skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                            db: Session = Depends(get_read_db)):
+    items = crud.get_expiring_documents(db, within_days, skip=skip, limit=limit, cursor=cursor)
+    return with_next_cursor(response, items, limit, "expiration_date")
 
 
 @app.put("/documents/{document_id}", response_model=schemas.Document)
@@ -149,6 +493,32 @@ def update_document(document_id: int, document: schemas.DocumentCreate, db: Sess
     return updated
 
 
+# async: тело пишется на диск потоком по мере чтения, запросы к БД — в пуле потоков
+@app.put("/documents/{document_id}/content", response_model=schemas.Document)
+async def upload_document_content(document_id: int, request: Request, db: Session = Depends(get_db)):
+    if await run_in_threadpool(crud.get_document, db, document_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    # На время загрузки соединение возвращается в пул; сессия откроет новое
+    await run_in_threadpool(db.close)
+    storage.check_content_length(request, settings.storage_max_upload_bytes)
+    blob = await storage.get_storage().save(request.stream(), settings.storage_max_upload_bytes)
+    document = await run_in_threadpool(crud.set_document_content, db, document_id, blob,
+                                       request.headers.get("content-type"))
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+
+@app.get("/documents/{document_id}/content")
+def download_document_content(document_id: int, request: Request, db: Session = Depends(get_read_db)):
+    document = crud.get_document(db, document_id)
+    if document is None or document.content_sha256 is None:
+        raise HTTPException(status_code=404, detail="Document content not found")
+    return storage.content_response(request, storage.get_storage(), document.content_sha256,
+                                    document.content_type, os.path.basename(document.file_path) or None,
+                                    accel_redirect=settings.storage_accel_redirect)
+
+
 @app.delete("/documents/{document_id}", response_model=schemas.Document)
 def delete_document(document_id: int, db: Session = Depends(get_db)):
     deleted = crud.delete_document(db, document_id)
@@ -164,9 +534,43 @@ def create_vacation(vacation: schemas.VacationCreate, db: Session = Depends(get_
     return crud.create_vacation(db, vacation)
 
 
-@app.get("/vacations/", response_model=List[schemas.Vacation])
-def read_vacations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_vacations(db, skip, limit)
+@app.get("/vacations/", response_model=List[schemas.Vacation],
+         dependencies=[Depends(conditional(*http_cache.VACATION_TABLES))])
+def read_vacations(response: Response, skip: int = 0, limit: int = 100,
+                   cursor: Optional[str] = None, sort: Optional[str] = None,
+                   filters: tuple = Depends(filter_param(VACATION_FILTERS)),
+                   db: Session = Depends(get_read_db)):
+    if settings.fast_serialization:
+        return serialization.page_response(db, response, serialization.VACATIONS,
+                                           skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    items = crud.get_vacations(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    return with_next_cursor(response, items, limit, sort)
+
+
+# Отпуска, пересекающие период [from, to] (отклонённые — только по ?status=rejected)
+@app.get("/vacations/calendar", response_model=List[schemas.Vacation],
+         dependencies=[Depends(conditional(*http_cache.VACATION_TABLES))])
+def read_vacation_calendar(response: Response, date_from: date = Query(..., alias="from"),
+                           date_to: date = Query(..., alias="to"), department_id: Optional[int] = None,
+                           status: Optional[schemas.VacationStatus] = None,
+                           skip: int = 0, limit: int = 100,
+                           cursor: Optional[str] = None, sort: Optional[str] = None,
+                           db: Session = Depends(get_read_db)):
+    if settings.fast_serialization:
+        return serialization.calendar_page_response(db, response, date_from, date_to, department_id, status,
+                                                    skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = crud.get_vacation_calendar(db, date_from, date_to, department_id=department_id, status=status,
+                                       skip=skip, limit=limit, cursor=cursor, sort=sort)
+    return with_next_cursor(response, items, limit, sort)
+
+
+@app.get("/vacations/calendar/headcount", response_model=List[schemas.CalendarDay],
+         dependencies=[Depends(conditional(*http_cache.VACATION_TABLES))])
+def read_vacation_headcount(date_from: date = Query(..., alias="from"), date_to: date = Query(..., alias="to"),
+                            department_id: Optional[int] = None,
+                            status: Optional[schemas.VacationStatus] = None,
+                            db: Session = Depends(get_read_db)):
+    return crud.get_vacation_headcount(db, date_from, date_to, department_id=department_id, status=status)
 
 
 @app.put("/vacations/{vacation_id}", response_model=schemas.Vacation)
@@ -192,9 +596,47 @@ def create_role(role: schemas.RoleCreate, db: Session = Depends(get_db)):
     return crud.create_role(db, role)
 
 
-@app.get("/roles/", response_model=List[schemas.Role])
-def read_roles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_roles(db, skip, limit)
+@app.get("/roles/", response_model=List[schemas.RoleExpanded], response_model_exclude_unset=True,
+         dependencies=[Depends(conditional(*http_cache.ROLE_TABLES))])
+def read_roles(response: Response, skip: int = 0, limit: int = 100,
+               cursor: Optional[str] = None, sort: Optional[str] = None,
+               include: Tuple[str, ...] = Depends(include_param(ROLE_INCLUDES)),
+               db: Session = Depends(get_read_db)):
+    if settings.fast_serialization and not include:
+        return serialization.page_response(db, response, serialization.ROLES,
+                                           skip=skip, limit=limit, cursor=cursor, sort=sort)
+    items = crud.get_roles(db, skip=skip, limit=limit, cursor=cursor, sort=sort, include=include)
+    with_next_cursor(response, items, limit, sort)
+    return [expand(item, schemas.RoleExpanded, include) for item in items]
+
+
+# Состав роли постранично: в schemas.Role сотрудники не встраиваются
+@app.get("/roles/{role_id}/members", response_model=List[schemas.Employee],
+         dependencies=[Depends(conditional(*http_cache.ROLE_TABLES))])
+def read_role_members(role_id: int, response: Response, skip: int = 0, limit: int = 100,
+                      cursor: Optional[str] = None, sort: Optional[str] = None,
+                      db: Session = Depends(get_read_db)):
+    items = crud.get_role_members(db, role_id, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    # Существование роли проверяем, только если участников нет
+    if not items and not cursor and crud.get_role(db, role_id) is None:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return with_next_cursor(response, items, limit, sort)
+
+
+@app.post("/roles/{role_id}/members", response_model=schemas.RoleMembersResult)
+def add_role_members(role_id: int, members: schemas.RoleMembers, db: Session = Depends(get_db)):
+    result = crud.add_role_members(db, role_id, members.employee_ids)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return result
+
+
+@app.delete("/roles/{role_id}/members", response_model=schemas.RoleMembersResult)
+def remove_role_members(role_id: int, members: schemas.RoleMembers, db: Session = Depends(get_db)):
+    result = crud.remove_role_members(db, role_id, members.employee_ids)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return result
 
 
 @app.put("/roles/{role_id}", response_model=schemas.Role)
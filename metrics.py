@@ -0,0 +1,263 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Метрики запросов в формате Prometheus (/metrics): задержка по маршрутам,
+# число и время SQL на запрос, ожидание соединения из пула, лог медленных
+# запросов с их SQL. Счётчики живут в процессе: каждый воркер uvicorn
+# отдаёт свои, суммирует их Prometheus.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы гистограмм, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Сколько SQL запоминать за запрос и сколько самых долгих писать в лог
+MAX_STATEMENTS_PER_REQUEST = 500
+SLOW_LOG_STATEMENTS = 5
+UNMATCHED_ROUTE = "<unmatched>"
+# Подписки, которые держатся минутами: в лог медленных запросов не пишем
+LONG_LIVED_ROUTES = frozenset({"/changes/stream"})
+
+logger = logging.getLogger("metrics")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    """SQL и пул в рамках одного HTTP-запроса. Заполняется из любого потока запроса."""
+
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statements = []  # (секунды, SQL)
+
+
+# Starlette копирует контекст в поток пула, поэтому синхронные маршруты
+# и run_sync асинхронного режима пишут в тот же RequestStats
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}    # (method, route) -> Histogram
+        self.responses = {}  # (method, route, status) -> int
+        self.db_queries = {}  # (method, route) -> int
+        self.db_seconds = {}  # (method, route) -> float
+        self.query_latency = Histogram(QUERY_BUCKETS)
+        self.pool_wait = Histogram(POOL_WAIT_BUCKETS)
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+            status_key = (method, route, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+            self.db_queries[key] = self.db_queries.get(key, 0) + stats.queries
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + stats.db_seconds
+            for seconds, _ in stats.statements:
+                self.query_latency.observe(seconds)
+
+    def observe_query(self, elapsed: float):
+        with self._lock:
+            self.query_latency.observe(elapsed)
+
+    def observe_pool_wait(self, elapsed: float):
+        with self._lock:
+            self.pool_wait.observe(elapsed)
+
+    def render(self, pools: Optional[dict] = None) -> str:
+        lines = []
+        if pools:
+            _family(lines, "db_pool_connections", "gauge", "Pool connections by state.",
+                    [(_labels(pool=name, state=state), state_values[state])
+                     for name, state_values in sorted(pools.items())
+                     for state in ("checked_in", "checked_out", "overflow")])
+            _family(lines, "db_pool_size", "gauge", "Configured pool size.",
+                    [(_labels(pool=name), state_values["size"]) for name, state_values in sorted(pools.items())])
+        with self._lock:
+            _histogram_family(lines, "http_request_duration_seconds", "HTTP request latency by route.",
+                              [(_labels(method=m, route=r), h) for (m, r), h in sorted(self.latency.items())])
+            _family(lines, "http_requests_total", "counter", "HTTP responses by route and status.",
+                    [(_labels(method=m, route=r, status=s), v) for (m, r, s), v in sorted(self.responses.items())])
+            _family(lines, "http_request_db_queries_total", "counter", "SQL statements executed by route.",
+                    [(_labels(method=m, route=r), v) for (m, r), v in sorted(self.db_queries.items())])
+            _family(lines, "http_request_db_seconds_total", "counter", "Time spent in SQL by route.",
+                    [(_labels(method=m, route=r), v) for (m, r), v in sorted(self.db_seconds.items())])
+            _histogram_family(lines, "db_query_duration_seconds", "SQL statement latency.",
+                              [("", self.query_latency)])
+            _histogram_family(lines, "db_pool_checkout_seconds",
+                              "Time to get a connection from the pool, including opening a new one.",
+                              [("", self.pool_wait)])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _family(lines, name: str, kind: str, help_text: str, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+
+def _histogram_family(lines, name: str, help_text: str, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in samples:
+        prefix = labels + "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+registry = Registry()
+
+
+# ---------- HTTP ----------
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время запроса по шаблону маршрута (/employees/{employee_id},
+    а не конкретный id) и лог запросов дольше slow_request_seconds.
+    Время потоковых ответов считается до отправки последнего байта.
+    """
+
+    def __init__(self, app, slow_request_seconds: float = 1.0):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            registry.observe_request(scope["method"], route, status, elapsed, stats)
+            if elapsed >= self.slow_request_seconds and route not in LONG_LIVED_ROUTES:
+                _log_slow_request(scope, status, elapsed, stats)
+
+
+def _log_slow_request(scope, status: int, elapsed: float, stats: RequestStats):
+    slowest = sorted(stats.statements, key=lambda item: item[0], reverse=True)[:SLOW_LOG_STATEMENTS]
+    statements = "".join(
+        f"\n  {seconds * 1000:9.1f} ms  {' '.join(statement.split())[:500]}"
+        for seconds, statement in slowest
+    )
+    logger.warning(
+        "Slow request %s %s -> %s: %.3fs, %d queries, %.3fs in SQL, %.3fs waiting for pool%s",
+        scope["method"], scope["path"], status, elapsed,
+        stats.queries, stats.db_seconds, stats.pool_wait_seconds, statements,
+    )
+
+
+# ---------- SQL ----------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("metrics_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is None:
+        # Вне HTTP-запроса: миграции, фоновые задачи
+        registry.observe_query(elapsed)
+        return
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if len(stats.statements) < MAX_STATEMENTS_PER_REQUEST:
+        stats.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine):
+    """Подключает учёт SQL к движку (для AsyncEngine — передавать engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- POOL ----------
+def _observe_pool_wait(elapsed: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += elapsed
+    registry.observe_pool_wait(elapsed)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который замеряет ожидание соединения. Событий до checkout у пула нет."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _observe_pool_wait(time.perf_counter() - started)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _observe_pool_wait(time.perf_counter() - started)
+
+
+def render(pools: Optional[dict] = None) -> str:
+    """pools — database.pool_stats(): текущее состояние пулов в виде gauge."""
+    return registry.render(pools)
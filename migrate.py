@@ -0,0 +1,37 @@
+"""
+Миграции схемы БД (Alembic, ревизии в migrations/versions).
+
+    python -m migrate            # до последней ревизии
+    python -m migrate 0001       # до указанной
+
+То же самое делает alembic upgrade head; этот модуль вызывают и бенчмарки.
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from database import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+# Ревизия, соответствующая схеме из models.Base.metadata.create_all
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    return Config(ALEMBIC_INI)
+
+
+def upgrade(revision: str = "head"):
+    config = alembic_config()
+    inspector = inspect(engine)
+    if inspector.has_table("employees") and not inspector.has_table("alembic_version"):
+        # База создана ещё через create_all — принимаем её как базовую ревизию
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    upgrade(sys.argv[1] if len(sys.argv) > 1 else "head")
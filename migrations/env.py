@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+
+from alembic import context
+import models
+import search
+from config import settings
+from database import engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+# Архивы, которые миграции создают для разбора оператором (0013); в моделях их нет
+ARCHIVE_TABLES = frozenset({"documents_orphaned", "vacations_orphaned"})
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Поисковый индекс (0014, 0015) — FTS5 с её служебными таблицами, индексы pg_trgm и lower()
+    if type_ == "table" and reflected:
+        return name not in ARCHIVE_TABLES and not name.startswith(search.FTS_TABLE)
+    if type_ == "index" and reflected:
+        return name not in search.TRIGRAM_INDEXES and name not in search.LOWER_INDEXES
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        # render_as_batch: SQLite не умеет ALTER для ограничений, Alembic пересоздаёт таблицу
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True,
+                          include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,112 @@
+"""Схема, которую раньше создавал models.Base.metadata.create_all.
+
+База, созданная через create_all, принимается как уже находящаяся на этой
+ревизии: migrate.upgrade() сам выполнит alembic stamp 0001.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ENUMS = {
+    "employee_status": ("active", "inactive"),
+    "documenttypeenum": ("passport", "employment_record", "contract", "other"),
+    "vacationtypeenum": ("regular", "sick", "unpaid"),
+    "vacationstatusenum": ("requested", "approved", "rejected"),
+    "roletypeenum": ("sector", "medical"),
+    "rolestatusenum": ("planned", "approved"),
+}
+
+
+def _enum(name):
+    return sa.Enum(*ENUMS[name], name=name)
+
+
+def upgrade():
+    # departments.manager_id и employees.department_id ссылаются друг на друга:
+    # внешний ключ менеджера добавляется после создания employees
+    op.create_table(
+        "departments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("manager_id", sa.Integer()),
+    )
+    op.create_table(
+        "employees",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("employee_code", sa.String(60), nullable=False, unique=True),
+        sa.Column("last_name", sa.String(50), nullable=False),
+        sa.Column("first_name", sa.String(50), nullable=False),
+        sa.Column("position", sa.String(100)),
+        sa.Column("hire_date", sa.Date()),
+        sa.Column("salary", sa.DECIMAL(10, 2)),
+        sa.Column("status", _enum("employee_status")),
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id")),
+    )
+    with op.batch_alter_table("departments") as batch:
+        batch.create_foreign_key("departments_manager_id_fkey", "employees", ["manager_id"], ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(80), nullable=False, unique=True),
+        sa.Column("email", sa.String(120), nullable=False, unique=True),
+        sa.Column("password", sa.String(120), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("registration_date", sa.DateTime()),
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id")),
+    )
+    op.create_table(
+        "documents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id")),
+        sa.Column("document_type", _enum("documenttypeenum"), nullable=False),
+        sa.Column("file_path", sa.String(255), nullable=False),
+        sa.Column("expiration_date", sa.Date()),
+        sa.Column("upload_date", sa.DateTime()),
+    )
+    op.create_table(
+        "vacations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id")),
+        sa.Column("start_date", sa.Date()),
+        sa.Column("end_date", sa.Date()),
+        sa.Column("vacation_type", _enum("vacationtypeenum"), nullable=False),
+        sa.Column("status", _enum("vacationstatusenum"), nullable=False),
+        sa.Column("notes", sa.Text()),
+    )
+    op.create_table(
+        "roles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("role_type", _enum("roletypeenum"), nullable=False),
+        sa.Column("start_date", sa.Date()),
+        sa.Column("end_date", sa.Date()),
+        sa.Column("status", _enum("rolestatusenum"), nullable=False),
+    )
+    op.create_table(
+        "employee_roles",
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id"), primary_key=True),
+        sa.Column("role_id", sa.Integer(), sa.ForeignKey("roles.id"), primary_key=True),
+    )
+
+
+def downgrade():
+    op.drop_table("employee_roles")
+    op.drop_table("roles")
+    op.drop_table("vacations")
+    op.drop_table("documents")
+    op.drop_table("users")
+    with op.batch_alter_table("departments") as batch:
+        batch.drop_constraint("departments_manager_id_fkey", type_="foreignkey")
+    op.drop_table("employees")
+    op.drop_table("departments")
+    for name in ENUMS:
+        _enum(name).drop(op.get_bind(), checkfirst=True)
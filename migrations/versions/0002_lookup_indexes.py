@@ -0,0 +1,39 @@
+"""Индексы внешних ключей и колонок, по которым фильтруют запросы.
+
+Индексы календаря отпусков могли появиться раньше через create_all,
+поэтому все индексы создаются с IF NOT EXISTS.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) — совпадает с объявлениями в models.py
+INDEXES = (
+    ("ix_employees_department_id", "employees", ["department_id"]),
+    ("ix_employees_hire_date", "employees", ["hire_date"]),
+    ("ix_employees_status_hire_date", "employees", ["status", "hire_date"]),
+    ("ix_departments_manager_id", "departments", ["manager_id"]),
+    ("ix_users_employee_id", "users", ["employee_id"]),
+    ("ix_documents_employee_id", "documents", ["employee_id"]),
+    ("ix_documents_expiration_date", "documents", ["expiration_date"]),
+    ("ix_vacations_employee_period", "vacations", ["employee_id", "start_date", "end_date"]),
+    ("ix_vacations_status_period", "vacations", ["status", "end_date", "start_date"]),
+    ("ix_employee_roles_role_id", "employee_roles", ["role_id"]),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
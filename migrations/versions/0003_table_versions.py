@@ -0,0 +1,81 @@
+"""Счётчики версий таблиц для ETag и триггеры, которые их поднимают.
+
+Триггеры срабатывают на любую запись, включая массовые операции и SQL в
+обход crud.py. PostgreSQL: триггер на оператор; SQLite умеет только на
+строку, поэтому массовая вставка поднимает счётчик на каждую строку.
+Batch-миграции SQLite пересоздают таблицу и теряют её триггеры — после них
+вызывать create_triggers() повторно.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ("employees", "departments", "users", "documents", "vacations", "roles", "employee_roles")
+
+_POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = timezone('utc', now())
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def create_triggers(table: str):
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+        return
+    for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+        op.execute(
+            f"CREATE TRIGGER {table}_version_{suffix} AFTER {event} ON {table} BEGIN "
+            f"UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE table_name = '{table}'; END"
+        )
+
+
+def drop_triggers(table: str):
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+        return
+    for suffix in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{suffix}")
+
+
+def upgrade():
+    table_versions = op.create_table(
+        "table_versions",
+        sa.Column("table_name", sa.String(64), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    now = datetime.utcnow().replace(microsecond=0)
+    op.bulk_insert(table_versions, [
+        {"table_name": table, "version": 0, "updated_at": now} for table in TRACKED_TABLES
+    ])
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(_POSTGRES_FUNCTION)
+    for table in TRACKED_TABLES:
+        create_triggers(table)
+
+
+def downgrade():
+    for table in TRACKED_TABLES:
+        drop_triggers(table)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table("table_versions")
@@ -0,0 +1,102 @@
+"""Сводная таблица численности и фонда оплаты по отделам.
+
+department_stats ведут триггеры на employees: вставка, удаление и изменение
+department_id, salary или status вносят разницу в строку отдела, поэтому
+GET /departments/stats не агрегирует всю таблицу сотрудников. Триггеры
+строчные в обеих СУБД: им нужны OLD/NEW. TRUNCATE employees сводку не
+обновляет — после него сводку пересобирает rebuild().
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+_ACTIVE = "CASE WHEN {row}.status = 'active' THEN 1 ELSE 0 END"
+
+_SUBTRACT = f"""
+    UPDATE department_stats SET
+        headcount = headcount - 1,
+        active_headcount = active_headcount - {_ACTIVE.format(row="OLD")},
+        total_salary = total_salary - COALESCE(OLD.salary, 0)
+    WHERE department_id = OLD.department_id;
+"""
+
+_ADD = f"""
+    INSERT INTO department_stats (department_id, headcount, active_headcount, total_salary)
+    SELECT NEW.department_id, 1, {_ACTIVE.format(row="NEW")}, COALESCE(NEW.salary, 0)
+    WHERE NEW.department_id IS NOT NULL
+    ON CONFLICT (department_id) DO UPDATE SET
+        headcount = department_stats.headcount + excluded.headcount,
+        active_headcount = department_stats.active_headcount + excluded.active_headcount,
+        total_salary = department_stats.total_salary + excluded.total_salary;
+"""
+
+_POSTGRES_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION maintain_department_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        {_SUBTRACT}
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {_ADD}
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_SQLITE_TRIGGERS = {
+    "employees_department_stats_ai": f"AFTER INSERT ON employees BEGIN {_ADD} END",
+    "employees_department_stats_ad": f"AFTER DELETE ON employees BEGIN {_SUBTRACT} END",
+    "employees_department_stats_au": (
+        f"AFTER UPDATE OF department_id, salary, status ON employees BEGIN {_SUBTRACT} {_ADD} END"
+    ),
+}
+
+
+def rebuild():
+    op.execute("DELETE FROM department_stats")
+    op.execute(f"""
+        INSERT INTO department_stats (department_id, headcount, active_headcount, total_salary)
+        SELECT department_id, COUNT(*), SUM({_ACTIVE.format(row="employees")}), COALESCE(SUM(salary), 0)
+        FROM employees WHERE department_id IS NOT NULL GROUP BY department_id
+    """)
+
+
+def upgrade():
+    op.create_table(
+        "department_stats",
+        # Без внешнего ключа: строка отдела может пережить сам отдел, чтение идёт через JOIN
+        sa.Column("department_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("headcount", sa.Integer(), nullable=False),
+        sa.Column("active_headcount", sa.Integer(), nullable=False),
+        sa.Column("total_salary", sa.DECIMAL(18, 2), nullable=False),
+    )
+    rebuild()
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(_POSTGRES_FUNCTION)
+        op.execute(
+            "CREATE TRIGGER employees_department_stats "
+            "AFTER INSERT OR DELETE OR UPDATE OF department_id, salary, status ON employees "
+            "FOR EACH ROW EXECUTE FUNCTION maintain_department_stats()"
+        )
+    else:
+        for name, body in _SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS employees_department_stats ON employees")
+        op.execute("DROP FUNCTION IF EXISTS maintain_department_stats()")
+    else:
+        for name in _SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("department_stats")
@@ -0,0 +1,35 @@
+"""Outbox уведомлений об истекающих документах.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "document_notifications",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("employee_id", sa.Integer()),
+        sa.Column("document_type", sa.String(32), nullable=False),
+        sa.Column("expiration_date", sa.Date(), nullable=False),
+        sa.Column("window_days", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("processed_at", sa.DateTime()),
+        sa.UniqueConstraint("document_id", "expiration_date", "window_days",
+                            name="uq_document_notifications_document_window"),
+    )
+    op.create_index("ix_document_notifications_pending", "document_notifications", ["processed_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_document_notifications_pending", table_name="document_notifications")
+    op.drop_table("document_notifications")
@@ -0,0 +1,27 @@
+"""Загруженное содержимое документов: хэш, размер и тип.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Без batch-режима: SQLite пересоздал бы таблицу и потерял триггеры версий (0003)
+    op.add_column("documents", sa.Column("content_sha256", sa.String(64)))
+    op.add_column("documents", sa.Column("content_size", sa.BigInteger()))
+    op.add_column("documents", sa.Column("content_type", sa.String(100)))
+    op.create_index("ix_documents_content_sha256", "documents", ["content_sha256"])
+
+
+def downgrade():
+    op.drop_index("ix_documents_content_sha256", table_name="documents")
+    for column in ("content_type", "content_size", "content_sha256"):
+        op.drop_column("documents", column)
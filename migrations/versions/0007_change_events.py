@@ -0,0 +1,104 @@
+"""Лента изменений: outbox change_events и триггеры, которые его пишут.
+
+Строку события вставляет триггер в той же транзакции, что и сама запись, —
+как и счётчики версий 0003, он видит массовые операции и SQL в обход
+crud.py. Триггеры строчные в обеих СУБД: событию нужен id строки. Для
+employee_roles row_id — роль, ref_id — сотрудник. TRUNCATE событий не даёт.
+Batch-миграции SQLite теряют триггеры — после них вызывать create_triggers().
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Таблица -> (колонка row_id, колонка ref_id)
+TRACKED_TABLES = {
+    "employees": ("id", None),
+    "departments": ("id", None),
+    "users": ("id", None),
+    "documents": ("id", None),
+    "vacations": ("id", None),
+    "roles": ("id", None),
+    "employee_roles": ("role_id", "employee_id"),
+}
+
+# Имена колонок приходят аргументами триггера; to_jsonb достаёт поле по имени
+_POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION record_change() RETURNS trigger AS $$
+DECLARE
+    item jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        item := to_jsonb(OLD);
+    ELSE
+        item := to_jsonb(NEW);
+    END IF;
+    INSERT INTO change_events (table_name, row_id, ref_id, op, created_at)
+    VALUES (TG_TABLE_NAME, (item ->> TG_ARGV[0])::integer, (item ->> TG_ARGV[1])::integer,
+            lower(TG_OP), timezone('utc', now()));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def create_triggers(table: str):
+    row_column, ref_column = TRACKED_TABLES[table]
+    if op.get_bind().dialect.name == "postgresql":
+        arguments = f"'{row_column}'" + (f", '{ref_column}'" if ref_column else "")
+        op.execute(
+            f"CREATE TRIGGER {table}_changes AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION record_change({arguments})"
+        )
+        return
+    for suffix, event, row in (("ai", "INSERT", "NEW"), ("au", "UPDATE", "NEW"), ("ad", "DELETE", "OLD")):
+        ref = f"{row}.{ref_column}" if ref_column else "NULL"
+        op.execute(
+            f"CREATE TRIGGER {table}_changes_{suffix} AFTER {event} ON {table} BEGIN "
+            f"INSERT INTO change_events (table_name, row_id, ref_id, op, created_at) "
+            f"VALUES ('{table}', {row}.{row_column}, {ref}, '{event.lower()}', CURRENT_TIMESTAMP); END"
+        )
+
+
+def drop_triggers(table: str):
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_changes ON {table}")
+        return
+    for suffix in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_changes_{suffix}")
+
+
+def upgrade():
+    op.create_table(
+        "change_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("table_name", sa.String(64), nullable=False),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.Column("ref_id", sa.Integer()),
+        sa.Column("op", sa.String(6), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        # AUTOINCREMENT: без него SQLite отдаёт освободившиеся после чистки номера
+        # повторно, и клиент с Last-Event-ID пропустил бы события
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_change_events_created_at", "change_events", ["created_at"])
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(_POSTGRES_FUNCTION)
+    for table in TRACKED_TABLES:
+        create_triggers(table)
+
+
+def downgrade():
+    for table in TRACKED_TABLES:
+        drop_triggers(table)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS record_change()")
+    op.drop_index("ix_change_events_created_at", table_name="change_events")
+    op.drop_table("change_events")
@@ -0,0 +1,63 @@
+"""Правила ON DELETE для ссылок на сотрудника и роль.
+
+Удаление сотрудника одной командой DELETE: связи с ролями удаляются
+(CASCADE), документы, отпуска, учётные записи и отделы остаются без ссылки
+(SET NULL) — то же, что раньше делал ORM при db.delete(employee), только
+без загрузки связанных строк. Удаление роли так же чистит employee_roles.
+
+SQLite меняет внешний ключ только пересозданием таблицы (batch), а вместе
+с таблицей пропадают её триггеры (0003, 0007) — их текст сохраняется из
+sqlite_master до пересоздания и выполняется после.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка, на какую таблицу ссылается, ON DELETE)
+FOREIGN_KEYS = (
+    ("employee_roles", "employee_id", "employees", "CASCADE"),
+    ("employee_roles", "role_id", "roles", "CASCADE"),
+    ("documents", "employee_id", "employees", "SET NULL"),
+    ("vacations", "employee_id", "employees", "SET NULL"),
+    ("users", "employee_id", "employees", "SET NULL"),
+    ("departments", "manager_id", "employees", "SET NULL"),
+)
+
+# Имена как у PostgreSQL по умолчанию; SQLite по ним находит безымянные ключи
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _replace_foreign_keys(upgrade: bool):
+    bind = op.get_bind()
+    for table in dict.fromkeys(table for table, *_ in FOREIGN_KEYS):
+        triggers = []
+        if bind.dialect.name == "sqlite":
+            triggers = bind.execute(sa.text(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"
+            ), {"table": table}).scalars().all()
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            for name, column, referred, ondelete in FOREIGN_KEYS:
+                if name != table:
+                    continue
+                constraint = f"{table}_{column}_fkey"
+                batch.drop_constraint(constraint, type_="foreignkey")
+                batch.create_foreign_key(constraint, referred, [column], ["id"],
+                                         ondelete=ondelete if upgrade else None)
+        for sql in triggers:
+            op.execute(sql)
+
+
+def upgrade():
+    _replace_foreign_keys(upgrade=True)
+
+
+def downgrade():
+    _replace_foreign_keys(upgrade=False)
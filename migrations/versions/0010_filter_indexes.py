@@ -0,0 +1,29 @@
+"""Индексы колонок, по которым фильтруют списки (filters.py).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) — совпадает с объявлениями в models.py
+INDEXES = (
+    ("ix_employees_salary", "employees", ["salary"]),
+    ("ix_documents_document_type", "documents", ["document_type"]),
+    ("ix_vacations_vacation_type", "vacations", ["vacation_type"]),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,52 @@
+"""PostgreSQL: версии таблиц поднимает приложение после commit, триггеры 0003 удаляются.
+
+Триггер поднимал счётчик в транзакции писателя и держал строку
+table_versions до её конца: все писатели таблицы выстраивались в очередь, а
+запись в несколько таблиц брала эти строки в разном порядке и могла
+взаимно заблокироваться. Теперь версии поднимает http_cache.bump_versions()
+отдельной командой после commit. В SQLite триггеры остаются: писатель там
+один на всю базу, ждать на строке счётчика некому, а отдельная транзакция
+стоила бы лишнего fsync на каждую запись.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+# Как в 0003
+TRACKED_TABLES = ("employees", "departments", "users", "documents", "vacations", "roles", "employee_roles")
+
+_POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = timezone('utc', now())
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(_POSTGRES_FUNCTION)
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
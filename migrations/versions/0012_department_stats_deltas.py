@@ -0,0 +1,144 @@
+"""Сводка по отделам: триггеры пишут дельты, а не строку отдела.
+
+Триггеры 0004 обновляли строку department_stats на каждую запись в
+employees: все писатели одного отдела ждали друг друга на этой строке до
+конца своих транзакций. Теперь триггер только вставляет строку разницы в
+department_stats_deltas — общей строки нет. Чтение складывает строку
+отдела с его дельтами (по индексу department_id), а фоновая задача
+org_chart.fold_deltas() периодически переносит дельты в department_stats.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+_ACTIVE = "CASE WHEN {row}.status = 'active' THEN 1 ELSE 0 END"
+_SALARY = "COALESCE({row}.salary, 0)"
+# Отдел сменился (NULL — тоже отдел): id положительные, -1 не встречается
+_MOVED = "COALESCE(OLD.department_id, -1) <> COALESCE(NEW.department_id, -1)"
+
+_INSERT_DELTA = "INSERT INTO department_stats_deltas (department_id, headcount, active_headcount, total_salary)"
+
+_SUBTRACT = (
+    f"{_INSERT_DELTA} SELECT OLD.department_id, -1, -{_ACTIVE.format(row='OLD')}, -{_SALARY.format(row='OLD')} "
+    "WHERE OLD.department_id IS NOT NULL"
+)
+_ADD = (
+    f"{_INSERT_DELTA} SELECT NEW.department_id, 1, {_ACTIVE.format(row='NEW')}, {_SALARY.format(row='NEW')} "
+    "WHERE NEW.department_id IS NOT NULL"
+)
+# Изменение внутри отдела — одна строка разницы; без разницы строки нет
+_CHANGE = (
+    f"{_INSERT_DELTA} SELECT NEW.department_id, 0, "
+    f"{_ACTIVE.format(row='NEW')} - {_ACTIVE.format(row='OLD')}, "
+    f"{_SALARY.format(row='NEW')} - {_SALARY.format(row='OLD')} "
+    "WHERE NEW.department_id = OLD.department_id AND ("
+    f"{_ACTIVE.format(row='NEW')} <> {_ACTIVE.format(row='OLD')} "
+    f"OR {_SALARY.format(row='NEW')} <> {_SALARY.format(row='OLD')})"
+)
+_UPDATE = f"{_CHANGE}; {_SUBTRACT} AND {_MOVED}; {_ADD} AND {_MOVED};"
+
+_POSTGRES_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION maintain_department_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {_ADD};
+    ELSIF TG_OP = 'DELETE' THEN
+        {_SUBTRACT};
+    ELSE
+        {_UPDATE}
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_SQLITE_TRIGGERS = {
+    "employees_department_stats_ai": f"AFTER INSERT ON employees BEGIN {_ADD}; END",
+    "employees_department_stats_ad": f"AFTER DELETE ON employees BEGIN {_SUBTRACT}; END",
+    "employees_department_stats_au": f"AFTER UPDATE OF department_id, salary, status ON employees BEGIN {_UPDATE} END",
+}
+
+# Тела триггеров 0004 для отката
+_SUBTRACT_0004 = f"""
+    UPDATE department_stats SET
+        headcount = headcount - 1,
+        active_headcount = active_headcount - {_ACTIVE.format(row="OLD")},
+        total_salary = total_salary - COALESCE(OLD.salary, 0)
+    WHERE department_id = OLD.department_id;
+"""
+_ADD_0004 = f"""
+    INSERT INTO department_stats (department_id, headcount, active_headcount, total_salary)
+    SELECT NEW.department_id, 1, {_ACTIVE.format(row="NEW")}, COALESCE(NEW.salary, 0)
+    WHERE NEW.department_id IS NOT NULL
+    ON CONFLICT (department_id) DO UPDATE SET
+        headcount = department_stats.headcount + excluded.headcount,
+        active_headcount = department_stats.active_headcount + excluded.active_headcount,
+        total_salary = department_stats.total_salary + excluded.total_salary;
+"""
+_POSTGRES_FUNCTION_0004 = f"""
+CREATE OR REPLACE FUNCTION maintain_department_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        {_SUBTRACT_0004}
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {_ADD_0004}
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+_SQLITE_TRIGGERS_0004 = {
+    "employees_department_stats_ai": f"AFTER INSERT ON employees BEGIN {_ADD_0004} END",
+    "employees_department_stats_ad": f"AFTER DELETE ON employees BEGIN {_SUBTRACT_0004} END",
+    "employees_department_stats_au": (
+        f"AFTER UPDATE OF department_id, salary, status ON employees BEGIN {_SUBTRACT_0004} {_ADD_0004} END"
+    ),
+}
+
+
+def _replace_triggers(postgres_function: str, sqlite_triggers: dict):
+    # В PostgreSQL триггер 0004 вызывает функцию по имени — достаточно заменить её тело
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(postgres_function)
+        return
+    for name, body in sqlite_triggers.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def upgrade():
+    op.create_table(
+        "department_stats_deltas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("department_id", sa.Integer(), nullable=False),
+        sa.Column("headcount", sa.Integer(), nullable=False),
+        sa.Column("active_headcount", sa.Integer(), nullable=False),
+        sa.Column("total_salary", sa.DECIMAL(18, 2), nullable=False),
+    )
+    op.create_index("ix_department_stats_deltas_department_id", "department_stats_deltas", ["department_id"])
+    _replace_triggers(_POSTGRES_FUNCTION, _SQLITE_TRIGGERS)
+
+
+def downgrade():
+    _replace_triggers(_POSTGRES_FUNCTION_0004, _SQLITE_TRIGGERS_0004)
+    # Несвёрнутые дельты — в строки отделов, как сделал бы fold_deltas()
+    op.execute("""
+        INSERT INTO department_stats (department_id, headcount, active_headcount, total_salary)
+        SELECT department_id, SUM(headcount), SUM(active_headcount), SUM(total_salary)
+        FROM department_stats_deltas WHERE true GROUP BY department_id
+        ON CONFLICT (department_id) DO UPDATE SET
+            headcount = department_stats.headcount + excluded.headcount,
+            active_headcount = department_stats.active_headcount + excluded.active_headcount,
+            total_salary = department_stats.total_salary + excluded.total_salary
+    """)
+    op.drop_index("ix_department_stats_deltas_department_id", table_name="department_stats_deltas")
+    op.drop_table("department_stats_deltas")
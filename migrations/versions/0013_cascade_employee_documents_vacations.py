@@ -0,0 +1,77 @@
+"""Документы и отпуска удаляются вместе с сотрудником (ON DELETE CASCADE).
+
+0009 оставляла их без ссылки (SET NULL), но в API employee_id документа и
+отпуска обязателен: после удаления сотрудника GET /documents/ и /vacations/
+падали на валидации ответа. Строки, уже оставшиеся без сотрудника (их
+обнуляли 0009 и ORM до неё), переносятся в архив — таблицы
+documents_orphaned и vacations_orphaned с теми же колонками — и только потом
+удаляются. Архив создаётся, только если такие строки есть; разобрать его
+(найти сотрудника, перенести обратно или удалить) решает оператор. Откат
+возвращает строки из архива и удаляет его.
+
+Пересоздание таблиц SQLite с сохранением триггеров — как в 0009.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+"""
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+TABLES = ("documents", "vacations")
+
+# Архив строк без сотрудника; migrations/env.py исключает его из autogenerate
+ARCHIVES = {"documents": "documents_orphaned", "vacations": "vacations_orphaned"}
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Как в 0009
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _replace_foreign_keys(ondelete: str):
+    bind = op.get_bind()
+    for table in TABLES:
+        triggers = []
+        if bind.dialect.name == "sqlite":
+            triggers = bind.execute(sa.text(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"
+            ), {"table": table}).scalars().all()
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            constraint = f"{table}_employee_id_fkey"
+            batch.drop_constraint(constraint, type_="foreignkey")
+            batch.create_foreign_key(constraint, "employees", ["employee_id"], ["id"], ondelete=ondelete)
+        for sql in triggers:
+            op.execute(sql)
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        orphaned = bind.execute(sa.text(f"SELECT COUNT(*) FROM {table} WHERE employee_id IS NULL")).scalar()
+        if not orphaned:
+            continue
+        archive = ARCHIVES[table]
+        op.execute(f"CREATE TABLE {archive} AS SELECT * FROM {table} WHERE employee_id IS NULL")
+        op.execute(f"DELETE FROM {table} WHERE employee_id IS NULL")
+        logger.warning("Moved %d %s rows without an employee to %s", orphaned, table, archive)
+    _replace_foreign_keys("CASCADE")
+
+
+def downgrade():
+    _replace_foreign_keys("SET NULL")
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        archive = ARCHIVES[table]
+        if not inspector.has_table(archive):
+            continue
+        columns = ", ".join(column["name"] for column in inspector.get_columns(archive))
+        op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {archive}")
+        op.execute(f"DROP TABLE {archive}")
@@ -0,0 +1,89 @@
+"""Поисковый индекс сотрудников (search.py): FTS5 в SQLite, pg_trgm в PostgreSQL.
+
+Раньше его создавал search.install() при импорте main: DDL шла в каждом
+воркере на каждом старте, мимо Alembic, а на пустой базе импорт падал.
+
+SQLite: FTS5-таблица employees_fts с trigram-токенизатором поверх employees
+(content='employees') и триггеры, которые держат её в актуальном состоянии.
+Строки, бывшие в employees до миграции, индексируются одним 'rebuild'.
+
+PostgreSQL: GIN-индексы pg_trgm на колонках поиска. Расширение создаётся,
+только если его ещё нет; с PostgreSQL 13 pg_trgm доверенное и его может
+создать владелец базы. Без пакета contrib на сервере миграция
+останавливается: поиск без расширения не работает (similarity()).
+Таблицы и индексы, созданные search.install() раньше, остаются как есть
+(IF NOT EXISTS).
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+# Как в search.py
+FTS_TABLE = "employees_fts"
+SEARCH_COLUMNS = ("last_name", "first_name", "employee_code")
+
+_SQLITE_TRIGGERS = {
+    "employees_fts_ai": f"""AFTER INSERT ON employees BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, last_name, first_name, employee_code)
+        VALUES (new.id, new.last_name, new.first_name, new.employee_code);
+    END""",
+    "employees_fts_ad": f"""AFTER DELETE ON employees BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, last_name, first_name, employee_code)
+        VALUES ('delete', old.id, old.last_name, old.first_name, old.employee_code);
+    END""",
+    "employees_fts_au": f"""AFTER UPDATE ON employees BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, last_name, first_name, employee_code)
+        VALUES ('delete', old.id, old.last_name, old.first_name, old.employee_code);
+        INSERT INTO {FTS_TABLE}(rowid, last_name, first_name, employee_code)
+        VALUES (new.id, new.last_name, new.first_name, new.employee_code);
+    END""",
+}
+
+
+def _postgres_extension(bind):
+    installed = bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+    if installed:
+        return
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    if not available:
+        raise RuntimeError("pg_trgm is not available on the server: install the PostgreSQL contrib package")
+    op.execute("CREATE EXTENSION pg_trgm")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        exists = sa.inspect(bind).has_table(FTS_TABLE)
+        op.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            last_name, first_name, employee_code,
+            content='employees', content_rowid='id', tokenize='trigram'
+        )""")
+        for name, body in _SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        if not exists:
+            op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif bind.dialect.name == "postgresql":
+        _postgres_extension(bind)
+        for column in SEARCH_COLUMNS:
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_employees_{column}_trgm "
+                       f"ON employees USING gin ({column} gin_trgm_ops)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for name in _SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif bind.dialect.name == "postgresql":
+        # Расширение остаётся: им могут пользоваться другие объекты базы
+        for column in SEARCH_COLUMNS:
+            op.execute(f"DROP INDEX IF EXISTS ix_employees_{column}_trgm")
@@ -0,0 +1,31 @@
+"""Индексы на lower() колонок поиска: точные и префиксные совпадения без просмотра таблицы.
+
+search.py берёт кандидатов уровнями _rank; точные совпадения и префиксы
+фамилии, имени и номера ищутся по этим индексам. PostgreSQL строит их в
+COLLATE "C": диапазон [префикс, следующая строка) тогда — ровно префикс.
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0015"
+down_revision = "0014"
+branch_labels = None
+depends_on = None
+
+# Как в search.py
+SEARCH_COLUMNS = ("last_name", "first_name", "employee_code")
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for column in SEARCH_COLUMNS:
+        expression = f'(lower({column}) COLLATE "C")' if postgres else f"lower({column})"
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_employees_lower_{column} ON employees ({expression})")
+
+
+def downgrade():
+    for column in SEARCH_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_employees_lower_{column}")
@@ -0,0 +1,41 @@
+"""SQLite: FTS-строка сотрудника переписывается только при смене колонок поиска.
+
+Триггер employees_fts_au (0014, раньше search.install) срабатывал на любой
+UPDATE employees и удалял-вставлял строку FTS даже при смене оклада или
+статуса — массовые обновления и увольнение платили за переиндексацию зря.
+Теперь он AFTER UPDATE OF last_name, first_name, employee_code.
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0016"
+down_revision = "0015"
+branch_labels = None
+depends_on = None
+
+FTS_TABLE = "employees_fts"
+
+_BODY = f"""BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, last_name, first_name, employee_code)
+        VALUES ('delete', old.id, old.last_name, old.first_name, old.employee_code);
+        INSERT INTO {FTS_TABLE}(rowid, last_name, first_name, employee_code)
+        VALUES (new.id, new.last_name, new.first_name, new.employee_code);
+    END"""
+
+
+def _replace_trigger(event: str):
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS employees_fts_au")
+    op.execute(f"CREATE TRIGGER employees_fts_au AFTER {event} ON employees {_BODY}")
+
+
+def upgrade():
+    _replace_trigger("UPDATE OF last_name, first_name, employee_code")
+
+
+def downgrade():
+    _replace_trigger("UPDATE")
@@ -2,7 +2,7 @@ from datetime import datetime, date
 from enum import Enum as PyEnum
 from sqlalchemy import (
     Column, Integer, String, Date, Enum, ForeignKey, DECIMAL,
-    Boolean, DateTime, Text, Table
+    BigInteger, Boolean, DateTime, Text, Table, Index, UniqueConstraint, JSON
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -36,8 +36,10 @@ class RoleStatusEnum(str, PyEnum):
 employee_roles = Table(
     "employee_roles",
     Base.metadata,
-    Column("employee_id", Integer, ForeignKey("employees.id"), primary_key=True),
-    Column("role_id", Integer, ForeignKey("roles.id"), primary_key=True)
+    Column("employee_id", Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True),
+    Column("role_id", Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
+    # employee_id покрыт первичным ключом (employee_id, role_id), role_id — нет
+    Index("ix_employee_roles_role_id", "role_id"),
 )
 
 # ---------- EMPLOYEES ----------
@@ -49,10 +51,10 @@ class Employee(Base):
     last_name = Column(String(50), nullable=False)
     first_name = Column(String(50), nullable=False)
     position = Column(String(100))
-    hire_date = Column(Date)
-    salary = Column(DECIMAL(10, 2))
+    hire_date = Column(Date, index=True)
+    salary = Column(DECIMAL(10, 2), index=True)
     status = Column(Enum("active", "inactive", name="employee_status"), default="active")
-    department_id = Column(Integer, ForeignKey("departments.id"))
+    department_id = Column(Integer, ForeignKey("departments.id"), index=True)
 
     department = relationship(
         "Department",
@@ -64,13 +66,21 @@ class Employee(Base):
         "Department",
         back_populates="manager",
         uselist=False,
-        foreign_keys="Department.manager_id"  # строка — для ленивой загрузки
+        foreign_keys="Department.manager_id",  # строка — для ленивой загрузки
+        passive_deletes=True
     )
 
-    documents = relationship("Document", back_populates="employee")
-    vacations = relationship("Vacation", back_populates="employee")
-    users = relationship("User", back_populates="employee")
-    roles = relationship("Role", secondary=employee_roles, back_populates="employees")
+    # Зависимые строки при удалении обрабатывает БД (ON DELETE, миграции 0009, 0013):
+    # ORM не загружает коллекции ради обнуления ссылок. Документы и отпуска
+    # удаляются вместе с сотрудником (CASCADE), остальные ссылки обнуляются
+    documents = relationship("Document", back_populates="employee", cascade="all", passive_deletes=True)
+    vacations = relationship("Vacation", back_populates="employee", cascade="all", passive_deletes=True)
+    users = relationship("User", back_populates="employee", passive_deletes=True)
+    roles = relationship("Role", secondary=employee_roles, back_populates="employees", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_employees_status_hire_date", "status", "hire_date"),
+    )
 
 # ---------- DEPARTMENTS ----------
 class Department(Base):
@@ -79,7 +89,7 @@ class Department(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     description = Column(Text)
-    manager_id = Column(Integer, ForeignKey("employees.id"))
+    manager_id = Column(Integer, ForeignKey("employees.id", ondelete="SET NULL"), index=True)
 
     employees = relationship(
         "Employee",
@@ -103,7 +113,7 @@ class User(Base):
     password = Column(String(120), nullable=False)
     is_active = Column(Boolean, default=True)
     registration_date = Column(DateTime, default=datetime.utcnow)
-    employee_id = Column(Integer, ForeignKey("employees.id"))
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="SET NULL"), index=True)
 
     employee = relationship("Employee", back_populates="users")
 
@@ -112,11 +122,15 @@ class Document(Base):
     __tablename__ = "documents"
 
     id = Column(Integer, primary_key=True)
-    employee_id = Column(Integer, ForeignKey("employees.id"))
-    document_type = Column(Enum(DocumentTypeEnum), nullable=False)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), index=True)
+    document_type = Column(Enum(DocumentTypeEnum), nullable=False, index=True)
     file_path = Column(String(255), nullable=False)
-    expiration_date = Column(Date)
+    expiration_date = Column(Date, index=True)
     upload_date = Column(DateTime, default=datetime.utcnow)
+    # Загруженное содержимое (storage.py): хэш — ключ файла в хранилище
+    content_sha256 = Column(String(64), index=True)
+    content_size = Column(BigInteger)
+    content_type = Column(String(100))
 
     employee = relationship("Employee", back_populates="documents")
 
@@ -125,15 +139,22 @@ class Vacation(Base):
     __tablename__ = "vacations"
 
     id = Column(Integer, primary_key=True)
-    employee_id = Column(Integer, ForeignKey("employees.id"))
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"))
     start_date = Column(Date)
     end_date = Column(Date)
-    vacation_type = Column(Enum(VacationTypeEnum), nullable=False)
+    vacation_type = Column(Enum(VacationTypeEnum), nullable=False, index=True)
     status = Column(Enum(VacationStatusEnum), nullable=False)
     notes = Column(Text)
 
     employee = relationship("Employee", back_populates="vacations")
 
+    # Пересечение периодов: start_date <= :to AND end_date >= :from.
+    # Первый индекс заодно служит индексом внешнего ключа employee_id
+    __table_args__ = (
+        Index("ix_vacations_employee_period", "employee_id", "start_date", "end_date"),
+        Index("ix_vacations_status_period", "status", "end_date", "start_date"),
+    )
+
 # ---------- ROLES ----------
 class Role(Base):
     __tablename__ = "roles"
@@ -144,4 +165,100 @@ class Role(Base):
     end_date = Column(Date)
     status = Column(Enum(RoleStatusEnum), nullable=False)
 
-    employees = relationship("Employee", secondary=employee_roles, back_populates="roles")
+    employees = relationship("Employee", secondary=employee_roles, back_populates="roles", passive_deletes=True)
+
+# ---------- TABLE VERSIONS ----------
+class TableVersion(Base):
+    """
+    Счётчик изменений таблицы для ETag. PostgreSQL: поднимает
+    http_cache.bump_versions() после commit записи, SQLite: триггеры миграции 0003.
+    """
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+# ---------- DEPARTMENT STATS ----------
+class DepartmentStats(Base):
+    """
+    Численность и фонд оплаты отдела на момент последней свёртки. Свежие
+    изменения лежат в DepartmentStatsDelta; переносит их org_chart.fold_deltas().
+    """
+    __tablename__ = "department_stats"
+
+    department_id = Column(Integer, primary_key=True, autoincrement=False)
+    headcount = Column(Integer, nullable=False)
+    active_headcount = Column(Integer, nullable=False)
+    total_salary = Column(DECIMAL(18, 2), nullable=False)
+
+class DepartmentStatsDelta(Base):
+    """Изменение сводки отдела от одной записи в employees. Вставляют триггеры миграции 0012."""
+    __tablename__ = "department_stats_deltas"
+
+    id = Column(Integer, primary_key=True)
+    department_id = Column(Integer, nullable=False, index=True)
+    headcount = Column(Integer, nullable=False)
+    active_headcount = Column(Integer, nullable=False)
+    total_salary = Column(DECIMAL(18, 2), nullable=False)
+
+# ---------- DOCUMENT NOTIFICATIONS ----------
+class DocumentNotification(Base):
+    """
+    Исходящее уведомление об истекающем документе (outbox). Пишет сканер
+    expiration.py, читает и отмечает processed_at внешний обработчик.
+    """
+    __tablename__ = "document_notifications"
+
+    id = Column(Integer, primary_key=True)
+    # Без внешних ключей: уведомление — снимок, переживает удаление документа
+    document_id = Column(Integer, nullable=False)
+    employee_id = Column(Integer)
+    document_type = Column(String(32), nullable=False)
+    expiration_date = Column(Date, nullable=False)
+    window_days = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+
+    # Повторный проход сканера не дублирует уведомление; продлённый документ
+    # (новая expiration_date) получает новое
+    __table_args__ = (
+        UniqueConstraint("document_id", "expiration_date", "window_days",
+                         name="uq_document_notifications_document_window"),
+        Index("ix_document_notifications_pending", "processed_at", "id"),
+    )
+
+# ---------- CHANGE EVENTS ----------
+class ChangeEvent(Base):
+    """Запись ленты изменений (outbox). Пишут триггеры миграции 0007, читает changes.py."""
+    __tablename__ = "change_events"
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(64), nullable=False)
+    # Без внешних ключей: событие об удалении переживает строку
+    row_id = Column(Integer, nullable=False)
+    ref_id = Column(Integer)
+    op = Column(String(6), nullable=False)
+    created_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_change_events_created_at", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+# ---------- AUDIT LOG ----------
+class AuditLog(Base):
+    """Изменение полей сущности: {поле: {"old": ..., "new": ...}}. Пишет audit.py пачками."""
+    __tablename__ = "audit_log"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(32), nullable=False)  # имя таблицы
+    # Без внешних ключей: история переживает удаление сущности и пользователя
+    entity_id = Column(Integer, nullable=False)
+    changes = Column(JSON, nullable=False)
+    changed_by = Column(Integer)  # users.id из токена; None — без аутентификации
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_audit_log_entity", "entity", "entity_id", "id"),
+    )
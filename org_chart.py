@@ -0,0 +1,212 @@
+"""
+Оргструктура: численность и фонд оплаты по отделам и подчинённые руководителя.
+
+    python -m org_chart            # свёртка сводки раз в --interval секунд
+    python -m org_chart --once     # одна свёртка (cron)
+
+Агрегаты считает SQL: по сводке или GROUP BY по employees. Сводку ведут
+триггеры миграции 0012: на каждую запись в employees они вставляют строку
+разницы в department_stats_deltas, а не обновляют строку отдела, поэтому
+писатели одного отдела друг друга не ждут. Чтение прибавляет к строке отдела в
+department_stats сумму его дельт (по индексу department_id). fold_deltas()
+переносит дельты в department_stats, чтобы их оставалось немного; в
+приложении — фоновой задачей раз в DEPARTMENT_STATS_FOLD_SECONDS.
+
+Подчинённые — рекурсивный CTE: отделы, которыми руководит сотрудник, и далее
+отделы, которыми руководят сотрудники этих отделов.
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Float, case, cast, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+import models
+
+logger = logging.getLogger("org_chart")
+
+# INSERT ... ON CONFLICT есть в обеих СУБД, но строится диалектом
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Дельт за одну транзакцию свёртки
+FOLD_BATCH_SIZE = 10000
+
+
+def _live_totals(department_id: Optional[int]):
+    employee = models.Employee
+    query = (
+        select(
+            employee.department_id.label("department_id"),
+            func.count().label("headcount"),
+            func.sum(case((employee.status == "active", 1), else_=0)).label("active_headcount"),
+            func.sum(employee.salary).label("total_salary"),
+        )
+        .where(employee.department_id.is_not(None))
+        .group_by(employee.department_id)
+    )
+    # Фильтр по отделу внутри GROUP BY: SQLite не переносит его из внешнего запроса
+    if department_id is not None:
+        query = query.where(employee.department_id == department_id)
+    return query.subquery("department_totals")
+
+
+def _pending(column):
+    """Сумма несвёрнутых дельт отдела текущей строки departments."""
+    delta = models.DepartmentStatsDelta
+    return (
+        select(func.coalesce(func.sum(column), 0))
+        .where(delta.department_id == models.Department.id)
+        .scalar_subquery()
+    )
+
+
+def stats_query(db: Session, summary: bool = True, department_id: Optional[int] = None):
+    """Отделы с численностью и фондом оплаты; отдел без сотрудников — нули."""
+    totals = models.DepartmentStats.__table__ if summary else _live_totals(department_id)
+    headcount = func.coalesce(totals.c.headcount, 0)
+    active_headcount = func.coalesce(totals.c.active_headcount, 0)
+    total_salary = func.coalesce(totals.c.total_salary, 0)
+    if summary:
+        delta = models.DepartmentStatsDelta
+        headcount = headcount + _pending(delta.headcount)
+        active_headcount = active_headcount + _pending(delta.active_headcount)
+        total_salary = total_salary + _pending(delta.total_salary)
+    total_salary = cast(total_salary, Float)
+    query = (
+        db.query(models.Department)
+        .outerjoin(totals, totals.c.department_id == models.Department.id)
+        .with_entities(
+            models.Department.id,
+            models.Department.name,
+            headcount.label("headcount"),
+            active_headcount.label("active_headcount"),
+            total_salary.label("total_salary"),
+            (total_salary / func.nullif(headcount, 0)).label("average_salary"),
+        )
+    )
+    if department_id is not None:
+        query = query.filter(models.Department.id == department_id)
+    return query
+
+
+def fold_deltas(db: Session, batch_size: int = FOLD_BATCH_SIZE) -> int:
+    """
+    Переносит дельты в department_stats пачками, каждая — своя транзакция;
+    возвращает число свёрнутых дельт. DELETE ... RETURNING: в сумму попадают
+    ровно удалённые строки, дельта незавершённой транзакции дождётся следующей
+    свёртки. Строки отделов обновляются в порядке department_id.
+    """
+    delta, stats = models.DepartmentStatsDelta, models.DepartmentStats
+    folded = 0
+    while True:
+        batch = select(delta.id).order_by(delta.id).limit(batch_size)
+        rows = db.execute(
+            delete(delta).where(delta.id.in_(batch))
+            .returning(delta.department_id, delta.headcount, delta.active_headcount, delta.total_salary)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            db.commit()
+            return folded
+        totals = {}
+        for row in rows:
+            total = totals.setdefault(row.department_id, [0, 0, Decimal(0)])
+            total[0] += row.headcount
+            total[1] += row.active_headcount
+            total[2] += row.total_salary
+        statement = _INSERTS[db.get_bind().dialect.name](stats)
+        statement = statement.on_conflict_do_update(index_elements=[stats.department_id], set_={
+            "headcount": stats.headcount + statement.excluded.headcount,
+            "active_headcount": stats.active_headcount + statement.excluded.active_headcount,
+            "total_salary": stats.total_salary + statement.excluded.total_salary,
+        })
+        db.execute(statement, [
+            {"department_id": department_id, "headcount": headcount,
+             "active_headcount": active_headcount, "total_salary": total_salary}
+            for department_id, (headcount, active_headcount, total_salary) in sorted(totals.items())
+        ])
+        db.commit()
+        folded += len(rows)
+        if len(rows) < batch_size:
+            return folded
+
+
+def fold(session_factory, batch_size: int = FOLD_BATCH_SIZE) -> int:
+    with session_factory() as db:
+        folded = fold_deltas(db, batch_size)
+    if folded:
+        logger.info("Folded %d department stats deltas", folded)
+    return folded
+
+
+class BackgroundFold:
+    """Фоновая задача приложения: свёртка раз в interval секунд."""
+
+    def __init__(self, session_factory, interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.to_thread(fold, self.session_factory)
+            except Exception:
+                logger.exception("Department stats fold failed")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def reports_query(db: Session, manager_id: int):
+    """Все подчинённые сотрудника, прямые и через подчинённые отделы, без него самого."""
+    department = models.Department
+    managed = (
+        select(department.id.label("department_id"))
+        .where(department.manager_id == manager_id)
+        .cte("managed", recursive=True)
+    )
+    # UNION, а не UNION ALL: цикл в руководстве не зацикливает рекурсию
+    managed = managed.union(
+        select(department.id)
+        .join(models.Employee, models.Employee.id == department.manager_id)
+        .join(managed, managed.c.department_id == models.Employee.department_id)
+    )
+    return db.query(models.Employee).filter(
+        models.Employee.department_id.in_(select(managed.c.department_id)),
+        models.Employee.id != manager_id,
+    )
+
+
+def main():
+    from config import settings
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--interval", type=float, default=settings.department_stats_fold_seconds or 60)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        fold(SessionLocal)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# ---------- CURSOR ENCODING ----------
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    # Курсор приходит от клиента: испорченное значение — 400, а не 500
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+        if python_type is int:
+            return int(value)
+    except (ValueError, TypeError, InvalidOperation):
+        raise InvalidCursor("Invalid cursor")
+    return value
+
+
+def encode_cursor(obj, sort: Optional[str] = None) -> str:
+    payload = {"id": obj.id}
+    if sort:
+        payload["s"] = sort
+        payload["v"] = _encode_value(getattr(obj, sort.lstrip("-")))
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    return payload
+
+
+# ---------- KEYSET PAGINATION ----------
+def sort_column(model, sort: Optional[str], allowed):
+    """Возвращает колонку сортировки и признак убывания."""
+    if not sort:
+        return None, False
+    name = sort.lstrip("-")
+    if name not in allowed:
+        raise InvalidCursor(f"Sorting by '{name}' is not supported")
+    return getattr(model, name), sort.startswith("-")
+
+
+def paginate(query, model, *, skip: int = 0, limit: int = 100,
+             cursor: Optional[str] = None, sort: Optional[str] = None, allowed_sorts=()):
+    """
+    Keyset-пагинация по (sort, id). Если cursor не передан — первая страница
+    (или skip, для обратной совместимости с OFFSET-режимом).
+    """
+    column, descending = sort_column(model, sort, allowed_sorts)
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort:
+            raise InvalidCursor("Cursor does not match sort order")
+        last_id = payload["id"]
+        if column is None:
+            query = query.filter(model.id > last_id)
+        else:
+            last_value = _decode_value(column, payload.get("v"))
+            after = column < last_value if descending else column > last_value
+            if last_value is None:
+                # NULL-значения идут последними: дальше только NULL с большим id
+                query = query.filter(and_(column.is_(None), model.id > last_id))
+            else:
+                query = query.filter(or_(
+                    after,
+                    and_(column == last_value, model.id > last_id),
+                    column.is_(None),
+                ))
+
+    if column is not None:
+        ordering = column.desc() if descending else column.asc()
+        query = query.order_by(ordering.nulls_last(), model.id)
+    else:
+        query = query.order_by(model.id)
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def next_cursor(items, limit: int, sort: Optional[str] = None) -> Optional[str]:
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(items[-1], sort)
+
+
+def with_next_cursor(response, items, limit: int, sort: Optional[str] = None):
+    """Кладёт курсор следующей страницы в заголовок X-Next-Cursor."""
+    cursor = next_cursor(items, limit, sort)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+    return items
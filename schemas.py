@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from enum import Enum
 
 # ---------- ENUMS ----------
@@ -62,6 +62,9 @@ class Employee(EmployeeBase):
     class Config:
         from_attributes = True
 
+class EmployeeBulkUpdate(EmployeeUpdate):
+    id: int
+
 # ---------- USER ----------
 class UserBase(BaseModel):
     username: str
@@ -86,6 +89,24 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+# ---------- AUTH ----------
+class TokenRequest(BaseModel):
+    username: str
+    password: str
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int  # секунд
+
+class Principal(BaseModel):
+    """Пользователь токена; кэшируется в auth.py, поэтому только нужные поля."""
+    user_id: int
+    username: str
+    is_active: bool
+    employee_id: Optional[int] = None
+    department_id: Optional[int] = None
+
 # ---------- DEPARTMENT ----------
 class DepartmentBase(BaseModel):
     name: str
@@ -101,6 +122,17 @@ class Department(DepartmentBase):
     class Config:
         from_attributes = True
 
+class DepartmentStats(BaseModel):
+    id: int
+    name: str
+    headcount: int
+    active_headcount: int
+    total_salary: float
+    average_salary: Optional[float]
+
+    class Config:
+        from_attributes = True
+
 # ---------- DOCUMENT ----------
 class DocumentBase(BaseModel):
     employee_id: int
@@ -114,6 +146,9 @@ class DocumentCreate(DocumentBase):
 class Document(DocumentBase):
     id: int
     upload_date: datetime
+    content_sha256: Optional[str] = None
+    content_size: Optional[int] = None
+    content_type: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -136,6 +171,10 @@ class Vacation(VacationBase):
     class Config:
         from_attributes = True
 
+class CalendarDay(BaseModel):
+    day: date
+    absent: int  # сотрудников в отпуске в этот день
+
 # ---------- ROLE ----------
 class RoleBase(BaseModel):
     role_type: RoleType
@@ -148,7 +187,69 @@ class RoleCreate(RoleBase):
 
 class Role(RoleBase):
     id: int
-    employees: List[Employee] = []
 
     class Config:
         from_attributes = True
+
+class RoleMembers(BaseModel):
+    employee_ids: List[int]
+
+class RoleMembersResult(BaseModel):
+    requested: int  # уникальных id в запросе
+    changed: int  # добавлено / удалено пар employee_roles
+    missing_ids: List[int] = []  # сотрудников с такими id нет, пропущены
+
+# ---------- OFFBOARDING ----------
+class EmployeeOffboard(BaseModel):
+    # Ровно одно из двух: список сотрудников или весь штат отдела
+    employee_ids: Optional[List[int]] = None
+    department_id: Optional[int] = None
+
+class OffboardResult(BaseModel):
+    requested: int  # уникальных id в запросе или сотрудников отдела
+    offboarded: int  # переведено в inactive (уже уволенные не считаются)
+    users_disabled: int
+    memberships_removed: int  # удалено пар employee_roles
+    vacations_cancelled: int  # ещё не начавшиеся отпуска переведены в rejected
+    departments_unassigned: int  # отделов, оставшихся без руководителя
+    missing_ids: List[int] = []
+
+# ---------- HISTORY ----------
+class FieldChange(BaseModel):
+    old: Any = None
+    new: Any = None
+
+class HistoryEntry(BaseModel):
+    id: int
+    changes: Dict[str, FieldChange]  # у пароля значения не хранятся, только факт смены
+    changed_by: Optional[int] = None
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# ---------- EXPANDED (?include=) ----------
+# Вложенные данные присутствуют только если клиент запросил их через ?include=
+class EmployeeExpanded(Employee):
+    department: Optional[Department] = None
+    documents: Optional[List[Document]] = None
+    vacations: Optional[List[Vacation]] = None
+
+class DepartmentExpanded(Department):
+    manager: Optional[Employee] = None
+    employees: Optional[List[Employee]] = None
+
+class RoleExpanded(Role):
+    employees: Optional[List[Employee]] = None
+
+# ---------- BULK ----------
+class BulkError(BaseModel):
+    index: int  # позиция строки во входном массиве / NDJSON
+    error: str
+    id: Optional[int] = None
+
+class BulkResult(BaseModel):
+    processed: int
+    succeeded: int
+    ids: List[int] = []
+    errors: List[BulkError] = []
@@ -0,0 +1,98 @@
+from sqlalchemy import and_, case, column, func, literal_column, or_, select, table, union
+from sqlalchemy.orm import Session
+import models
+
+# Поиск сотрудников по подстроке в фамилии, имени и табельном номере.
+# SQLite: FTS5-таблица с trigram-токенизатором, синхронизируется триггерами.
+# PostgreSQL: GIN-индексы pg_trgm, которые использует ILIKE '%...%'.
+# Таблицу, триггеры и индексы создаёт миграция 0014.
+#
+# Кандидаты — объединение уровней _rank: точные совпадения и совпадения по
+# префиксу берутся по индексам на lower(колонки) (миграция 0015), каждое до
+# CANDIDATE_LIMIT, к ним — до CANDIDATE_LIMIT любых совпадений по подстроке.
+# Лучшие результаты в отсечку не попадают, а всё множество совпадений
+# неизбирательного запроса ("ва", "ов") не читается и не сортируется.
+
+FTS_TABLE = "employees_fts"
+SEARCH_COLUMNS = ("last_name", "first_name", "employee_code")
+MIN_TRIGRAM_LENGTH = 3
+# Сколько кандидатов берёт каждый уровень
+CANDIDATE_LIMIT = 2000
+
+# Индексы pg_trgm (0014) и lower() (0015); в моделях их нет, autogenerate их
+# пропускает (migrations/env.py)
+TRIGRAM_INDEXES = tuple(f"ix_employees_{name}_trgm" for name in SEARCH_COLUMNS)
+LOWER_INDEXES = tuple(f"ix_employees_lower_{name}" for name in SEARCH_COLUMNS)
+
+employees_fts = table(FTS_TABLE, column("rowid"))
+
+def _rank(query: str):
+    # Точное совпадение фамилии или номера, затем совпадение по префиксу
+    lowered = query.lower()
+    return case(
+        (func.lower(models.Employee.last_name) == lowered, 0),
+        (func.lower(models.Employee.employee_code) == lowered, 0),
+        (func.lower(models.Employee.last_name).startswith(lowered, autoescape=True), 1),
+        (func.lower(models.Employee.first_name).startswith(lowered, autoescape=True), 2),
+        else_=3,
+    )
+
+
+def _lowered(name: str, dialect: str):
+    # Индекс PostgreSQL построен в COLLATE "C": в нём диапазон строк — это префикс
+    expression = func.lower(getattr(models.Employee, name))
+    return expression.collate("C") if dialect == "postgresql" else expression
+
+
+def _ranked_candidates(lowered: str, dialect: str) -> list:
+    """Точные совпадения фамилии и номера, префиксы фамилии и имени — по индексам lower()."""
+    # Следующая за префиксом строка: всё, что начинается с lowered, меньше неё
+    upper = lowered[:-1] + chr(ord(lowered[-1]) + 1)
+    tiers = [_lowered("last_name", dialect) == lowered, _lowered("employee_code", dialect) == lowered]
+    tiers += [and_(_lowered(name, dialect) >= lowered, _lowered(name, dialect) < upper)
+              for name in ("last_name", "first_name")]
+    return [select(models.Employee.id).where(condition).limit(CANDIDATE_LIMIT) for condition in tiers]
+
+
+def _like_pattern(query: str, prefix_only: bool) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+
+def search_employees(db: Session, query: str, limit: int = 20):
+    query = query.strip()
+    if not query:
+        return []
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite" and len(query) >= MIN_TRIGRAM_LENGTH:
+        match = '"' + query.replace('"', '""') + '"'
+        candidates = (
+            select(employees_fts.c.rowid)
+            .where(literal_column(FTS_TABLE).op("MATCH")(match))
+            .limit(CANDIDATE_LIMIT)
+        )
+    else:
+        columns = [getattr(models.Employee, name) for name in SEARCH_COLUMNS]
+        # Триграммный индекс не работает на коротких строках — для них ищем по префиксу
+        pattern = _like_pattern(query, prefix_only=len(query) < MIN_TRIGRAM_LENGTH)
+        candidates = (
+            select(models.Employee.id)
+            .where(or_(*(attr.ilike(pattern, escape="\\") for attr in columns)))
+            .limit(CANDIDATE_LIMIT)
+        )
+
+    # SQLite не допускает LIMIT у частей UNION — каждая часть в подзапросе
+    parts = [candidates, *_ranked_candidates(query.lower(), dialect)]
+    candidates = union(*(select(part.subquery().c[0]) for part in parts))
+
+    ordering = [_rank(query)]
+    if dialect == "postgresql" and len(query) >= MIN_TRIGRAM_LENGTH:
+        ordering.append(func.similarity(models.Employee.last_name, query).desc())
+    return (
+        db.query(models.Employee)
+        .filter(models.Employee.id.in_(candidates.scalar_subquery()))
+        .order_by(*ordering, models.Employee.last_name, models.Employee.id)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,75 @@
+from typing import List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import Float, Numeric, cast
+from sqlalchemy.orm import Session
+import crud
+import models
+import schemas
+import vacation_calendar
+from filters import DOCUMENT_FILTERS, EMPLOYEE_FILTERS, VACATION_FILTERS
+from pagination import paginate, with_next_cursor
+
+# Быстрая сериализация списков (FAST_SERIALIZATION=true). Обычный путь: ORM-объекты
+# (гидратация, identity map), затем валидация response_model по атрибутам и JSON.
+# Быстрый: SELECT только колонок схемы, строки как dict и один проход
+# TypeAdapter.dump_json в pydantic-core без валидации — готовые байты в Response.
+# Типы колонок совпадают со схемой; DECIMAL приводится к float в SQL.
+# Списки с ?include= идут обычным путём.
+
+
+def _column(model, name: str):
+    column = getattr(model, name)
+    if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+        return cast(column, Float).label(name)
+    return column
+
+
+class Projection:
+    def __init__(self, model, schema, allowed_sorts=(), filters=None):
+        self.model = model
+        self.allowed_sorts = allowed_sorts
+        self.filters = filters  # filters.FilterSet ресурса
+        self.columns = [
+            _column(model, name) for name in schema.model_fields if name in model.__table__.columns
+        ]
+        self.adapter = TypeAdapter(List[schema])
+
+    def rows(self, db: Session, page) -> List[dict]:
+        return [row._asdict() for row in page]
+
+    def dump(self, db: Session, page) -> bytes:
+        # warnings=False: enum из models и str вместо enum из schemas сериализуются
+        # одинаково, предупреждение о несовпадении класса здесь лишнее
+        return self.adapter.dump_json(self.rows(db, page), warnings=False)
+
+
+EMPLOYEES = Projection(models.Employee, schemas.Employee, crud.EMPLOYEE_SORTS, EMPLOYEE_FILTERS)
+DEPARTMENTS = Projection(models.Department, schemas.Department, crud.DEPARTMENT_SORTS)
+USERS = Projection(models.User, schemas.User, crud.USER_SORTS)
+DOCUMENTS = Projection(models.Document, schemas.Document, crud.DOCUMENT_SORTS, DOCUMENT_FILTERS)
+VACATIONS = Projection(models.Vacation, schemas.Vacation, crud.VACATION_SORTS, VACATION_FILTERS)
+ROLES = Projection(models.Role, schemas.Role, crud.ROLE_SORTS)
+
+
+def page_response(db: Session, response: Response, projection: Projection, query=None, *,
+                  skip: int = 0, limit: int = 100,
+                  cursor: Optional[str] = None, sort: Optional[str] = None, filters=()) -> Response:
+    """
+    Страница списка готовым JSON. response — Response маршрута: его заголовки
+    (ETag, X-Next-Cursor) FastAPI к возвращённому Response не добавляет, копируем сами.
+    """
+    query = (query if query is not None else db.query(projection.model)).with_entities(*projection.columns)
+    if filters:
+        query = projection.filters.apply(query, filters)
+    page = paginate(query, projection.model, skip=skip, limit=limit,
+                    cursor=cursor, sort=sort, allowed_sorts=projection.allowed_sorts)
+    with_next_cursor(response, page, limit, sort)
+    return Response(projection.dump(db, page), media_type="application/json", headers=dict(response.headers))
+
+
+def calendar_page_response(db: Session, response: Response, date_from, date_to,
+                           department_id: Optional[int] = None, status=None, **paging) -> Response:
+    query = vacation_calendar.calendar_query(db, date_from, date_to, department_id, status)
+    return page_response(db, response, VACATIONS, query, **paging)
@@ -0,0 +1,183 @@
+"""
+Хранилище содержимого документов: файлы по SHA-256 содержимого.
+
+    python -m storage gc                  # удалить файлы, на которые нет ссылок
+    python -m storage gc --grace 3600
+
+Файл лежит в {storage_dir}/ab/cd/abcd...: одинаковые сканы хранятся один раз.
+Загрузка пишет поток запроса во временный файл в том же каталоге, считая хэш
+по ходу (в потоке из пула, hashlib отпускает GIL), и атомарно переименовывает
+его в итоговый путь; весь файл в памяти не держится. Если такой файл уже есть,
+временный удаляется, а у существующего обновляется mtime.
+
+Файлы при удалении документа не трогаются: другой документ может ссылаться на
+тот же хэш или как раз загружать его. Лишние файлы убирает gc — только старше
+grace секунд по mtime, поэтому идущая загрузка свой файл не потеряет.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import AsyncIterator, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+import http_cache
+
+# Запись на диск пачками: меньше переходов в пул потоков на мелких чанках ASGI
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class Blob(NamedTuple):
+    sha256: str
+    size: int
+    deduplicated: bool
+
+
+class BlobResponse(FileResponse):
+    # Чанк 1 МБ вместо 64 КБ: для больших файлов меньше чтений и send().
+    # Range и If-Range обрабатывает FileResponse; сервер с расширением
+    # http.response.pathsend отдаёт файл сам, без чтения в Python
+    chunk_size = 1024 * 1024
+
+
+def check_content_length(request: Request, max_bytes: int):
+    """Ранний отказ по Content-Length; без заголовка (chunked) предел проверит save()."""
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise UploadTooLarge(f"File is larger than {max_bytes} bytes")
+
+
+def _write(file, digest, data):
+    digest.update(data)
+    file.write(data)
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def relative_path(self, sha256: str) -> str:
+        return os.path.join(sha256[:2], sha256[2:4], sha256)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, self.relative_path(sha256))
+
+    async def save(self, chunks: AsyncIterator[bytes], max_bytes: int) -> Blob:
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        digest, size, buffer = hashlib.sha256(), 0, bytearray()
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(f"File is larger than {max_bytes} bytes")
+                    buffer += chunk
+                    if len(buffer) >= WRITE_BUFFER_BYTES:
+                        data, buffer = buffer, bytearray()
+                        await run_in_threadpool(_write, file, digest, data)
+                await run_in_threadpool(_write, file, digest, buffer)
+                await run_in_threadpool(os.fsync, file.fileno())
+            return await run_in_threadpool(self._commit, tmp_path, digest.hexdigest(), size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _commit(self, tmp_path: str, sha256: str, size: int) -> Blob:
+        final_path = self.path(sha256)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+            # Свежий mtime: gc не удалит файл, пока новая ссылка на него не записана
+            os.utime(final_path)
+            return Blob(sha256, size, True)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return Blob(sha256, size, False)
+
+    def collect_garbage(self, referenced, grace_seconds: float = 3600) -> dict:
+        """referenced(hashes) -> множество хэшей из hashes, на которые есть ссылки."""
+        cutoff = time.time() - grace_seconds
+        result = {"checked": 0, "removed": 0, "removed_bytes": 0}
+        for directory, _, files in os.walk(self.root):
+            # В tmp — брошенные временные файлы упавших загрузок, ссылок на них нет
+            in_tmp = directory == self.tmp_dir
+            old = {}
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                if stat.st_mtime < cutoff:
+                    old[name] = (path, stat.st_size)
+            result["checked"] += len(files)
+            keep = set() if in_tmp else referenced(list(old))
+            for name, (path, size) in old.items():
+                if name not in keep:
+                    os.remove(path)
+                    result["removed"] += 1
+                    result["removed_bytes"] += size
+        return result
+
+
+def content_response(request: Request, store: BlobStore, sha256: str, content_type: Optional[str],
+                     filename: Optional[str] = None, accel_redirect: Optional[str] = None) -> Response:
+    """
+    Ответ с файлом. ETag — хэш содержимого (сильный: байты по нему однозначны),
+    совпавший If-None-Match даёт 304 без открытия файла. С accel_redirect файл
+    отдаёт nginx (X-Accel-Redirect, internal location на storage_dir).
+    """
+    etag = f'"{sha256}"'
+    headers = {"ETag": etag, "Cache-Control": http_cache.REVALIDATE}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and http_cache.etag_matches(if_none_match, etag):
+        raise http_cache.NotModified(headers)
+    media_type = content_type or "application/octet-stream"
+    if accel_redirect:
+        headers["X-Accel-Redirect"] = f"{accel_redirect.rstrip('/')}/{store.relative_path(sha256)}"
+        return Response(media_type=media_type, headers=headers)
+    return BlobResponse(store.path(sha256), media_type=media_type, headers=headers, filename=filename)
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+def get_storage() -> BlobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            from config import settings
+            _store = BlobStore(settings.storage_dir)
+        return _store
+
+
+def main():
+    import models
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["gc"])
+    parser.add_argument("--grace", type=float, default=3600)
+    args = parser.parse_args()
+
+    def referenced(hashes):
+        if not hashes:
+            return set()
+        with SessionLocal() as db:
+            return {
+                row.content_sha256 for row in
+                db.query(models.Document.content_sha256).filter(models.Document.content_sha256.in_(hashes))
+            }
+
+    print(get_storage().collect_garbage(referenced, args.grace))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, and_, cast, func, literal, select
+from sqlalchemy.orm import Session
+import models
+
+# Календарь отпусков: кто отсутствует в периоде, проверка пересечений при
+# записи и число отсутствующих по дням. Периоды закрытые: [start, end].
+# Поиск пересечений идёт по индексам Vacation (см. models.py).
+
+# Отклонённые заявки дни в календаре не занимают
+ACTIVE_STATUSES = (models.VacationStatusEnum.requested, models.VacationStatusEnum.approved)
+MAX_CALENDAR_DAYS = 366
+
+
+class InvalidPeriod(ValueError):
+    pass
+
+
+class VacationConflict(ValueError):
+    pass
+
+
+def overlaps(date_from: date, date_to: date):
+    return and_(models.Vacation.start_date <= date_to, models.Vacation.end_date >= date_from)
+
+
+def check_period(date_from: date, date_to: date, max_days: Optional[int] = MAX_CALENDAR_DAYS):
+    if date_from > date_to:
+        raise InvalidPeriod("Period start must not be after its end")
+    if max_days is not None and (date_to - date_from).days >= max_days:
+        raise InvalidPeriod(f"Period must not be longer than {max_days} days")
+
+
+def ensure_no_overlap(db: Session, employee_id: int, start_date: date, end_date: date,
+                      status, exclude_id: Optional[int] = None):
+    check_period(start_date, end_date, max_days=None)
+    if status not in ACTIVE_STATUSES:
+        return
+    # Блокировка строки сотрудника: его параллельные заявки проверяются по очереди
+    # (в SQLite FOR UPDATE не нужен — запись и так сериализована)
+    db.query(models.Employee.id).filter(models.Employee.id == employee_id).with_for_update().first()
+    query = db.query(models.Vacation.id, models.Vacation.start_date, models.Vacation.end_date).filter(
+        models.Vacation.employee_id == employee_id,
+        models.Vacation.status.in_(ACTIVE_STATUSES),
+        overlaps(start_date, end_date),
+    )
+    if exclude_id is not None:
+        query = query.filter(models.Vacation.id != exclude_id)
+    clash = query.first()
+    if clash is not None:
+        raise VacationConflict(
+            f"Vacation overlaps with vacation {clash.id} ({clash.start_date} - {clash.end_date})"
+        )
+
+
+def _filter(query, date_from: date, date_to: date, department_id: Optional[int], status):
+    query = query.filter(overlaps(date_from, date_to))
+    if status is not None:
+        query = query.filter(models.Vacation.status == status)
+    else:
+        query = query.filter(models.Vacation.status.in_(ACTIVE_STATUSES))
+    if department_id is not None:
+        query = query.join(models.Employee, models.Employee.id == models.Vacation.employee_id).filter(
+            models.Employee.department_id == department_id
+        )
+    return query
+
+
+def calendar_query(db: Session, date_from: date, date_to: date,
+                   department_id: Optional[int] = None, status=None):
+    check_period(date_from, date_to)
+    return _filter(db.query(models.Vacation), date_from, date_to, department_id, status)
+
+
+def _days(dialect: str, date_from: date, date_to: date):
+    # Ряд дат периода рекурсивным CTE; шаг на день у каждой СУБД свой
+    first = literal(date_from, Date)
+    if dialect == "postgresql":
+        first = cast(first, Date)
+    days = select(first.label("day")).cte("days", recursive=True)
+    step = days.c.day + 1 if dialect == "postgresql" else func.date(days.c.day, "+1 day")
+    return days.union_all(select(step).where(days.c.day < date_to))
+
+
+def absence_by_day(db: Session, date_from: date, date_to: date,
+                   department_id: Optional[int] = None, status=None):
+    """Число отсутствующих сотрудников на каждый день периода, одним запросом."""
+    check_period(date_from, date_to)
+    days = _days(db.get_bind().dialect.name, date_from, date_to)
+    # MATERIALIZED: отпуска периода выбираются по индексу один раз; иначе SQLite
+    # встраивает подзапрос и повторяет поиск по индексу для каждого дня
+    vacations = (
+        _filter(
+            db.query(models.Vacation.employee_id, models.Vacation.start_date, models.Vacation.end_date),
+            date_from, date_to, department_id, status,
+        )
+        .cte("period_vacations")
+        .prefix_with("MATERIALIZED", dialect="sqlite")
+        .prefix_with("MATERIALIZED", dialect="postgresql")
+    )
+    covers = and_(vacations.c.start_date <= days.c.day, vacations.c.end_date >= days.c.day)
+    rows = db.execute(
+        select(days.c.day, func.count(func.distinct(vacations.c.employee_id)).label("absent"))
+        .select_from(days.outerjoin(vacations, covers))
+        .group_by(days.c.day)
+        .order_by(days.c.day)
+    )
+    return [{"day": row.day, "absent": row.absent} for row in rows]